@@ -0,0 +1,153 @@
+"""Motor de decisiones de oferta sobre lotes completos.
+
+Evalúa las reglas de ajuste al 95 % y los criterios de postulación con
+operaciones vectoriales de NumPy sobre columnas de montos en centavos
+(enteros), de modo que el dinero se mantiene exacto. Las funciones escalares
+`debe_ajustar_oferta_95`, `debe_postular` y `aplicar_criterios_ajuste` usan
+estas mismas reglas con arreglos de un elemento.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+
+import numpy as np
+
+from agents.common.money import parse_minor
+
+RAZON_SIN_REGLAS = "Sin reglas aplicables"
+RAZON_SIN_MONTOS = "Montos insuficientes para ajuste"
+RAZON_PRESUPUESTO_INVALIDO = "Presupuesto inválido"
+RAZON_SOBRE_120 = "Match 70-100% y oferta >120% del presupuesto"
+RAZON_DIFERENCIA_50 = "Match 100% y diferencia >=50% con el presupuesto"
+RAZON_BAJO_90 = "Match 100% y oferta <90% del presupuesto"
+
+# El índice es el código que devuelve `reglas_95`; desde 3 en adelante hay ajuste.
+RAZONES = np.array([
+    RAZON_SIN_REGLAS,
+    RAZON_SIN_MONTOS,
+    RAZON_PRESUPUESTO_INVALIDO,
+    RAZON_SOBRE_120,
+    RAZON_DIFERENCIA_50,
+    RAZON_BAJO_90,
+], dtype=object)
+PRIMER_CODIGO_AJUSTE = 3
+
+PORCENTAJE_AJUSTE = 95  # sobre 100
+
+
+def a_centavos(valor) -> Optional[int]:
+    """Convierte un monto (Decimal, int, float o str) a centavos enteros.
+
+    Los textos ("$ 1.234,56") se interpretan con `agents.common.money`.
+    """
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        return parse_minor(valor)
+    try:
+        d = Decimal(str(valor)) if not isinstance(valor, Decimal) else valor
+    except Exception:
+        return None
+    if not d.is_finite():
+        return None
+    return int((d * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def desde_centavos(centavos: int) -> Decimal:
+    """Centavos enteros a Decimal con dos decimales."""
+    return Decimal(int(centavos)).scaleb(-2)
+
+
+def ajuste_95(centavos):
+    """95 % de un monto en centavos, redondeando la mitad hacia arriba."""
+    return (np.asarray(centavos, dtype=np.int64) * PORCENTAJE_AJUSTE + 50) // 100
+
+
+def reglas_95(presupuesto, ofertado, match_pct, valido=True):
+    """Aplica las reglas del 95 % sobre arreglos de centavos.
+
+    - 70-100 % match y oferta >120 % del presupuesto → 95 % del presupuesto
+    - 100 % match y diferencia >=50 % (oferta >=150 % del presupuesto o
+      presupuesto >=150 % de la oferta) → 95 %
+    - 100 % match y oferta <90 % del presupuesto → 95 %
+
+    Las comparaciones se hacen con enteros (p. ej. `10*o > 12*p`) para no
+    perder exactitud.
+
+    Returns:
+        Tupla (codigo, ajustar, nuevo) de arreglos; `codigo` indexa `RAZONES`
+        y `nuevo` es el 95 % del presupuesto en centavos.
+    """
+    p = np.asarray(presupuesto, dtype=np.int64)
+    o = np.asarray(ofertado, dtype=np.int64)
+    m = np.asarray(match_pct, dtype=np.int64)
+    v = np.asarray(valido, dtype=bool)
+
+    sobre_120 = (m >= 70) & (m <= 100) & (10 * o > 12 * p)
+    diferencia_50 = (m == 100) & ((2 * o >= 3 * p) | (2 * p >= 3 * o))
+    bajo_90 = (m == 100) & (10 * o < 9 * p)
+
+    codigo = np.select(
+        [~v, p <= 0, sobre_120, diferencia_50, bajo_90],
+        [1, 2, 3, 4, 5],
+        default=0,
+    )
+    return codigo, codigo >= PRIMER_CODIGO_AJUSTE, ajuste_95(p)
+
+
+def regla_postular(monto_licitacion, monto_catalogo, tipo_compra):
+    """Criterios de postulación en forma vectorial.
+
+    Siempre se postula si la licitación no supera el catálogo; si lo supera,
+    solo se postula a Trato Directo.
+    """
+    lic = np.asarray(monto_licitacion, dtype=np.int64)
+    cat = np.asarray(monto_catalogo, dtype=np.int64)
+    tipo = np.asarray(tipo_compra, dtype=object)
+    return (lic <= cat) | (tipo == "Trato Directo")
+
+
+def _columna_centavos(serie):
+    """Columna pandas de montos → (centavos int64, máscara de válidos)."""
+    import pandas as pd
+
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        valores = serie.to_numpy(dtype=float, na_value=np.nan)
+        valido = np.isfinite(valores)
+        centavos = np.floor(np.where(valido, valores, 0.0) * 100 + 0.5).astype(np.int64)
+        return centavos, valido
+    convertidos = [a_centavos(v) for v in serie.tolist()]
+    valido = np.array([c is not None for c in convertidos], dtype=bool)
+    centavos = np.array([c if c is not None else 0 for c in convertidos], dtype=np.int64)
+    return centavos, valido
+
+
+def evaluar_ofertas(df):
+    """Evalúa todas las reglas sobre un lote columnar de ofertas.
+
+    Args:
+        df: DataFrame con columnas `presupuesto`, `ofertado` y `match_pct`;
+            opcionalmente `tipo_compra` y `monto_catalogo` para decidir la
+            postulación. Los montos pueden ser numéricos o Decimal/None.
+
+    Returns:
+        DataFrame con el mismo índice y columnas `ajustar` (bool),
+        `nuevo_monto_centavos` (Int64, nulo si no hay ajuste), `razon` y,
+        si hay datos de catálogo, `postular` (bool).
+    """
+    import pandas as pd
+
+    presupuesto, p_ok = _columna_centavos(df["presupuesto"])
+    ofertado, o_ok = _columna_centavos(df["ofertado"])
+    match_pct = pd.to_numeric(df["match_pct"], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+
+    codigo, ajustar, nuevo = reglas_95(presupuesto, ofertado, match_pct, p_ok & o_ok)
+    salida = pd.DataFrame(index=df.index)
+    salida["ajustar"] = ajustar
+    salida["nuevo_monto_centavos"] = pd.array(np.where(ajustar, nuevo, 0), dtype="Int64")
+    salida.loc[~ajustar, "nuevo_monto_centavos"] = pd.NA
+    salida["razon"] = RAZONES[codigo]
+
+    if "monto_catalogo" in df.columns and "tipo_compra" in df.columns:
+        catalogo, c_ok = _columna_centavos(df["monto_catalogo"])
+        salida["postular"] = regla_postular(presupuesto, catalogo, df["tipo_compra"].to_numpy(dtype=object)) & p_ok & c_ok
+    return salida
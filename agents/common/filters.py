@@ -2,6 +2,8 @@ import json
 import pathlib
 from typing import Optional
 
+from agents.common.decisiones import a_centavos, ajuste_95, desde_centavos, regla_postular, PORCENTAJE_AJUSTE
+
 EXCLUS_DEFAULT = [
     "logo", "logotipo", "impreso", "impresión", "impresas",
     "personalizado", "personalizada", "serigrafía", "serigrafiado",
@@ -51,20 +53,8 @@ def debe_postular(monto_licitacion: float, monto_catalogo: float, tipo_compra: s
     Returns:
         True si debe postular, False si no
     """
-    # Criterio 1: Si el monto de licitación es menor o igual al catálogo, siempre postular
-    if monto_licitacion <= monto_catalogo:
-        return True
-    
-    # Criterio 2: Si monto_licitacion > monto_catalogo Y es Licitación Pública, NO postular
-    if tipo_compra == "Licitación Pública":
-        return False
-    
-    # Criterio 3: Si monto_licitacion > monto_catalogo Y es Trato Directo, SÍ postular
-    if tipo_compra == "Trato Directo":
-        return True
-    
-    # Por defecto, no postular si no cumple ningún criterio
-    return False
+    # Misma regla que el motor por lotes (agents.common.decisiones.evaluar_ofertas)
+    return bool(regla_postular(a_centavos(monto_licitacion), a_centavos(monto_catalogo), tipo_compra))
 
 def aplicar_criterios_ajuste(monto_licitacion: float, monto_catalogo: float) -> dict:
     """Aplica criterios de ajuste de presupuesto (95% de monto_licitacion).
@@ -76,12 +66,13 @@ def aplicar_criterios_ajuste(monto_licitacion: float, monto_catalogo: float) ->
     Returns:
         Dict con monto_ajustado y info sobre si está dentro del rango del catálogo
     """
-    monto_ajustado = monto_licitacion * 0.95
+    ajustado_centavos = int(ajuste_95(a_centavos(monto_licitacion)))
+    monto_ajustado = float(desde_centavos(ajustado_centavos))
     
     return {
         "monto_ajustado": monto_ajustado,
         "monto_original": monto_licitacion,
-        "porcentaje_ajuste": 0.95,
-        "dentro_catalogo": monto_ajustado <= monto_catalogo,
+        "porcentaje_ajuste": PORCENTAJE_AJUSTE / 100,
+        "dentro_catalogo": ajustado_centavos <= a_centavos(monto_catalogo),
         "monto_catalogo": monto_catalogo
     }
@@ -0,0 +1,227 @@
+"""Extracción de HTML compartida por los scrapers (lxml, un solo parseo).
+
+Antes cada scraper armaba un árbol completo de BeautifulSoup con
+`html.parser` para leer un puñado de selectores, y `contacts_scraper` parseaba
+cada página dos veces (título y enlaces). Aquí:
+
+* `parsear` arma el árbol una vez con lxml (en C) y `seleccionar` aplica
+  selectores CSS simples traducidos a XPath compilados y cacheados.
+* `extraer_pagina` es el camino "solo lo necesario": recorre el documento
+  con un *parser target* de lxml que solo guarda título, enlaces y metas,
+  sin construir el árbol (equivalente a un `SoupStrainer`).
+* `filas_precio` devuelve filas de ofertas (vendedor, precio, stock) del
+  mismo árbol.
+
+Selectores soportados: `tag`, `#id`, `.clase`, `[attr]`, `[attr='v']`,
+combinados (`img.product.image`), descendiente (`table.ofertas tr`) y
+grupos separados por coma.
+"""
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urljoin
+
+from lxml import etree, html as lxml_html
+
+_RE_SIMPLE = re.compile(
+    r"(?P<tag>[a-zA-Z][\w-]*|\*)?"
+    r"(?P<resto>(?:#[\w-]+|\.[\w-]+|\[[\w-]+(?:=(?:'[^']*'|\"[^\"]*\"|[^\]]*))?\])*)$"
+)
+_RE_PARTE = re.compile(r"#([\w-]+)|\.([\w-]+)|\[([\w-]+)(?:=('[^']*'|\"[^\"]*\"|[^\]]*))?\]")
+
+
+def _literal(valor: str) -> str:
+    """Literal XPath 1.0 para `valor` (que no admite escapes de comillas)."""
+    if "'" not in valor:
+        return f"'{valor}'"
+    if '"' not in valor:
+        return f'"{valor}"'
+    partes = valor.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{p}'" for p in partes) + ")"
+
+
+def _simple_a_xpath(simple: str) -> str:
+    m = _RE_SIMPLE.match(simple)
+    if not m or not simple:
+        raise ValueError(f"Selector no soportado: {simple!r}")
+    condiciones = []
+    for id_, clase, attr, valor in _RE_PARTE.findall(m.group("resto")):
+        if id_:
+            condiciones.append(f"@id='{id_}'")
+        elif clase:
+            condiciones.append(f"contains(concat(' ', normalize-space(@class), ' '), ' {clase} ')")
+        elif valor:
+            if valor[:1] in "'\"" and valor[-1:] == valor[:1] and len(valor) > 1:
+                valor = valor[1:-1]
+            condiciones.append(f"@{attr}={_literal(valor)}")
+        else:
+            condiciones.append(f"@{attr}")
+    paso = m.group("tag") or "*"
+    return paso + "".join(f"[{c}]" for c in condiciones)
+
+
+@lru_cache(maxsize=256)
+def css_a_xpath(selector: str) -> etree.XPath:
+    """Compila (una vez) un selector CSS simple a `etree.XPath`."""
+    grupos = []
+    for grupo in selector.split(","):
+        pasos = grupo.split()
+        if not pasos:
+            raise ValueError(f"Selector vacío en {selector!r}")
+        # Solo descendientes: el nodo de contexto (p. ej. una fila) no se
+        # selecciona a sí mismo
+        grupos.append("descendant::" + "//".join(_simple_a_xpath(p) for p in pasos))
+    return etree.XPath(" | ".join(grupos))
+
+
+def parsear(html: Union[str, bytes]):
+    """Árbol lxml del documento (tolerante a HTML mal formado).
+
+    Un `str` se pasa a bytes para que una declaración `<?xml ... encoding?>`
+    no haga fallar a lxml; un documento sin elementos (vacío, solo espacios
+    o comentarios) da un `<html></html>` vacío.
+    """
+    if not html:
+        return lxml_html.fromstring("<html></html>")
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    try:
+        return lxml_html.document_fromstring(html, parser=lxml_html.HTMLParser(encoding="utf-8"))
+    except etree.ParserError:
+        return lxml_html.fromstring("<html></html>")
+
+
+def seleccionar(arbol, selector: str) -> list:
+    """Elementos que cumplen `selector`, en orden de documento."""
+    return css_a_xpath(selector)(arbol)
+
+
+def seleccionar_uno(arbol, selector: str):
+    encontrados = seleccionar(arbol, selector)
+    return encontrados[0] if encontrados else None
+
+
+def texto(elemento) -> str:
+    """Texto del elemento con espacios colapsados (como `get_text(strip=True)`)."""
+    if elemento is None:
+        return ""
+    return " ".join(elemento.text_content().split())
+
+
+def atributo(arbol, selector: str, nombre: str) -> Optional[str]:
+    """Primer valor no vacío de `nombre` entre los elementos de `selector`."""
+    for el in seleccionar(arbol, selector):
+        valor = (el.get(nombre) or "").strip()
+        if valor:
+            return valor
+    return None
+
+
+def titulo(arbol) -> str:
+    el = arbol.find(".//title")
+    return texto(el)
+
+
+def enlaces(arbol, base: Optional[str] = None) -> List[Tuple[str, str]]:
+    """(href, texto) de cada `<a href>`; con `base`, el href queda absoluto."""
+    salida = []
+    for a in arbol.iterfind(".//a[@href]"):
+        href = a.get("href").strip()
+        salida.append((urljoin(base, href) if base else href, texto(a)))
+    return salida
+
+
+def metas(arbol) -> Dict[str, str]:
+    """`name`/`property` → `content` de las etiquetas meta."""
+    salida: Dict[str, str] = {}
+    for m in arbol.iterfind(".//meta"):
+        clave = m.get("property") or m.get("name")
+        if clave and m.get("content") is not None:
+            salida.setdefault(clave, m.get("content").strip())
+    return salida
+
+
+def filas_precio(arbol, selector_filas: str, campos: Dict[str, str], respaldo: Optional[str] = "tr") -> List[Dict[str, str]]:
+    """Texto de cada campo por fila (p. ej. vendedor/precio/stock).
+
+    Si `selector_filas` no encuentra nada se usa `respaldo`. Los campos que
+    no están en una fila quedan en None.
+    """
+    filas = seleccionar(arbol, selector_filas)
+    if not filas and respaldo:
+        filas = seleccionar(arbol, respaldo)
+    salida = []
+    for fila in filas:
+        valores = {}
+        for nombre, sel in campos.items():
+            el = seleccionar_uno(fila, sel)
+            valores[nombre] = texto(el) if el is not None else None
+        salida.append(valores)
+    return salida
+
+
+@dataclass
+class PaginaExtraida:
+    """Lo que `extraer_pagina` obtiene de un documento."""
+    titulo: str = ""
+    enlaces: List[Tuple[str, str]] = field(default_factory=list)
+    metas: Dict[str, str] = field(default_factory=dict)
+
+
+class _Recolector:
+    """Parser target de lxml: solo guarda título, enlaces y metas."""
+
+    def __init__(self):
+        self.pagina = PaginaExtraida()
+        self._en_titulo = False
+        self._titulo: List[str] = []
+        self._enlace: Optional[List] = None  # [href, partes de texto]
+        self._profundidad_a = 0
+
+    def start(self, tag, attrib):
+        if tag == "a":
+            self._profundidad_a += 1
+            href = attrib.get("href")
+            if href is not None and self._enlace is None:
+                self._enlace = [href.strip(), []]
+        elif tag == "title":
+            self._en_titulo = True
+        elif tag == "meta":
+            clave = attrib.get("property") or attrib.get("name")
+            contenido = attrib.get("content")
+            if clave and contenido is not None:
+                self.pagina.metas.setdefault(clave, contenido.strip())
+
+    def end(self, tag):
+        if tag == "a" and self._profundidad_a:
+            self._profundidad_a -= 1
+            if not self._profundidad_a and self._enlace is not None:
+                self.pagina.enlaces.append((self._enlace[0], " ".join("".join(self._enlace[1]).split())))
+                self._enlace = None
+        elif tag == "title":
+            self._en_titulo = False
+
+    def data(self, datos):
+        if self._en_titulo:
+            self._titulo.append(datos)
+        if self._enlace is not None:
+            self._enlace[1].append(datos)
+
+    def close(self):
+        if self._enlace is not None:
+            self.pagina.enlaces.append((self._enlace[0], " ".join("".join(self._enlace[1]).split())))
+        self.pagina.titulo = " ".join("".join(self._titulo).split())
+        return self.pagina
+
+
+def extraer_pagina(html: Union[str, bytes], base: Optional[str] = None) -> PaginaExtraida:
+    """Título, enlaces y metas en una sola pasada, sin construir el árbol."""
+    if not html:
+        return PaginaExtraida()
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    pagina = etree.fromstring(html, etree.HTMLParser(target=_Recolector(), encoding="utf-8"))
+    if base:
+        pagina.enlaces = [(urljoin(base, h), t) for h, t in pagina.enlaces]
+    return pagina
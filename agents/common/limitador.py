@@ -0,0 +1,86 @@
+"""Limitador de ritmo por host (token bucket) para scrapers concurrentes.
+
+Cada host tiene su propio balde: se reponen `tasa` fichas por segundo hasta
+`capacidad`, y cada solicitud consume una. Así la cortesía se aplica por
+sitio y no con `sleep` globales, y varios sitios pueden consultarse en
+paralelo sin que uno frene al otro.
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """Balde de fichas seguro entre hilos."""
+
+    def __init__(self, tasa: float, capacidad: float = 1.0,
+                 reloj: Callable[[], float] = time.monotonic,
+                 dormir: Callable[[float], None] = time.sleep):
+        if tasa <= 0:
+            raise ValueError("La tasa debe ser positiva")
+        self.tasa = tasa
+        self.capacidad = max(capacidad, 1.0)
+        self._fichas = self.capacidad
+        self._reloj = reloj
+        self._dormir = dormir
+        self._ultimo = reloj()
+        self._lock = threading.Lock()
+        self.esperado_s = 0.0
+
+    def _reservar(self) -> float:
+        """Toma una ficha (posiblemente a futuro) y devuelve cuánto esperar."""
+        with self._lock:
+            ahora = self._reloj()
+            self._fichas = min(self.capacidad, self._fichas + (ahora - self._ultimo) * self.tasa)
+            self._ultimo = ahora
+            self._fichas -= 1
+            espera = -self._fichas / self.tasa if self._fichas < 0 else 0.0
+            self.esperado_s += espera
+            return espera
+
+    def adquirir(self) -> float:
+        """Bloquea hasta tener una ficha; devuelve los segundos esperados."""
+        espera = self._reservar()
+        if espera > 0:
+            self._dormir(espera)
+        return espera
+
+
+class LimitadorPorHost:
+    """Un `TokenBucket` por host, creado al primer uso.
+
+    Args:
+        tasa: solicitudes por segundo por host.
+        capacidad: ráfaga máxima por host.
+        por_host: tasas específicas, p. ej. `{"www.prisa.cl": 0.5}`.
+    """
+
+    def __init__(self, tasa: float = 1.0, capacidad: float = 1.0,
+                 por_host: Optional[Dict[str, float]] = None,
+                 reloj: Callable[[], float] = time.monotonic,
+                 dormir: Callable[[float], None] = time.sleep):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self.por_host = dict(por_host or {})
+        self._reloj = reloj
+        self._dormir = dormir
+        self._baldes: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def balde(self, host: str) -> TokenBucket:
+        with self._lock:
+            balde = self._baldes.get(host)
+            if balde is None:
+                balde = TokenBucket(self.por_host.get(host, self.tasa), self.capacidad, self._reloj, self._dormir)
+                self._baldes[host] = balde
+            return balde
+
+    def adquirir(self, url: str) -> float:
+        """Espera el turno del host de `url`."""
+        return self.balde(urlsplit(url).netloc.lower()).adquirir()
+
+    def stats(self) -> Dict[str, float]:
+        """Segundos esperados por host."""
+        with self._lock:
+            return {host: round(b.esperado_s, 3) for host, b in self._baldes.items()}
@@ -0,0 +1,166 @@
+"""Parser único de montos de dinero (CLP, COP, USD y UF).
+
+Todas las cifras se devuelven en unidades menores enteras (centésimas: 1 peso
+= 100), igual que `agents.common.decisiones`, para no arrastrar errores de
+punto flotante.
+
+Reglas de separadores:
+
+* Si el texto tiene `.` y `,`, el que aparece último es el decimal
+  (`1.234,56` y `1,234.56` valen lo mismo).
+* Si solo hay un tipo de separador y aparece varias veces, es de miles
+  (`1.234.567`).
+* Si aparece una sola vez, es decimal salvo que lo sigan exactamente tres
+  dígitos (`1.234` son mil doscientos treinta y cuatro pesos; `12,5` es doce
+  coma cinco).
+* Los separadores de miles deben formar grupos válidos: el primero de uno a
+  tres dígitos sin cero inicial y los demás de exactamente tres. Si no, un
+  separador único se toma como decimal (`0.500` es cero coma cinco) y uno
+  repetido invalida el monto (`1.234.5` → None).
+"""
+import re
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+MINOR_PER_UNIT = 100
+
+# Moneda por símbolo/código. "$" sin más contexto se interpreta como CLP.
+_MONEDAS = {"US$": "USD", "USD": "USD", "CLP": "CLP", "COP": "COP", "UF": "UF", "$": "CLP"}
+
+_RE_MONTO = re.compile(
+    r"\s*(-)?\s*(US\$|USD|CLP|COP|UF|\$|us\$|usd|clp|cop|uf)?\s*(-)?\s*"
+    r"(\d(?:[\d.,\s]*[\d.,])?)\s*(USD|CLP|COP|UF|\$|usd|clp|cop|uf)?\s*"
+)
+
+
+class Money(NamedTuple):
+    """Monto en unidades menores (`minor`) con su código de moneda."""
+    minor: int
+    currency: str
+
+    def to_decimal(self) -> Decimal:
+        return minor_to_decimal(self.minor)
+
+
+def minor_to_decimal(minor: int) -> Decimal:
+    """Unidades menores a Decimal con dos decimales (123456 → 1234.56)."""
+    return Decimal(int(minor)).scaleb(-2)
+
+
+def _miles_validos(entero: str, sep: str) -> bool:
+    """"1.234.567": primer grupo de 1 a 3 dígitos sin cero inicial y los
+    siguientes de exactamente 3."""
+    grupos = entero.split(sep)
+    primero = grupos[0]
+    return (
+        primero.isdigit() and len(primero) <= 3 and primero[0] != "0"
+        and all(len(g) == 3 and g.isdigit() for g in grupos[1:])
+    )
+
+
+def _a_minor(num: str) -> Optional[int]:
+    """Convierte la parte numérica (solo dígitos y separadores) a centésimas."""
+    coma = num.rfind(",")
+    punto = num.rfind(".")
+    if coma == punto:  # sin separadores (ambos -1)
+        return int(num) * MINOR_PER_UNIT if num.isdigit() else None
+    dec, otro = (coma, punto) if coma > punto else (punto, coma)
+    sep = num[dec]
+    if num.count(sep) > 1:
+        if otro >= 0 or not _miles_validos(num, sep):
+            return None  # "1.2.3,4,5" o "1.234.5": separadores inválidos
+        dec = -1  # "1.234.567": solo miles
+    elif otro < 0 and len(num) - dec == 4 and _miles_validos(num, sep):
+        dec = -1  # "1.234": un separador seguido de tres dígitos es de miles
+    if dec < 0:
+        entero, fraccion = num.replace(sep, ""), ""
+    else:
+        entero, fraccion = num[:dec], num[dec + 1:]
+        if otro >= 0:
+            if not _miles_validos(entero, num[otro]):
+                return None  # "12.34,5": grupos de miles mal formados
+            entero = entero.replace(num[otro], "")
+        if fraccion and not fraccion.isdigit():
+            return None
+    if not entero.isdigit():
+        return None
+    if not fraccion:
+        return int(entero) * MINOR_PER_UNIT
+    minor = int(entero) * MINOR_PER_UNIT + int((fraccion + "0")[:2])
+    if len(fraccion) > 2 and fraccion[2] >= "5":
+        minor += 1  # redondeo de la mitad hacia arriba
+    return minor
+
+
+def parse_money(texto, default_currency: str = "CLP") -> Optional[Money]:
+    """Interpreta textos como "$ 1.234.567,89", "US$ 1,234.50" o "UF 12,5".
+
+    Args:
+        texto: monto como texto (también acepta int/float/Decimal).
+        default_currency: moneda cuando el texto no trae símbolo.
+
+    Returns:
+        `Money` o None si el texto no es un monto válido.
+    """
+    if type(texto) is not str:
+        if texto is None or isinstance(texto, bool):
+            return None
+        if isinstance(texto, float):
+            if texto != texto or texto in (float("inf"), float("-inf")):
+                return None
+            texto = Decimal(repr(texto))
+        if isinstance(texto, (int, Decimal)):
+            minor = (Decimal(texto) * MINOR_PER_UNIT).to_integral_value(rounding="ROUND_HALF_UP")
+            return Money(int(minor), default_currency)
+        texto = str(texto)
+    m = _RE_MONTO.fullmatch(texto)
+    if m is None:
+        return None
+    neg1, pre, neg2, num, post = m.groups()
+    if " " in num or "\xa0" in num or "\t" in num:
+        num = "".join(num.split())
+    minor = _a_minor(num)
+    if minor is None:
+        return None
+    if neg1 or neg2:
+        minor = -minor
+    simbolo = pre or post
+    moneda = _MONEDAS.get(simbolo.upper(), default_currency) if simbolo else default_currency
+    return Money(minor, moneda)
+
+
+def parse_minor(texto) -> Optional[int]:
+    """Atajo de `parse_money` que devuelve solo las unidades menores."""
+    money = parse_money(texto)
+    return money.minor if money is not None else None
+
+
+def parse_many(serie, default_currency: str = "CLP"):
+    """Versión vectorial de `parse_money` para columnas de pandas.
+
+    Las columnas de montos repiten mucho sus valores: se factoriza la serie
+    (en C), se interpreta cada valor distinto una sola vez y el resultado se
+    reparte con indexación de NumPy.
+
+    Returns:
+        DataFrame con el índice de `serie` y columnas `minor` (Int64, nulo si
+        el texto no es válido) y `currency`.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    n = len(unicos)
+    minor_u = np.zeros(n + 1, dtype=np.int64)
+    valido_u = np.zeros(n + 1, dtype=bool)
+    moneda_u = np.empty(n + 1, dtype=object)
+    moneda_u[:] = None
+    for i, valor in enumerate(unicos.tolist()):
+        money = parse_money(valor, default_currency)
+        if money is not None:
+            minor_u[i], valido_u[i], moneda_u[i] = money.minor, True, money.currency
+    # El código -1 (nulos) apunta a la última posición, que queda inválida
+    resultado = pd.DataFrame(index=serie.index)
+    resultado["minor"] = pd.arrays.IntegerArray(minor_u[codigos], ~valido_u[codigos])
+    resultado["currency"] = moneda_u[codigos]
+    return resultado
@@ -1,4 +1,61 @@
 import csv
+import json
+import os
 def read_queue_csv(path: str) -> list[dict]:
     with open(path, newline="", encoding="utf-8") as f:
         return list(csv.DictReader(f))
+
+
+class JsonlQueue:
+    """Cola local de eventos en un archivo JSONL (solo se agregan líneas).
+
+    Cada consumidor (p. ej. "meta", "linkedin") guarda su propio offset en
+    `<path>.<consumidor>.offset`, así que varios agentes leen la misma cola
+    sin quitarse eventos entre ellos. `pending` no avanza el offset: el
+    consumidor llama a `ack` cuando procesó los eventos.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def append(self, records: list[dict]) -> int:
+        """Agrega los eventos con una sola escritura en modo append."""
+        if not records:
+            return 0
+        directorio = os.path.dirname(self.path)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        datos = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+        with open(self.path, "ab") as f:
+            f.write(datos)
+        return len(records)
+
+    def _offset_path(self, consumer: str) -> str:
+        return f"{self.path}.{consumer}.offset"
+
+    def offset(self, consumer: str) -> int:
+        try:
+            with open(self._offset_path(consumer), encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def pending(self, consumer: str) -> tuple[list[dict], int]:
+        """Eventos nuevos para `consumer` y el offset a confirmar con `ack`.
+        Solo se leen líneas completas (una escritura en curso queda para después)."""
+        inicio = self.offset(consumer)
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(inicio)
+                datos = f.read()
+        except OSError:
+            return [], inicio
+        fin = datos.rfind(b"\n") + 1
+        registros = [json.loads(linea) for linea in datos[:fin].splitlines() if linea.strip()]
+        return registros, inicio + fin
+
+    def ack(self, consumer: str, offset: int) -> None:
+        tmp = f"{self._offset_path(consumer)}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(offset))
+        os.replace(tmp, self._offset_path(consumer))
@@ -0,0 +1,30 @@
+"""Grado de paralelismo para sesiones de navegador headless.
+
+Cada Chrome headless usa ~300-500 MB, así que el número de sesiones
+simultáneas se acota por la memoria disponible además de lo solicitado.
+"""
+import os
+from typing import Optional
+
+MB_POR_SESION = int(os.getenv("LICI_MB_POR_SESION", "450"))
+
+
+def memoria_disponible_mb() -> Optional[int]:
+    """MemAvailable de /proc/meminfo en MB, o None si no se puede leer."""
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as f:
+            for linea in f:
+                if linea.startswith("MemAvailable:"):
+                    return int(linea.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def sesiones_paralelas(solicitadas: int, empresas: int, mb_por_sesion: int = MB_POR_SESION) -> int:
+    """Grado de paralelismo: lo solicitado, acotado por empresas y memoria libre."""
+    n = max(1, min(solicitadas, empresas))
+    disponible = memoria_disponible_mb()
+    if disponible is not None and mb_por_sesion > 0:
+        n = min(n, max(1, disponible // mb_por_sesion))
+    return n
@@ -0,0 +1,190 @@
+"""Escritura por lotes y en segundo plano hacia Google Sheets.
+
+`BufferedSheetWriter` acumula filas y las envía con `append_rows` cuando se
+junta un lote o pasa el intervalo configurado, desde un hilo propio, para que
+el bucle del navegador nunca espere por la red. Los errores 429/5xx se
+reintentan con backoff exponencial; lo que no se logre enviar al cerrar se
+guarda en un CSV local para reprocesarlo.
+"""
+import csv
+import logging
+import pathlib
+import queue
+import random
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+_CERRAR = object()
+
+
+def _status_code(exc: Exception):
+    """Código HTTP de un error de gspread/requests, si lo tiene."""
+    resp = getattr(exc, "response", None)
+    return getattr(resp, "status_code", None) or getattr(exc, "code", None)
+
+
+def es_reintentable(exc: Exception) -> bool:
+    """True para cuotas (429), errores 5xx y fallas de red sin código HTTP."""
+    code = _status_code(exc)
+    if code is None:
+        return True
+    try:
+        code = int(code)
+    except (TypeError, ValueError):
+        return True
+    return code == 429 or code >= 500
+
+
+class BufferedSheetWriter:
+    """Escritor de filas con buffer, envío por lotes y respaldo local.
+
+    Uso típico::
+
+        with BufferedSheetWriter(sheet) as writer:
+            writer.append(fila)
+    """
+
+    def __init__(self, sheet, batch_size: int = 100, flush_interval: float = 5.0,
+                 spill_path: str = "artifacts/sheet_pendientes.csv", max_retries: int = 5,
+                 backoff_base: float = 1.0, value_input_option: str = "USER_ENTERED"):
+        self.sheet = sheet
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = pathlib.Path(spill_path)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.value_input_option = value_input_option
+        self.enviadas = 0
+        self.lotes = 0
+        self.reintentos = 0
+        self.respaldadas = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pending: list[list] = []
+        self._cerrado = False
+        self._ultimo_error_reintentable = True
+        self._thread = threading.Thread(target=self._run, name="sheet-writer", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def append(self, fila) -> None:
+        """Encola una fila; nunca bloquea por red."""
+        if self._cerrado:
+            raise RuntimeError("BufferedSheetWriter ya fue cerrado")
+        self._queue.put(list(fila))
+
+    def close(self, timeout: float | None = None) -> None:
+        """Envía lo pendiente, detiene el hilo y respalda en disco lo no enviado.
+
+        El respaldo de lo que el hilo no logró enviar lo hace el propio hilo al
+        terminar. Si `timeout` vence con el hilo todavía enviando, no se toca
+        su buffer (se enviaría y respaldaría a la vez): el hilo respalda lo
+        que quede cuando termine.
+        """
+        if self._cerrado:
+            return
+        self._cerrado = True
+        self._queue.put(_CERRAR)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            log.warning("Sheets: el envío sigue en curso tras %ss; lo no enviado se respaldará al terminar", timeout)
+            return
+        # Filas encoladas después de la marca de cierre (append concurrente a close)
+        restantes = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _CERRAR:
+                restantes.append(item)
+        if restantes:
+            self._spill(restantes)
+        log.info("Sheets: %s", self.stats())
+
+    def stats(self) -> dict:
+        return {"enviadas": self.enviadas, "lotes": self.lotes,
+                "reintentos": self.reintentos, "respaldadas": self.respaldadas}
+
+    # ---------- hilo de envío ----------
+
+    def _run(self) -> None:
+        ultimo_envio = time.monotonic()
+        cerrar = False
+        while not cerrar:
+            espera = max(0.0, self.flush_interval - (time.monotonic() - ultimo_envio))
+            try:
+                item = self._queue.get(timeout=espera)
+                while True:
+                    if item is _CERRAR:
+                        cerrar = True
+                        break
+                    self._pending.append(item)
+                    if len(self._pending) >= self.batch_size:
+                        break
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            vencido = time.monotonic() - ultimo_envio >= self.flush_interval
+            if self._pending and (cerrar or vencido or len(self._pending) >= self.batch_size):
+                self._flush(final=cerrar)
+                ultimo_envio = time.monotonic()
+            elif vencido:
+                ultimo_envio = time.monotonic()
+        # Solo este hilo toca _pending: lo que no se pudo enviar se respalda aquí
+        if self._pending:
+            restantes = list(self._pending)
+            self._pending.clear()
+            self._spill(restantes)
+
+    def _flush(self, final: bool = False) -> None:
+        while self._pending:
+            lote = self._pending[:self.batch_size]
+            if not self._enviar(lote):
+                if final:
+                    return  # close() respalda lo que quede
+                if not self._ultimo_error_reintentable:
+                    del self._pending[:len(lote)]
+                    self._spill(lote)
+                    continue
+                return  # se reintenta en el próximo ciclo
+            del self._pending[:len(lote)]
+
+    def _enviar(self, lote: list[list]) -> bool:
+        self._ultimo_error_reintentable = True
+        for intento in range(self.max_retries + 1):
+            try:
+                self.sheet.append_rows(lote, value_input_option=self.value_input_option)
+                self.enviadas += len(lote)
+                self.lotes += 1
+                return True
+            except Exception as e:  # pylint: disable=broad-except
+                if not es_reintentable(e):
+                    log.error("Sheets rechazó un lote de %d filas: %s", len(lote), e)
+                    self._ultimo_error_reintentable = False
+                    return False
+                if intento == self.max_retries:
+                    log.warning("Sheets sigue fallando tras %d reintentos: %s", intento, e)
+                    return False
+                self.reintentos += 1
+                pausa = self.backoff_base * (2 ** intento) * (1 + random.random() * 0.25)
+                log.warning("Sheets ocupado (%s); reintento en %.1fs", e, pausa)
+                time.sleep(pausa)
+        return False
+
+    def _spill(self, filas: list[list]) -> None:
+        try:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.spill_path.open("a", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerows(filas)
+            self.respaldadas += len(filas)
+            log.warning("%d filas sin enviar respaldadas en %s", len(filas), self.spill_path)
+        except OSError as e:
+            log.error("No se pudieron respaldar %d filas: %s", len(filas), e)
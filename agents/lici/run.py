@@ -4,21 +4,26 @@ import time
 import csv
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Iterable, List, Optional, Tuple
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 # Add common utilities to path
 sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
 # from queue import load_postulaciones_queue  # noqa: E402
 # from status import actualizar_status  # noqa: E402
 # === Reglas de ajuste automático de oferta (añadidas) ===
 import re
 from decimal import Decimal, ROUND_HALF_UP
+from agents.common.decisiones import a_centavos, desde_centavos, reglas_95, RAZONES  # noqa: E402
+from agents.common.money import parse_money  # noqa: E402
+from agents.common.sesiones import sesiones_paralelas  # noqa: E402
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -36,23 +41,20 @@ EMPRESAS: List[str] = [
 
 OUTPUT_FILE = ARTIFACTS_DIR / f"lici_{now_fmt()}.csv"
 
+# Sesiones headless concurrentes (una por empresa), acotadas por la memoria
+# disponible (ver agents.common.sesiones)
+LICI_PARALELO = int(os.getenv("LICI_PARALELO", "1"))
+
 # ---------- Utilidades de montos y match ----------
 
 def limpiar_monto(texto: str) -> Optional[Decimal]:
     """Normaliza montos como "$ 1.234.567,89" a Decimal("1234567.89").
     Devuelve None si no hay monto válido.
+
+    Usa el parser compartido `agents.common.money.parse_money`.
     """
-    if not texto:
-        return None
-    s = str(texto).strip()
-    # Reemplazos comunes CLP: quitar símbolo, espacios, puntos de miles y convertir coma decimal
-    s = s.replace("$", "").replace("CLP", "").replace("cop", "").replace("COP", "")
-    s = re.sub(r"\s+", "", s)
-    s = s.replace(".", "").replace(",", ".")
-    try:
-        return Decimal(s)
-    except Exception:
-        return None
+    money = parse_money(texto)
+    return money.to_decimal() if money is not None else None
 
 def calcular_match_percentage(texto_requerimiento: str, texto_oferta: str) -> int:
     """Porcentaje simple de match basado en términos compartidos.
@@ -74,14 +76,17 @@ def debe_ajustar_oferta_95(presupuesto: Optional[Decimal], ofertado: Optional[De
     - 100% match y diferencia >=50% (oferta >=150% presupuesto o presupuesto >=150% oferta) → 95%
     - 100% match y oferta <90% presupuesto → 95%
     Devuelve (debe_ajustar, nuevo_valor, razón)
+
+    Envoltorio escalar de `agents.common.decisiones.reglas_95`; para lotes
+    grandes usar `agents.common.decisiones.evaluar_ofertas`.
     """
-    if presupuesto is None or ofertado is None:
-        return (False, None, "Montos insuficientes para ajuste")
-    if presupuesto <= 0:
-        return (False, None, "Presupuesto inválido")
-    razon = None
-    # ... reglas adicionales (omitidas por brevedad) ...
-    return (False, None, "Sin reglas aplicables")
+    p = a_centavos(presupuesto)
+    o = a_centavos(ofertado)
+    codigo, ajustar, nuevo = reglas_95(p or 0, o or 0, match_pct, p is not None and o is not None)
+    razon = RAZONES[int(codigo)]
+    if bool(ajustar):
+        return (True, desde_centavos(int(nuevo)), razon)
+    return (False, None, razon)
 
 # ---------- Modelo de datos ----------
 
@@ -111,79 +116,208 @@ def buscar_licitaciones(driver, empresa: str) -> List[Licitacion]:
     # Implementación real en el repo
     return []
 
+def _buscar_en_sesion_propia(empresa: str) -> List[Licitacion]:
+    """Busca con un driver dedicado a `empresa` (modo paralelo) y lo cierra.
+    Cada sesión hace su propio login: la empresa seleccionada vive en la
+    sesión del servidor y no puede compartirse entre hilos."""
+    driver = None
+    try:
+        driver = setup_driver()
+        login_lici(driver)
+        return buscar_licitaciones(driver, empresa)
+    except Exception as e:
+        logger.error(f"Error buscando licitaciones de {empresa}: {e}")
+        return []
+    finally:
+        if driver:
+            driver.quit()
+
 # ---------- Persistencia CSV existente ----------
 
+CSV_COLUMNAS = [
+    "codigo",
+    "titulo",
+    "presupuesto",
+    "ofertado",
+    "match_pct",
+    "items",
+    "fecha_creacion",
+    "fecha_cierre",
+    "link",
+]
+
+def _fila_csv(lic: Licitacion) -> list:
+    return [
+        lic.codigo,
+        lic.titulo,
+        str(lic.presupuesto) if lic.presupuesto is not None else "",
+        str(lic.ofertado) if lic.ofertado is not None else "",
+        lic.match_pct,
+        lic.items,
+        lic.fecha_creacion or "",
+        lic.fecha_cierre or "",
+        lic.link,
+    ]
+
 def guardar_resultados(licitaciones: List[Licitacion], output_file: Path) -> None:
     output_file = Path(output_file)
     output_file.parent.mkdir(parents=True, exist_ok=True)
     with output_file.open("w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
-        writer.writerow([
-            "codigo",
-            "titulo",
-            "presupuesto",
-            "ofertado",
-            "match_pct",
-            "items",
-            "fecha_creacion",
-            "fecha_cierre",
-            "link",
-        ])
+        writer.writerow(CSV_COLUMNAS)
         for lic in licitaciones:
-            writer.writerow([
-                lic.codigo,
-                lic.titulo,
-                str(lic.presupuesto) if lic.presupuesto is not None else "",
-                str(lic.ofertado) if lic.ofertado is not None else "",
-                lic.match_pct,
-                lic.items,
-                lic.fecha_creacion or "",
-                lic.fecha_cierre or "",
-                lic.link,
-            ])
+            writer.writerow(_fila_csv(lic))
     logger.info(f"Resultados guardados exitosamente en {output_file}")
 
-# ---------- Nueva exportación JSON para dashboard ----------
+# ---------- Exportación para dashboard (una sola pasada) ----------
+
+# Exportar también Parquet para el dashboard (requiere pyarrow)
+LICI_PARQUET = os.getenv("LICI_PARQUET", "0") == "1"
+PARQUET_LOTE = 10_000
+
+def _oferta_dict(lic: Licitacion) -> dict:
+    return {
+        "codigo": lic.codigo,
+        "titulo": lic.titulo,
+        "presupuesto": float(lic.presupuesto) if lic.presupuesto is not None else None,
+        "ofertado": float(lic.ofertado) if lic.ofertado is not None else None,
+        "match_pct": lic.match_pct,
+        "items": lic.items,
+        "fecha_creacion": lic.fecha_creacion,
+        "fecha_cierre": lic.fecha_cierre,
+        "link": lic.link,
+    }
 
-def guardar_resultados_json(licitaciones: List[Licitacion], output_file: Path) -> None:
-    """Exporta resultados a JSON con detalles, timestamps y estadísticas agregadas."""
-    output_file = Path(output_file)
-    output_file.parent.mkdir(parents=True, exist_ok=True)
+class ExportadorResultados:
+    """Exporta licitaciones a medida que llegan, recorriéndolas una sola vez.
 
-    total_ofertas = len(licitaciones)
-    valor_total_ofertado = sum([(lic.ofertado or Decimal(0)) for lic in licitaciones], Decimal(0))
-
-    # datos estructurados para el dashboard
-    data = {
-        "timestamp": now_fmt(),
-        "empresa_actual": ", ".join(EMPRESAS) if EMPRESAS else None,
-        "total_ofertas": total_ofertas,
-        "valor_total_ofertado": float(valor_total_ofertado),
-        "ofertas": [
-            {
-                "codigo": lic.codigo,
-                "titulo": lic.titulo,
-                "presupuesto": float(lic.presupuesto) if lic.presupuesto is not None else None,
-                "ofertado": float(lic.ofertado) if lic.ofertado is not None else None,
-                "match_pct": lic.match_pct,
-                "items": lic.items,
-                "fecha_creacion": lic.fecha_creacion,
-                "fecha_cierre": lic.fecha_cierre,
-                "link": lic.link,
-            }
-            for lic in licitaciones
-        ],
-        "stats": {
-            "min_oferta": float(min([lic.ofertado for lic in licitaciones if lic.ofertado is not None], default=Decimal(0))) if licitaciones else 0.0,
-            "max_oferta": float(max([lic.ofertado for lic in licitaciones if lic.ofertado is not None], default=Decimal(0))) if licitaciones else 0.0,
-            "avg_oferta": float((valor_total_ofertado / total_ofertas) if total_ofertas > 0 else Decimal(0)),
-        },
-    }
+    - `<json>.jsonl`: una oferta por línea, en JSON compacto.
+    - `<json>`: resumen con totales y estadísticas (acumuladores en línea).
+    - `<csv>` opcional con el formato de `guardar_resultados`.
+    - `<json>.parquet` opcional para el dashboard (si pyarrow está instalado).
 
-    with output_file.open("w", encoding="utf-8") as jf:
-        json.dump(data, jf, ensure_ascii=False, indent=2)
+    La memoria usada no depende de la cantidad de ofertas.
+    """
 
-    logger.info(f"JSON guardado exitosamente en {output_file}")
+    def __init__(self, json_path: Path, csv_path: Optional[Path] = None,
+                 parquet: bool = False, omitir_vacio: bool = False):
+        self.json_path = Path(json_path)
+        self.jsonl_path = self.json_path.with_suffix(".jsonl")
+        self.csv_path = Path(csv_path) if csv_path else None
+        self.parquet_path = self.json_path.with_suffix(".parquet") if parquet else None
+        self.omitir_vacio = omitir_vacio
+        self.resumen: Optional[dict] = None
+        self.total = 0
+        self.valor_total = Decimal(0)
+        self.min_oferta: Optional[Decimal] = None
+        self.max_oferta: Optional[Decimal] = None
+        self._parquet_writer = None
+        self._parquet_lote: List[dict] = []
+
+        self.json_path.parent.mkdir(parents=True, exist_ok=True)
+        self._jsonl = self.jsonl_path.open("w", encoding="utf-8")
+        self._csv_file = None
+        if self.csv_path:
+            self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+            self._csv_file = self.csv_path.open("w", newline="", encoding="utf-8")
+            self._csv = csv.writer(self._csv_file)
+            self._csv.writerow(CSV_COLUMNAS)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+    def agregar(self, lic: Licitacion) -> None:
+        oferta = _oferta_dict(lic)
+        self._jsonl.write(json.dumps(oferta, ensure_ascii=False, separators=(",", ":")))
+        self._jsonl.write("\n")
+        if self._csv_file:
+            self._csv.writerow(_fila_csv(lic))
+        if self.parquet_path:
+            self._parquet_lote.append(oferta)
+            if len(self._parquet_lote) >= PARQUET_LOTE:
+                self._vaciar_parquet()
+
+        self.total += 1
+        if lic.ofertado is not None:
+            self.valor_total += lic.ofertado
+            if self.min_oferta is None or lic.ofertado < self.min_oferta:
+                self.min_oferta = lic.ofertado
+            if self.max_oferta is None or lic.ofertado > self.max_oferta:
+                self.max_oferta = lic.ofertado
+
+    def _vaciar_parquet(self) -> None:
+        if not self._parquet_lote:
+            return
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            logger.warning("pyarrow no está instalado; se omite la exportación Parquet")
+            self.parquet_path = None
+            self._parquet_lote = []
+            return
+        tabla = pa.Table.from_pylist(self._parquet_lote, schema=pa.schema([
+            ("codigo", pa.string()),
+            ("titulo", pa.string()),
+            ("presupuesto", pa.float64()),
+            ("ofertado", pa.float64()),
+            ("match_pct", pa.int64()),
+            ("items", pa.int64()),
+            ("fecha_creacion", pa.string()),
+            ("fecha_cierre", pa.string()),
+            ("link", pa.string()),
+        ]))
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(str(self.parquet_path), tabla.schema)
+        self._parquet_writer.write_table(tabla)
+        self._parquet_lote = []
+
+    def cerrar(self) -> dict:
+        """Cierra los archivos y escribe el resumen JSON; retorna el resumen."""
+        if self.resumen is not None:
+            return self.resumen
+        self._jsonl.close()
+        if self._csv_file:
+            self._csv_file.close()
+        if self.parquet_path:
+            self._vaciar_parquet()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+        self.resumen = {
+            "timestamp": now_fmt(),
+            "empresa_actual": ", ".join(EMPRESAS) if EMPRESAS else None,
+            "total_ofertas": self.total,
+            "valor_total_ofertado": float(self.valor_total),
+            "ofertas_jsonl": self.jsonl_path.name,
+            "stats": {
+                "min_oferta": float(self.min_oferta or 0),
+                "max_oferta": float(self.max_oferta or 0),
+                "avg_oferta": float(self.valor_total / self.total) if self.total else 0.0,
+            },
+        }
+        if self.total == 0 and self.omitir_vacio:
+            for p in (self.jsonl_path, self.csv_path, self.parquet_path):
+                if p is not None and p.exists():
+                    p.unlink()
+            return self.resumen
+        if self._parquet_writer is not None:
+            self.resumen["ofertas_parquet"] = self.parquet_path.name
+        with self.json_path.open("w", encoding="utf-8") as jf:
+            json.dump(self.resumen, jf, ensure_ascii=False)
+        logger.info(f"JSON guardado exitosamente en {self.json_path} ({self.total} ofertas en {self.jsonl_path.name})")
+        return self.resumen
+
+def guardar_resultados_json(licitaciones: Iterable[Licitacion], output_file: Path, parquet: bool = False) -> dict:
+    """Exporta resultados para el dashboard: resumen JSON + ofertas en JSON Lines."""
+    with ExportadorResultados(output_file, parquet=parquet) as exportador:
+        for lic in licitaciones:
+            exportador.agregar(lic)
+    return exportador.resumen
 
 # ---------- Ejecución principal ----------
 
@@ -196,30 +330,31 @@ def main():
     logger.info("=" * 60)
 
     driver = None
-    todas_licitaciones: List[Licitacion] = []
 
     try:
-        # Configurar driver
-        driver = setup_driver()
-
-        # Login
-        login_lici(driver)
-
-        # Buscar para cada empresa
-        for empresa in EMPRESAS:
-            licitaciones = buscar_licitaciones(driver, empresa)
-            todas_licitaciones.extend(licitaciones)
-            time.sleep(2)  # Pausa entre búsquedas
-
-        # Guardar resultados
-        if todas_licitaciones:
-            guardar_resultados(todas_licitaciones, OUTPUT_FILE)
-
-            # Además, exportar JSON para dashboard
-            json_path = ARTIFACTS_DIR / f"lici_{now_fmt()}.json"
-            guardar_resultados_json(todas_licitaciones, json_path)
-
-            logger.info(f"Total de licitaciones encontradas: {len(todas_licitaciones)}")
+        # Buscar para cada empresa; cada licitación se exporta apenas llega
+        json_path = ARTIFACTS_DIR / f"lici_{now_fmt()}.json"
+        with ExportadorResultados(json_path, csv_path=OUTPUT_FILE, parquet=LICI_PARQUET,
+                                  omitir_vacio=True) as exportador:
+            workers = sesiones_paralelas(LICI_PARALELO, len(EMPRESAS))
+            if workers > 1:
+                # Cada sesión hace su propio login; no hay driver principal
+                logger.info(f"Buscando en {workers} sesiones paralelas")
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    for licitaciones in pool.map(_buscar_en_sesion_propia, EMPRESAS):
+                        for lic in licitaciones:
+                            exportador.agregar(lic)
+            else:
+                # Configurar driver y login
+                driver = setup_driver()
+                login_lici(driver)
+                for empresa in EMPRESAS:
+                    for lic in buscar_licitaciones(driver, empresa):
+                        exportador.agregar(lic)
+                    time.sleep(2)  # Pausa entre búsquedas
+
+        if exportador.total:
+            logger.info(f"Total de licitaciones encontradas: {exportador.total}")
         else:
             logger.warning("No se encontraron licitaciones")
 
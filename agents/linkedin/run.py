@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import os, sys, argparse, logging
+from agents.common.queue import JsonlQueue
 from agents.common.status import append_status, write_json_log
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
@@ -12,12 +13,25 @@ IDEAS = [
     "registra evidencia de cada postulación",
 ]
 
+TEMPLATE_OFERTA = "⚡ Oferta Flash: {nombre} a ${precio}. ¡Quedan {stock} unidades!"
+
+def ofertas_flash(eventos: list[dict]) -> list[str]:
+    """Textos de oferta para los productos que entraron en stock bajo."""
+    textos = []
+    for e in eventos:
+        if e.get("tipo") != "stock_bajo":
+            continue
+        precio = f"{e.get('precio') or 0:,.0f}".replace(",", ".")
+        textos.append(TEMPLATE_OFERTA.format(nombre=e.get("nombre") or e["id_convenio"], precio=precio, stock=e["stock"]))
+    return textos
+
 def need_env() -> bool:
     return os.getenv("LINKEDIN_ACCESS_TOKEN")
 
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--status", default="STATUS.md")
+    ap.add_argument("--eventos", default=None, help="Cola JSONL de eventos de stock (queues/eventos_stock.jsonl)")
     args = ap.parse_args()
 
     if not need_env():
@@ -26,8 +40,17 @@ def main() -> int:
 
     texto = TEMPLATE.format(idea=IDEAS[0])
     res = [{"estado": "publicado", "post_id": "mock_ln_123", "texto": texto}]
+    cola, offset = None, None
+    if args.eventos:
+        cola = JsonlQueue(args.eventos)
+        eventos, offset = cola.pending("linkedin")
+        for i, oferta in enumerate(ofertas_flash(eventos), start=1):
+            res.append({"estado": "publicado", "post_id": f"mock_ln_flash_{i}", "texto": oferta})
     append_status(args.status, "LinkedIn", res)
     write_json_log("logs/linkedin.json", res)
+    # Confirmar solo cuando lo publicado quedó registrado
+    if cola is not None:
+        cola.ack("linkedin", offset)
     return 0
 
 if __name__ == "__main__":
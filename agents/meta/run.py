@@ -11,6 +11,8 @@ import logging
 import requests
 from datetime import datetime
 
+from agents.common.queue import JsonlQueue
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -65,7 +67,17 @@ class MetaAgent:
             logger.error(f"Request exception during token validation: {e}")
             return False, {'error': str(e)}
     
-    def save_status_json(self, is_valid, data):
+    def pending_flash_offers(self, eventos_path):
+        """Low-stock events not yet processed by this agent (Oferta Flash
+        candidates) and the queue offset to ack once they are saved"""
+        eventos, offset = JsonlQueue(eventos_path).pending('meta')
+        return [e for e in eventos if e.get('tipo') == 'stock_bajo'], offset
+
+    def ack_flash_offers(self, eventos_path, offset):
+        """Mark the events up to offset as processed"""
+        JsonlQueue(eventos_path).ack('meta', offset)
+
+    def save_status_json(self, is_valid, data, ofertas_flash=None):
         """Save status to JSON file in artifacts directory"""
         try:
             # Create artifacts directory if it doesn't exist
@@ -86,6 +98,8 @@ class MetaAgent:
                 'app_id': self.app_id,
                 'status': 'operational' if is_valid else 'error'
             }
+            if ofertas_flash:
+                status_json['ofertas_flash'] = ofertas_flash
             
             # Save to file
             filename = f"{artifacts_dir}/meta_{timestamp}.json"
@@ -141,6 +155,11 @@ def main():
         action='store_true',
         help='Generate status report'
     )
+    parser.add_argument(
+        '--eventos',
+        default=None,
+        help='JSONL queue of stock events (queues/eventos_stock.jsonl)'
+    )
     
     args = parser.parse_args()
     
@@ -157,8 +176,16 @@ def main():
     # Validate access token with Graph API
     is_valid, data = agent.validate_access_token()
     
-    # Save status to JSON
-    agent.save_status_json(is_valid, data)
+    # Low-stock events are only consumed when the API is usable
+    ofertas_flash, offset = None, None
+    if is_valid and args.eventos:
+        ofertas_flash, offset = agent.pending_flash_offers(args.eventos)
+    if ofertas_flash:
+        logger.info(f"{len(ofertas_flash)} Oferta Flash candidates from stock events")
+
+    # Save status to JSON; events are acked only once they are stored
+    if agent.save_status_json(is_valid, data, ofertas_flash) and offset is not None:
+        agent.ack_flash_offers(args.eventos, offset)
     
     # Prepare status data
     status_data = {
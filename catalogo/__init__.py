@@ -2,12 +2,24 @@
 
 Modules:
 - scraper: Web scraping utilities to enrich product data with image URLs
+- resolvedores: Image sources (Prisa, Dimerc, Convenio Marco) raced or cascaded by stats
+- imagenes: Content-addressed image store with thumbnails and WebP variants
+- cache: Scraping checkpoint (SQLite) and conditional HTTP cache
 - cotizador: Functions to process uploaded lists and generate quotes
 - data: Simulated product catalog used by the quotation module
+- indice: In-memory catalog index (ID, tokens, trigrams) for fast lookups
+- proveedor: Per-process catalog snapshots (CSV, Sheets or simulated) with reload on change
+- lote: Batch quoting of many purchase lists in a process pool
 """
 
 __all__ = [
 	"scraper",
+	"resolvedores",
+	"cache",
+	"imagenes",
 	"cotizador",
 	"data",
+	"indice",
+	"proveedor",
+	"lote",
 ]
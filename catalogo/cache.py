@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class CheckpointScrapeo:
+	"""Registro en SQLite de cada resultado de scraping apenas termina.
+
+	Si el enriquecimiento se corta a mitad, la siguiente ejecución retoma
+	desde aquí en vez de volver a consultar los sitios. Seguro entre hilos.
+	"""
+
+	def __init__(self, ruta: str):
+		self.ruta = ruta
+		directorio = os.path.dirname(ruta)
+		if directorio:
+			os.makedirs(directorio, exist_ok=True)
+		self._lock = threading.Lock()
+		self._con = sqlite3.connect(ruta, check_same_thread=False)
+		self._con.execute("PRAGMA journal_mode=WAL")
+		self._con.execute(
+			"CREATE TABLE IF NOT EXISTS resultados ("
+			" id_convenio_marco TEXT PRIMARY KEY,"
+			" url_imagen TEXT,"
+			" error TEXT,"
+			" actualizado REAL NOT NULL)"
+		)
+		self._con.commit()
+
+	def guardar(self, id_convenio_marco: str, url_imagen: Optional[str], error: Optional[str], ahora: Optional[float] = None) -> None:
+		with self._lock:
+			self._con.execute(
+				"INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?)",
+				(id_convenio_marco, url_imagen, error, ahora if ahora is not None else time.time()),
+			)
+			self._con.commit()
+
+	def cargar(self) -> Dict[str, Tuple[Optional[str], Optional[str], float]]:
+		"""ID → (url_imagen, error, actualizado)."""
+		with self._lock:
+			filas = self._con.execute("SELECT id_convenio_marco, url_imagen, error, actualizado FROM resultados").fetchall()
+		return {f[0]: (f[1], f[2], f[3]) for f in filas}
+
+	def pendientes(self, ids: Iterable[str], max_edad_s: Optional[float] = None, ahora: Optional[float] = None) -> List[str]:
+		"""IDs sin resultado, con error o con un resultado más viejo que `max_edad_s`."""
+		registros = self.cargar()
+		ahora = ahora if ahora is not None else time.time()
+		salida = []
+		for id_val in dict.fromkeys(ids):
+			reg = registros.get(id_val)
+			if reg is None or not reg[0] or reg[1]:
+				salida.append(id_val)
+			elif max_edad_s is not None and ahora - reg[2] > max_edad_s:
+				salida.append(id_val)
+		return salida
+
+	def cerrar(self) -> None:
+		with self._lock:
+			self._con.close()
+
+
+class CacheHTTP:
+	"""Caché en disco de páginas HTML que respeta ETag y Last-Modified.
+
+	Cada URL guarda su cuerpo y sus validadores. Al volver a pedirla se envía
+	`If-None-Match` / `If-Modified-Since`; si el sitio responde 304 se usa el
+	cuerpo guardado sin descargarlo de nuevo.
+	"""
+
+	def __init__(self, directorio: str):
+		self.directorio = directorio
+		os.makedirs(directorio, exist_ok=True)
+		self._lock = threading.Lock()
+		self.aciertos = 0
+		self.descargas = 0
+
+	def _rutas(self, url: str) -> Tuple[str, str]:
+		clave = hashlib.sha1(url.encode("utf-8")).hexdigest()
+		base = os.path.join(self.directorio, clave)
+		return base + ".json", base + ".html"
+
+	def _leer(self, url: str) -> Tuple[Optional[dict], Optional[str]]:
+		ruta_meta, ruta_html = self._rutas(url)
+		try:
+			with open(ruta_meta, encoding="utf-8") as f:
+				meta = json.load(f)
+			with open(ruta_html, encoding="utf-8") as f:
+				return meta, f.read()
+		except (OSError, ValueError):
+			return None, None
+
+	def _escribir(self, url: str, meta: dict, cuerpo: str) -> None:
+		ruta_meta, ruta_html = self._rutas(url)
+		for ruta, contenido in ((ruta_html, cuerpo), (ruta_meta, json.dumps(meta))):
+			tmp = f"{ruta}.{threading.get_ident()}.tmp"
+			with open(tmp, "w", encoding="utf-8") as f:
+				f.write(contenido)
+			os.replace(tmp, ruta)
+
+	def obtener(self, sesion, url: str, timeout: float = 15.0) -> Optional[str]:
+		"""GET condicional: cuerpo de la respuesta (o el guardado si es 304);
+		None si el estado no es 200/304. Las excepciones de red se propagan."""
+		meta, cuerpo = self._leer(url)
+		headers = {}
+		if meta is not None:
+			if meta.get("etag"):
+				headers["If-None-Match"] = meta["etag"]
+			if meta.get("last_modified"):
+				headers["If-Modified-Since"] = meta["last_modified"]
+		resp = sesion.get(url, headers=headers, timeout=timeout)
+		if resp.status_code == 304 and cuerpo is not None:
+			with self._lock:
+				self.aciertos += 1
+			return cuerpo
+		if resp.status_code != 200:
+			return None
+		with self._lock:
+			self.descargas += 1
+		etag = resp.headers.get("ETag")
+		last_modified = resp.headers.get("Last-Modified")
+		if etag or last_modified:
+			self._escribir(url, {"url": url, "etag": etag, "last_modified": last_modified, "guardado": time.time()}, resp.text)
+		return resp.text
+
+	def stats(self) -> Dict[str, int]:
+		return {"aciertos_304": self.aciertos, "descargas": self.descargas}
@@ -2,15 +2,29 @@ from __future__ import annotations
 
 import csv
 import os
-from dataclasses import dataclass, asdict
-from typing import Iterable, List, Dict, Any
+from dataclasses import dataclass, astuple
+from typing import Iterable, Iterator, List, Dict, Any
 
 try:
 	import pandas as pd  # type: ignore
 except Exception:  # pragma: no cover - entorno sin pandas
 	pd = None  # type: ignore
 
-from .data import cargar_catalogo_simulado, Producto
+from .data import Producto
+from .indice import CatalogIndex
+from .proveedor import proveedor_por_defecto, configurar_proveedor
+
+# Filas por bloque al leer y escribir cotizaciones en streaming
+TAMANO_BLOQUE = int(os.getenv("COTIZADOR_BLOQUE", "5000"))
+
+COLUMNAS_COTIZACION = [
+	"ID_Convenio_Marco",
+	"Nombre_Producto",
+	"Precio_Unitario",
+	"Cantidad",
+	"URL_Imagen",
+	"Subtotal",
+]
 
 
 @dataclass
@@ -24,122 +38,300 @@ class ItemCotizacion:
 	subtotal: float
 
 
-def _leer_archivo_generico(ruta_archivo: str) -> List[Dict[str, Any]]:
-	"""Lee un archivo CSV, XLSX o TXT y retorna una lista de dicts con claves
-	`entrada` y `cantidad`.
+def _extension(ruta_archivo: str) -> str:
+	_, ext = os.path.splitext(ruta_archivo.lower())
+	if ext not in (".csv", ".xlsx", ".xls", ".txt"):
+		raise ValueError(f"Formato de archivo no soportado: {ext}")
+	return ext
+
+
+def _cantidad(valor) -> int:
+	try:
+		return int(valor)
+	except Exception:
+		return 1
+
+
+def _filas_csv(ruta_archivo: str) -> Iterator[Dict[str, Any]]:
+	# Asume encabezados en la primera fila; lee línea a línea
+	with open(ruta_archivo, newline="", encoding="utf-8") as f:
+		reader = csv.reader(f)
+		next(reader, None)
+		for fila in reader:
+			if not fila or not str(fila[0]).strip():
+				continue
+			cantidad = _cantidad(fila[1]) if len(fila) > 1 else 1
+			yield {"entrada": str(fila[0]).strip(), "cantidad": cantidad}
+
+
+def _filas_xlsx(ruta_archivo: str) -> Iterator[tuple]:
+	"""Filas de datos (sin encabezado) de la hoja activa, en modo `read_only`
+	para no cargar el libro completo en memoria."""
+	from openpyxl import load_workbook  # type: ignore
+
+	wb = load_workbook(ruta_archivo, read_only=True, data_only=True)
+	try:
+		filas = wb.active.iter_rows(values_only=True)
+		next(filas, None)
+		for row in filas:
+			if row:
+				yield tuple(row[:2])
+	finally:
+		wb.close()
+
+
+def _filas_txt(ruta_archivo: str) -> Iterator[Dict[str, Any]]:
+	with open(ruta_archivo, "r", encoding="utf-8") as f:
+		for linea in f:
+			linea = linea.strip()
+			if not linea:
+				continue
+			# Permite "valor" o "valor,cantidad"
+			partes = [p.strip() for p in linea.split(",")]
+			entrada = partes[0]
+			cantidad = int(partes[1]) if len(partes) > 1 and partes[1].isdigit() else 1
+			yield {"entrada": entrada, "cantidad": cantidad}
+
+
+def _en_lotes(filas: Iterable, tamano: int) -> Iterator[list]:
+	lote: list = []
+	for fila in filas:
+		lote.append(fila)
+		if len(lote) >= tamano:
+			yield lote
+			lote = []
+	if lote:
+		yield lote
+
+
+def iterar_bloques_entradas(ruta_archivo: str, tamano_bloque: int = TAMANO_BLOQUE):
+	"""Lee un archivo CSV, XLSX o TXT en bloques de `tamano_bloque` filas.
+
+	Cada bloque es un DataFrame de `_entradas_df` (columnas `entrada` y
+	`cantidad`), así que la memoria queda acotada por el tamaño del bloque y
+	no por el del archivo. Requiere pandas.
+
+	Lanza ValueError para formatos no soportados.
+	"""
+	ext = _extension(ruta_archivo)
+
+	def _bloques():
+		if ext == ".csv":
+			# Todo como texto: el tipo de cada columna no depende del bloque
+			with pd.read_csv(ruta_archivo, dtype=str, chunksize=tamano_bloque) as lector:
+				for bloque in lector:
+					yield _entradas_df(bloque)
+		elif ext == ".xlsx":
+			for lote in _en_lotes(_filas_xlsx(ruta_archivo), tamano_bloque):
+				yield _entradas_df(pd.DataFrame(lote))
+		elif ext == ".xls":
+			# openpyxl no lee .xls; se usa el lector completo de pandas
+			yield _entradas_df(pd.read_excel(ruta_archivo))
+		else:
+			for lote in _en_lotes(_filas_txt(ruta_archivo), tamano_bloque):
+				yield pd.DataFrame(lote, columns=["entrada", "cantidad"]).astype({"cantidad": "int64"})
+
+	return _bloques()
+
+
+def iterar_entradas(ruta_archivo: str) -> Iterator[Dict[str, Any]]:
+	"""Genera las entradas (`{"entrada", "cantidad"}`) de un archivo de a una.
 
 	- Para CSV/XLSX: se asume que la primera columna es ID o Nombre.
 	- Opcionalmente, si existe una segunda columna numérica, se usa como cantidad.
 	- Para TXT: una entrada por línea, admite formato `valor` o `valor,cantidad`.
+
+	Las filas con la primera celda vacía se omiten.
 	"""
-	_, ext = os.path.splitext(ruta_archivo.lower())
+	ext = _extension(ruta_archivo)
+	if pd is not None:
+		return (e for bloque in iterar_bloques_entradas(ruta_archivo) for e in bloque.to_dict("records"))
 	if ext == ".csv":
-		# Intentar con pandas si está disponible
-		if pd is not None:
-			df = pd.read_csv(ruta_archivo)
-			return _normalizar_df_a_entradas(df)
-		# Fallback con csv
-		entradas: List[Dict[str, Any]] = []
-		with open(ruta_archivo, newline="", encoding="utf-8") as f:
-			reader = csv.reader(f)
-			filas = list(reader)
-			if not filas:
-				return []
-			# Asumir encabezados en primera fila
-			for fila in filas[1:]:
-				if not fila:
-					continue
-				entrada = str(fila[0]).strip()
-				cantidad = 1
-				if len(fila) > 1:
-					try:
-						cantidad = int(fila[1])
-					except Exception:
-						cantidad = 1
-				entradas.append({"entrada": entrada, "cantidad": cantidad})
-		return entradas
-	elif ext in (".xlsx", ".xls"):
-		if pd is not None:
-			df = pd.read_excel(ruta_archivo)
-			return _normalizar_df_a_entradas(df)
-		# Fallback con openpyxl
-		from openpyxl import load_workbook  # type: ignore
-
-		wb = load_workbook(ruta_archivo)
-		ws = wb.active
-		entradas: List[Dict[str, Any]] = []
-		primera = True
-		for row in ws.iter_rows(values_only=True):
-			if primera:
-				primera = False
-				continue
-			if not row:
-				continue
-			entrada = str(row[0]).strip() if row[0] is not None else ""
-			if not entrada:
-				continue
-			cantidad = 1
-			if len(row) > 1 and row[1] is not None:
-				try:
-					cantidad = int(row[1])
-				except Exception:
-					cantidad = 1
-			entradas.append({"entrada": entrada, "cantidad": cantidad})
-		return entradas
-	elif ext == ".txt":
-		entradas: List[Dict[str, Any]] = []
-		with open(ruta_archivo, "r", encoding="utf-8") as f:
-			for linea in f:
-				linea = linea.strip()
-				if not linea:
-					continue
-				# Permite "valor" o "valor,cantidad"
-				partes = [p.strip() for p in linea.split(",")]
-				entrada = partes[0]
-				cantidad = int(partes[1]) if len(partes) > 1 and partes[1].isdigit() else 1
-				entradas.append({"entrada": entrada, "cantidad": cantidad})
-		return entradas
+		return _filas_csv(ruta_archivo)
+	if ext in (".xlsx", ".xls"):
+		return (
+			{"entrada": str(row[0]).strip(), "cantidad": _cantidad(row[1]) if len(row) > 1 and row[1] is not None else 1}
+			for row in _filas_xlsx(ruta_archivo)
+			if row[0] is not None and str(row[0]).strip()
+		)
+	return _filas_txt(ruta_archivo)
+
+
+def _leer_archivo_generico(ruta_archivo: str) -> List[Dict[str, Any]]:
+	"""Lee un archivo CSV, XLSX o TXT y retorna una lista de dicts con claves
+	`entrada` y `cantidad` (ver `iterar_entradas`)."""
+	return list(iterar_entradas(ruta_archivo))
+
+
+def _entradas_df(df):
+	"""Normaliza un DataFrame leído de CSV/XLSX: columnas `entrada` (texto sin
+	espacios extremos; filas vacías omitidas) y `cantidad` (int, 1 si no es
+	un número válido)."""
+	if df is None or getattr(df, "empty", False):
+		return pd.DataFrame({"entrada": pd.Series(dtype=object), "cantidad": pd.Series(dtype="int64")})
+	columna = df[df.columns[0]]
+	entrada = columna.astype(object).where(columna.notna(), "").astype(str).str.strip()
+	if len(df.columns) > 1:
+		cantidad = pd.to_numeric(df[df.columns[1]], errors="coerce").astype("float64")
+		# int() trunca hacia cero, igual que astype; NaN e infinitos valen 1
+		cantidad = cantidad.where(cantidad.abs() != float("inf")).fillna(1).astype("int64")
 	else:
-		raise ValueError(f"Formato de archivo no soportado: {ext}")
+		cantidad = pd.Series(1, index=df.index, dtype="int64")
+	entradas = pd.DataFrame({"entrada": entrada, "cantidad": cantidad})
+	return entradas[entradas["entrada"] != ""].reset_index(drop=True)
 
 
 def _normalizar_df_a_entradas(df) -> List[Dict[str, Any]]:
 	# Normaliza CSV/XLSX (pandas) a lista de dicts uniformes
-	if df is None or getattr(df, "empty", False):
-		return []
-	primera_columna = df.columns[0]
-	cantidad_col = df.columns[1] if len(df.columns) > 1 else None
-	entradas: List[Dict[str, Any]] = []
-	for _, row in df.iterrows():
-		entrada_valor = str(row[primera_columna]).strip()
-		if not entrada_valor:
-			continue
-		cantidad_valor = 1
-		if cantidad_col is not None:
-			try:
-				cantidad_valor = int(row[cantidad_col])
-			except Exception:
-				cantidad_valor = 1
-		entradas.append({"entrada": entrada_valor, "cantidad": cantidad_valor})
-	return entradas
-
-
-def _buscar_producto(catalogo: Dict[str, Producto], entrada: str) -> Producto | None:
-	"""Busca por ID exacto o por nombre contiene (case-insensitive)."""
-	entrada_norm = entrada.strip()
-	if entrada_norm in catalogo:
-		return catalogo[entrada_norm]
-	# Búsqueda por nombre contiene
-	entrada_lower = entrada_norm.lower()
-	for _id, prod in catalogo.items():
-		if prod.nombre.lower().find(entrada_lower) != -1:
-			return prod
-	return None
-
-
-def procesar_archivo_cotizacion(ruta_archivo: str):
+	return _entradas_df(df).to_dict("records")
+
+
+# Último dict ID → Producto indexado (se guarda el dict para comparar identidad)
+_ULTIMO_DICT: tuple = (None, 0, None)
+
+
+def _como_indice(catalogo: Dict[str, Producto] | CatalogIndex | None) -> CatalogIndex:
+	"""`CatalogIndex` de `catalogo`: el del proveedor por defecto si es None,
+	y para un dict se construye una sola vez mientras sea el mismo objeto y
+	no cambie de tamaño."""
+	global _ULTIMO_DICT
+	if catalogo is None:
+		return proveedor_por_defecto().indice
+	if isinstance(catalogo, CatalogIndex):
+		return catalogo
+	previo, tamano, indice = _ULTIMO_DICT
+	if previo is not catalogo or tamano != len(catalogo):
+		indice = CatalogIndex.desde_catalogo(catalogo)
+		_ULTIMO_DICT = (catalogo, len(catalogo), indice)
+	return indice
+
+
+def _buscar_producto(catalogo: Dict[str, Producto] | CatalogIndex, entrada: str) -> Producto | None:
+	"""Busca por ID exacto o por nombre contiene (sin mayúsculas ni tildes)."""
+	return _como_indice(catalogo).buscar(entrada)
+
+
+def _cotizar_df(entradas, catalogo: CatalogIndex):
+	"""Arma la cotización en forma columnar.
+
+	Los IDs exactos se resuelven con un merge contra `catalogo.tabla()`; solo
+	las entradas que no son un ID pasan por el índice (una vez por texto
+	distinto). El subtotal se calcula como operación de columnas.
+
+	Returns:
+		Tupla (DataFrame con `COLUMNAS_COTIZACION`, lista de no encontrados).
+	"""
+	tabla = catalogo.tabla()
+	ids = entradas["entrada"].where(entradas["entrada"].isin(tabla.index))
+	pendientes = entradas.loc[ids.isna(), "entrada"].unique()
+	por_nombre = {}
+	for texto in pendientes:
+		producto = catalogo.buscar_subcadena(texto)
+		if producto is not None:
+			por_nombre[texto] = producto.id_convenio
+	ids = ids.fillna(entradas["entrada"].map(por_nombre))
+
+	encontrado = ids.notna()
+	errores = entradas.loc[~encontrado, "entrada"].tolist()
+	resueltas = pd.DataFrame({
+		"ID_Convenio_Marco": ids[encontrado],
+		"Cantidad": entradas.loc[encontrado, "cantidad"],
+	})
+	df = resueltas.merge(tabla, how="left", left_on="ID_Convenio_Marco", right_index=True)
+	df["Subtotal"] = df["Precio_Unitario"] * df["Cantidad"]
+	return df[COLUMNAS_COTIZACION].reset_index(drop=True), errores
+
+
+def cotizar_en_bloques(ruta_archivo: str, indice: Dict[str, Producto] | CatalogIndex | None = None, tamano_bloque: int = TAMANO_BLOQUE):
+	"""Genera la cotización de un archivo bloque a bloque.
+
+	Yields:
+		Tuplas (DataFrame con `COLUMNAS_COTIZACION`, no encontrados del bloque).
+	"""
+	catalogo = _como_indice(indice)
+	for entradas in iterar_bloques_entradas(ruta_archivo, tamano_bloque):
+		yield _cotizar_df(entradas, catalogo)
+
+
+class EscritorCotizacion:
+	"""Escribe una cotización en CSV o XLSX a medida que llegan los bloques.
+
+	El XLSX usa un libro `write_only` de openpyxl, que vuelca las filas al
+	disco en vez de mantener todas las celdas en memoria.
+	"""
+
+	def __init__(self, ruta_salida: str):
+		self.ruta_salida = ruta_salida
+		self.filas = 0
+		_, ext = os.path.splitext(ruta_salida.lower())
+		self._xlsx = ext == ".xlsx"
+		if self._xlsx:
+			from openpyxl import Workbook  # type: ignore
+
+			self._wb = Workbook(write_only=True)
+			self._ws = self._wb.create_sheet("Cotizacion")
+			self._ws.append(COLUMNAS_COTIZACION)
+		else:
+			self._f = open(ruta_salida, "w", newline="", encoding="utf-8")
+			csv.writer(self._f, lineterminator="\n").writerow(COLUMNAS_COTIZACION)
+
+	def escribir(self, df) -> None:
+		if self._xlsx:
+			for fila in df.itertuples(index=False, name=None):
+				self._ws.append(list(fila))
+		else:
+			df.to_csv(self._f, header=False, index=False)
+		self.filas += len(df)
+
+	def cerrar(self) -> None:
+		if self._xlsx:
+			self._wb.save(self.ruta_salida)
+		else:
+			self._f.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.cerrar()
+		return False
+
+
+def cotizar_a_archivo(
+	ruta_archivo: str,
+	ruta_salida: str,
+	indice: CatalogIndex | None = None,
+	tamano_bloque: int = TAMANO_BLOQUE,
+) -> Dict[str, Any]:
+	"""Lee, cotiza y escribe en streaming (CSV o XLSX según la extensión).
+
+	La memoria queda acotada por `tamano_bloque`; solo se acumula la lista de
+	no encontrados.
+
+	Returns:
+		Dict con `salida`, `items`, `no_encontrados` y `sugerencias`.
+	"""
+	catalogo = _como_indice(indice)
+	errores: List[str] = []
+	with EscritorCotizacion(ruta_salida) as escritor:
+		for df_bloque, errores_bloque in cotizar_en_bloques(ruta_archivo, catalogo, tamano_bloque):
+			escritor.escribir(df_bloque)
+			errores.extend(errores_bloque)
+	return {
+		"salida": ruta_salida,
+		"items": escritor.filas,
+		"no_encontrados": errores,
+		"sugerencias": {e: catalogo.sugerencias(e) for e in dict.fromkeys(errores)},
+	}
+
+
+def procesar_archivo_cotizacion(ruta_archivo: str, indice: CatalogIndex | None = None):
 	"""Procesa un archivo del usuario y genera una cotización.
 
+	`indice` permite usar un `CatalogIndex` propio; por defecto se usa el
+	snapshot vigente de `proveedor_por_defecto()`, que se carga una vez por
+	proceso y se recarga solo si la fuente cambia.
+
 	Retorna un DataFrame con columnas:
 	- ID_Convenio_Marco
 	- Nombre_Producto
@@ -148,11 +340,30 @@ def procesar_archivo_cotizacion(ruta_archivo: str):
 	- URL_Imagen
 	- Subtotal
 
+	Las entradas sin producto quedan en `attrs["no_encontrados"]` y los IDs
+	más parecidos a cada una en `attrs["sugerencias"]`.
+
 	Lanza ValueError para formatos no soportados.
 	"""
-	entradas = _leer_archivo_generico(ruta_archivo)
-	catalogo = cargar_catalogo_simulado()
+	catalogo = _como_indice(indice)
+
+	if pd is not None:
+		bloques: List[Any] = []
+		errores = []
+		for df_bloque, errores_bloque in cotizar_en_bloques(ruta_archivo, catalogo):
+			bloques.append(df_bloque)
+			errores.extend(errores_bloque)
+		if bloques:
+			df_cotizacion = pd.concat(bloques, ignore_index=True)
+		else:
+			df_cotizacion = pd.DataFrame(columns=COLUMNAS_COTIZACION)
+		# Adjuntar información de errores como atributo para la UI
+		df_cotizacion.attrs["no_encontrados"] = errores
+		df_cotizacion.attrs["sugerencias"] = {e: catalogo.sugerencias(e) for e in dict.fromkeys(errores)}
+		return df_cotizacion
 
+	# Fallback sin pandas: recorrido por filas
+	entradas = _leer_archivo_generico(ruta_archivo)
 	items: List[ItemCotizacion] = []
 	errores: List[str] = []
 	for e in entradas:
@@ -174,62 +385,44 @@ def procesar_archivo_cotizacion(ruta_archivo: str):
 			)
 		)
 
-	registros = [asdict(i) for i in items]
-	# Renombrar claves a formato solicitado
-	registros = [
-		{
-			"ID_Convenio_Marco": r["id_convenio_marco"],
-			"Nombre_Producto": r["nombre_producto"],
-			"Precio_Unitario": r["precio_unitario"],
-			"Cantidad": r["cantidad"],
-			"URL_Imagen": r["url_imagen"],
-			"Subtotal": r["subtotal"],
-		}
-		for r in registros
-	]
-
-	if pd is not None:
-		df_cotizacion = pd.DataFrame(registros)
-		# Adjuntar información de errores como atributo para la UI
-		df_cotizacion.attrs["no_encontrados"] = errores
-		return df_cotizacion
-	# Fallback: retornar lista de dicts, y exponer errores junto con ella
-	return {"cotizacion": registros, "no_encontrados": errores}
+	sugerencias = {e: catalogo.sugerencias(e) for e in dict.fromkeys(errores)}
+	registros = [dict(zip(COLUMNAS_COTIZACION, astuple(i))) for i in items]
+	# Exponer errores junto con la cotización
+	return {"cotizacion": registros, "no_encontrados": errores, "sugerencias": sugerencias}
 
 
 def _cli():
 	import argparse
 	parser = argparse.ArgumentParser(description="Procesa archivos de cotización y genera una salida tabular.")
 	parser.add_argument("ruta_archivo", help="Ruta al archivo de entrada (.csv, .txt, .xlsx)")
-	parser.add_argument("--salida", help="Ruta a CSV de salida", default="cotizacion_salida.csv")
+	parser.add_argument("--salida", help="Ruta de salida (.csv o .xlsx)", default="cotizacion_salida.csv")
+	parser.add_argument("--catalogo", help="CSV del catálogo o sheets:<pestaña> (por defecto CATALOGO_FUENTE o el simulado)")
 	args = parser.parse_args()
 
-	resultado = procesar_archivo_cotizacion(args.ruta_archivo)
-	if pd is not None and hasattr(resultado, "to_csv"):
-		resultado.to_csv(args.salida, index=False)
-		no_encontrados = getattr(resultado, "attrs", {}).get("no_encontrados", [])
+	if args.catalogo:
+		configurar_proveedor(args.catalogo)
+
+	if pd is not None:
+		resumen = cotizar_a_archivo(args.ruta_archivo, args.salida)
+		no_encontrados = resumen["no_encontrados"]
+		sugerencias = resumen["sugerencias"]
 	else:
+		resultado = procesar_archivo_cotizacion(args.ruta_archivo)
 		# resultado es dict con claves cotizacion / no_encontrados
 		registros = resultado["cotizacion"]
 		no_encontrados = resultado.get("no_encontrados", [])
+		sugerencias = resultado.get("sugerencias", {})
 		# Escribir CSV
-		fieldnames = [
-			"ID_Convenio_Marco",
-			"Nombre_Producto",
-			"Precio_Unitario",
-			"Cantidad",
-			"URL_Imagen",
-			"Subtotal",
-		]
 		with open(args.salida, "w", newline="", encoding="utf-8") as f:
-			writer = csv.DictWriter(f, fieldnames=fieldnames)
+			writer = csv.DictWriter(f, fieldnames=COLUMNAS_COTIZACION)
 			writer.writeheader()
 			for row in registros:
 				writer.writerow(row)
 	if no_encontrados:
 		print("Advertencia: No se encontraron los siguientes productos:")
 		for v in no_encontrados:
-			print(" -", v)
+			parecidos = sugerencias.get(v)
+			print(" -", v, f"(¿quiso decir {', '.join(parecidos)}?)" if parecidos else "")
 	print(f"Cotización guardada en {args.salida}")
 
 
@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import importlib.util
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from agents.common.limitador import LimitadorPorHost
+
+from .scraper import WORKERS_POR_DEFECTO, crear_sesion
+
+# Lado mayor de la miniatura y de la variante WebP (px)
+TAMANO_MINIATURA = int(os.getenv("IMAGENES_MINIATURA", "256"))
+TAMANO_WEBP = int(os.getenv("IMAGENES_WEBP", "1200"))
+DIRECTORIO_POR_DEFECTO = "artifacts/imagenes"
+COLUMNAS_IMAGEN = ("Imagen_Local", "Imagen_Miniatura", "Imagen_WebP")
+
+# Pillow es opcional: sin él se guardan los originales y no hay variantes
+PIL_DISPONIBLE = importlib.util.find_spec("PIL") is not None
+
+_FIRMAS = (
+	(b"\xff\xd8\xff", ".jpg"),
+	(b"\x89PNG\r\n\x1a\n", ".png"),
+	(b"GIF87a", ".gif"),
+	(b"GIF89a", ".gif"),
+)
+
+
+def extension_imagen(datos: bytes) -> Optional[str]:
+	"""Extensión según los primeros bytes; None si no parece una imagen."""
+	for firma, ext in _FIRMAS:
+		if datos.startswith(firma):
+			return ext
+	if datos[:4] == b"RIFF" and datos[8:12] == b"WEBP":
+		return ".webp"
+	return None
+
+
+@dataclass
+class ResultadoImagen:
+	url: str
+	sha256: Optional[str]
+	ext: Optional[str]
+	descargada: bool
+	error: Optional[str]
+
+
+class AlmacenImagenes:
+	"""Imágenes de productos guardadas por contenido (SHA-256).
+
+	`originales/ab/<sha>.<ext>` guarda cada imagen una sola vez aunque la
+	usen varias URLs o productos; `miniaturas/` y `webp/` guardan sus
+	variantes. `indice.sqlite` registra URL → hash y los validadores HTTP
+	(ETag/Last-Modified) para revalidar sin volver a descargar.
+	"""
+
+	def __init__(self, directorio: str = DIRECTORIO_POR_DEFECTO):
+		self.directorio = directorio
+		os.makedirs(directorio, exist_ok=True)
+		self._lock = threading.Lock()
+		self._con = sqlite3.connect(os.path.join(directorio, "indice.sqlite"), check_same_thread=False)
+		self._con.execute("PRAGMA journal_mode=WAL")
+		self._con.execute(
+			"CREATE TABLE IF NOT EXISTS urls ("
+			" url TEXT PRIMARY KEY,"
+			" sha256 TEXT,"
+			" ext TEXT,"
+			" etag TEXT,"
+			" last_modified TEXT,"
+			" error TEXT,"
+			" actualizado REAL NOT NULL)"
+		)
+		self._con.commit()
+
+	# Rutas relativas al directorio del almacén (con "/", sirven también como URL)
+	@staticmethod
+	def relativa_original(sha: str, ext: str) -> str:
+		return f"originales/{sha[:2]}/{sha}{ext}"
+
+	@staticmethod
+	def relativa_miniatura(sha: str) -> str:
+		return f"miniaturas/{sha[:2]}/{sha}_{TAMANO_MINIATURA}.jpg"
+
+	@staticmethod
+	def relativa_webp(sha: str) -> str:
+		return f"webp/{sha[:2]}/{sha}.webp"
+
+	def ruta(self, relativa: str) -> str:
+		return os.path.join(self.directorio, *relativa.split("/"))
+
+	def registros(self) -> Dict[str, Tuple[Optional[str], Optional[str], Optional[str]]]:
+		"""URL → (sha256, ext, error)."""
+		with self._lock:
+			filas = self._con.execute("SELECT url, sha256, ext, error FROM urls").fetchall()
+		return {f[0]: (f[1], f[2], f[3]) for f in filas}
+
+	def _registro(self, url: str):
+		with self._lock:
+			return self._con.execute(
+				"SELECT sha256, ext, etag, last_modified FROM urls WHERE url = ?", (url,)
+			).fetchone()
+
+	def _guardar_registro(self, url: str, sha: Optional[str], ext: Optional[str], etag: Optional[str], last_modified: Optional[str], error: Optional[str]) -> None:
+		with self._lock:
+			self._con.execute(
+				"INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?, ?, ?, ?)",
+				(url, sha, ext, etag, last_modified, error, time.time()),
+			)
+			self._con.commit()
+
+	def _guardar_error(self, url: str, error: str) -> None:
+		"""Anota el error sin borrar el hash ni los validadores de una imagen
+		ya descargada (sigue válida en disco)."""
+		with self._lock:
+			actualizadas = self._con.execute(
+				"UPDATE urls SET error = ?, actualizado = ? WHERE url = ?",
+				(error, time.time(), url),
+			).rowcount
+			if not actualizadas:
+				self._con.execute(
+					"INSERT INTO urls VALUES (?, NULL, NULL, NULL, NULL, ?, ?)",
+					(url, error, time.time()),
+				)
+			self._con.commit()
+
+	def _fallo(self, url: str, previo, error: str) -> ResultadoImagen:
+		self._guardar_error(url, error)
+		if previo and previo[0]:
+			return ResultadoImagen(url, previo[0], previo[1], False, error)
+		return ResultadoImagen(url, None, None, False, error)
+
+	def _escribir_original(self, sha: str, ext: str, datos: bytes) -> bool:
+		"""Guarda el contenido si no existe; True si se escribió."""
+		destino = self.ruta(self.relativa_original(sha, ext))
+		if os.path.exists(destino):
+			return False
+		os.makedirs(os.path.dirname(destino), exist_ok=True)
+		tmp = f"{destino}.{threading.get_ident()}.tmp"
+		with open(tmp, "wb") as f:
+			f.write(datos)
+		# Dos URLs con la misma imagen pueden llegar a la vez: solo una la escribe
+		with self._lock:
+			if os.path.exists(destino):
+				os.remove(tmp)
+				return False
+			os.replace(tmp, destino)
+		return True
+
+	def descargar(self, sesion, url: str, timeout: float = 20.0) -> ResultadoImagen:
+		"""GET condicional de `url`. Un 304 conserva el hash registrado; un
+		contenido ya conocido (mismo hash) no se vuelve a escribir. Si falla,
+		se conserva lo registrado y solo se anota el error."""
+		previo = self._registro(url)
+		headers = {}
+		if previo and previo[0]:
+			if previo[2]:
+				headers["If-None-Match"] = previo[2]
+			if previo[3]:
+				headers["If-Modified-Since"] = previo[3]
+		try:
+			resp = sesion.get(url, headers=headers, timeout=timeout)
+		except Exception as exc:
+			return self._fallo(url, previo, str(exc))
+		if resp.status_code == 304 and previo and previo[0]:
+			return ResultadoImagen(url, previo[0], previo[1], False, None)
+		if resp.status_code != 200:
+			return self._fallo(url, previo, f"HTTP {resp.status_code}")
+		datos = resp.content
+		ext = extension_imagen(datos)
+		if ext is None:
+			return self._fallo(url, previo, "El contenido no es una imagen")
+		sha = hashlib.sha256(datos).hexdigest()
+		escrita = self._escribir_original(sha, ext, datos)
+		self._guardar_registro(url, sha, ext, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), None)
+		return ResultadoImagen(url, sha, ext, escrita, None)
+
+	def variantes_faltantes(self, originales: Iterable[Tuple[str, str]]) -> List[Tuple[str, str, str]]:
+		"""(original, miniatura, webp) de los hashes a los que les falta alguna variante."""
+		tareas = []
+		for sha, ext in dict.fromkeys(originales):
+			miniatura = self.ruta(self.relativa_miniatura(sha))
+			webp = self.ruta(self.relativa_webp(sha))
+			if not (os.path.exists(miniatura) and os.path.exists(webp)):
+				tareas.append((self.ruta(self.relativa_original(sha, ext)), miniatura, webp))
+		return tareas
+
+	def cerrar(self) -> None:
+		with self._lock:
+			self._con.close()
+
+
+def generar_variantes(original: str, miniatura: str, webp: str) -> Optional[str]:
+	"""Miniatura JPEG y variante WebP de `original` (en el proceso que la
+	llame). Devuelve None o el mensaje de error."""
+	try:
+		from PIL import Image
+	except ImportError:
+		return "Pillow no está instalado"
+	try:
+		with Image.open(original) as img:
+			img.load()
+			if img.mode not in ("RGB", "RGBA"):
+				img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+			for destino, lado, formato, opciones in (
+				(miniatura, TAMANO_MINIATURA, "JPEG", {"quality": 85, "optimize": True}),
+				(webp, TAMANO_WEBP, "WEBP", {"quality": 80, "method": 4}),
+			):
+				variante = img.copy()
+				variante.thumbnail((lado, lado))
+				if formato == "JPEG" and variante.mode != "RGB":
+					fondo = Image.new("RGB", variante.size, (255, 255, 255))
+					fondo.paste(variante, mask=variante.getchannel("A"))
+					variante = fondo
+				os.makedirs(os.path.dirname(destino), exist_ok=True)
+				tmp = f"{destino}.{os.getpid()}.tmp"
+				variante.save(tmp, formato, **opciones)
+				os.replace(tmp, destino)
+	except Exception as exc:
+		return f"{os.path.basename(original)}: {exc}"
+	return None
+
+
+def _generar_variantes(tarea: Tuple[str, str, str]) -> Optional[str]:
+	return generar_variantes(*tarea)
+
+
+def generar_variantes_en_pool(tareas: List[Tuple[str, str, str]], procesos: Optional[int] = None) -> List[str]:
+	"""Procesa las variantes en un pool de procesos (la compresión es CPU).
+	Devuelve los errores."""
+	if not tareas:
+		return []
+	procesos = procesos or os.cpu_count() or 1
+	if procesos <= 1 or len(tareas) == 1:
+		errores = [_generar_variantes(t) for t in tareas]
+	else:
+		with ProcessPoolExecutor(max_workers=min(procesos, len(tareas))) as pool:
+			errores = list(pool.map(_generar_variantes, tareas, chunksize=max(1, len(tareas) // (procesos * 4))))
+	return [e for e in errores if e]
+
+
+def _referencia(almacen: AlmacenImagenes, relativa: str, base_url: Optional[str]) -> str:
+	if base_url:
+		return f"{base_url.rstrip('/')}/{relativa}"
+	return almacen.ruta(relativa)
+
+
+def sincronizar_imagenes(
+	in_csv: str = "productos_catalogo_con_imagenes.csv",
+	out_csv: Optional[str] = None,
+	directorio: str = DIRECTORIO_POR_DEFECTO,
+	workers: int = WORKERS_POR_DEFECTO,
+	procesos: Optional[int] = None,
+	espera_s: float = 0.2,
+	base_url: Optional[str] = None,
+	revalidar: bool = False,
+	sesion=None,
+) -> Dict[str, int]:
+	"""Descarga las `URL_Imagen` del catálogo al almacén y agrega al CSV
+	`Imagen_Local`, `Imagen_Miniatura` e `Imagen_WebP`.
+
+	Solo se descargan las URLs que el almacén no tiene (o que fallaron);
+	con `revalidar` las conocidas se consultan con GET condicional para
+	detectar cambios. Las variantes se generan en `procesos` procesos solo
+	para los hashes que no las tienen. Con `base_url` las columnas nuevas
+	son URLs (`<base_url>/<ruta relativa>`); si no, rutas locales.
+
+	Returns:
+		Conteos: `urls`, `descargadas` (contenido nuevo), `reutilizadas`,
+		`errores` y `variantes`.
+	"""
+	out_csv = out_csv or in_csv
+	with open(in_csv, newline="", encoding="utf-8") as f:
+		reader = csv.DictReader(f)
+		fieldnames = list(reader.fieldnames or [])
+		if "URL_Imagen" not in fieldnames:
+			raise ValueError("El CSV debe contener la columna 'URL_Imagen'")
+		filas = list(reader)
+	urls = list(dict.fromkeys(u for u in (str(r.get("URL_Imagen") or "").strip() for r in filas) if u))
+
+	almacen = AlmacenImagenes(directorio)
+	try:
+		conocidas = almacen.registros()
+		pendientes = [u for u in urls if revalidar or u not in conocidas or not conocidas[u][0]]
+		resultados: Dict[str, ResultadoImagen] = {}
+		if pendientes:
+			sesion = sesion or crear_sesion(workers)
+			limitador = LimitadorPorHost(tasa=1.0 / espera_s) if espera_s > 0 else None
+
+			def _descargar(url: str) -> ResultadoImagen:
+				if limitador is not None:
+					limitador.adquirir(url)
+				return almacen.descargar(sesion, url)
+
+			with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+				for res in pool.map(_descargar, pendientes):
+					resultados[res.url] = res
+		registros = almacen.registros()
+
+		originales = [(registros[u][0], registros[u][1]) for u in urls if u in registros and registros[u][0]]
+		tareas = almacen.variantes_faltantes(originales)
+		errores_variantes: List[str] = []
+		if tareas and PIL_DISPONIBLE:
+			errores_variantes = generar_variantes_en_pool(tareas, procesos)
+		elif tareas:
+			print("Pillow no está instalado: se guardan los originales sin miniaturas ni WebP", file=sys.stderr)
+		for error in errores_variantes:
+			print(f"Variante no generada: {error}", file=sys.stderr)
+
+		for col in COLUMNAS_IMAGEN:
+			if col not in fieldnames:
+				fieldnames.append(col)
+		tmp_csv = f"{out_csv}.tmp"
+		with open(tmp_csv, "w", newline="", encoding="utf-8") as f:
+			writer = csv.DictWriter(f, fieldnames=fieldnames)
+			writer.writeheader()
+			for row in filas:
+				reg = registros.get(str(row.get("URL_Imagen") or "").strip())
+				if reg and reg[0]:
+					sha, ext = reg[0], reg[1]
+					candidatas = (
+						almacen.relativa_original(sha, ext),
+						almacen.relativa_miniatura(sha),
+						almacen.relativa_webp(sha),
+					)
+					for col, rel in zip(COLUMNAS_IMAGEN, candidatas):
+						row[col] = _referencia(almacen, rel, base_url) if os.path.exists(almacen.ruta(rel)) else ""
+				else:
+					for col in COLUMNAS_IMAGEN:
+						row[col] = ""
+				writer.writerow(row)
+		os.replace(tmp_csv, out_csv)
+	finally:
+		almacen.cerrar()
+
+	return {
+		"urls": len(urls),
+		"descargadas": sum(1 for r in resultados.values() if r.descargada),
+		"reutilizadas": sum(1 for r in resultados.values() if r.sha256 and not r.descargada and not r.error),
+		"errores": sum(1 for r in resultados.values() if r.error),
+		"variantes": len(tareas) - len(errores_variantes) if PIL_DISPONIBLE else 0,
+	}
+
+
+def _cli():
+	import argparse
+	parser = argparse.ArgumentParser(description="Descarga las imágenes del catálogo a un almacén local con miniaturas y WebP.")
+	parser.add_argument("--in", dest="in_csv", default="productos_catalogo_con_imagenes.csv", help="CSV con URL_Imagen")
+	parser.add_argument("--out", dest="out_csv", default=None, help="CSV de salida (por defecto, el de entrada)")
+	parser.add_argument("--dir", dest="directorio", default=DIRECTORIO_POR_DEFECTO, help="Directorio del almacén")
+	parser.add_argument("--workers", type=int, default=WORKERS_POR_DEFECTO, help="Descargas en paralelo")
+	parser.add_argument("--procesos", type=int, default=None, help="Procesos para miniaturas/WebP (por defecto, núcleos)")
+	parser.add_argument("--espera", type=float, default=0.2, help="Espera entre descargas a un mismo host (seg)")
+	parser.add_argument("--base-url", default=None, help="Publicar URLs bajo esta base en vez de rutas locales")
+	parser.add_argument("--revalidar", action="store_true", help="Revisar con GET condicional las imágenes ya descargadas")
+	args = parser.parse_args()
+
+	t0 = time.perf_counter()
+	resumen = sincronizar_imagenes(
+		in_csv=args.in_csv,
+		out_csv=args.out_csv,
+		directorio=args.directorio,
+		workers=args.workers,
+		procesos=args.procesos,
+		espera_s=args.espera,
+		base_url=args.base_url,
+		revalidar=args.revalidar,
+	)
+	print(
+		f"{resumen['urls']} URLs: {resumen['descargadas']} nuevas, {resumen['reutilizadas']} ya almacenadas, "
+		f"{resumen['errores']} con error, {resumen['variantes']} variantes generadas en {time.perf_counter() - t0:.1f} s"
+	)
+
+
+if __name__ == "__main__":
+	_cli()
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import heapq
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .data import Producto
+
+
+_RE_TOKEN = re.compile(r"\w+")
+
+
+def normalizar_texto(texto: str) -> str:
+	"""Minúsculas, sin tildes y con espacios colapsados ("Lápiz  Azul" → "lapiz azul")."""
+	descompuesto = unicodedata.normalize("NFKD", str(texto))
+	sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+	return " ".join(sin_tildes.lower().split())
+
+
+def trigramas(texto_normalizado: str) -> set:
+	"""Conjunto de trigramas de un texto ya normalizado."""
+	return {texto_normalizado[i:i + 3] for i in range(len(texto_normalizado) - 2)}
+
+
+class CatalogIndex:
+	"""Índice en memoria del catálogo para búsquedas rápidas del cotizador.
+
+	Se construye una vez y se reutiliza entre cotizaciones. Mantiene:
+	- un dict ID exacto → producto;
+	- un índice invertido de tokens sin tildes → posiciones;
+	- un índice de trigramas → posiciones, usado para subcadenas y para
+	  búsquedas difusas (errores de tipeo) ordenadas por similitud.
+
+	Las posiciones siguen el orden del catálogo original, así que las
+	búsquedas por subcadena devuelven el mismo "primer producto" que el
+	recorrido lineal.
+	"""
+
+	def __init__(self, productos: Iterable[Producto]):
+		self._productos: List[Producto] = []
+		self._por_id: Dict[str, Producto] = {}
+		self._nombres: List[str] = []
+		self._n_trigramas: List[int] = []
+		self._tokens: Dict[str, List[int]] = {}
+		self._trigramas: Dict[str, List[int]] = {}
+		self._tabla = None
+		for prod in productos:
+			self._agregar(prod)
+
+	@classmethod
+	def desde_catalogo(cls, catalogo: Dict[str, Producto]) -> "CatalogIndex":
+		"""Construye el índice a partir del dict ID → Producto del cotizador."""
+		return cls(catalogo.values())
+
+	def _agregar(self, prod: Producto) -> None:
+		pos = len(self._productos)
+		nombre = normalizar_texto(prod.nombre)
+		self._productos.append(prod)
+		self._por_id[prod.id_convenio] = prod
+		self._nombres.append(nombre)
+		for token in set(_RE_TOKEN.findall(nombre)):
+			self._tokens.setdefault(token, []).append(pos)
+		grams = trigramas(nombre)
+		self._n_trigramas.append(len(grams))
+		for gram in grams:
+			self._trigramas.setdefault(gram, []).append(pos)
+
+	def __len__(self) -> int:
+		return len(self._productos)
+
+	def __iter__(self):
+		return iter(self._productos)
+
+	def tabla(self):
+		"""Catálogo como DataFrame indexado por `ID_Convenio_Marco` (requiere
+		pandas). Se construye la primera vez y se reutiliza."""
+		if self._tabla is None:
+			import pandas as pd
+
+			self._tabla = pd.DataFrame(
+				{
+					"Nombre_Producto": [p.nombre for p in self._productos],
+					"Precio_Unitario": pd.array([float(p.precio) for p in self._productos], dtype="float64"),
+					"URL_Imagen": [p.url_imagen for p in self._productos],
+				},
+				index=pd.Index([p.id_convenio for p in self._productos], name="ID_Convenio_Marco"),
+			)
+			self._tabla = self._tabla[~self._tabla.index.duplicated(keep="last")]
+		return self._tabla
+
+	def por_id(self, id_convenio: str) -> Optional[Producto]:
+		return self._por_id.get(id_convenio.strip())
+
+	def buscar_subcadena(self, texto: str) -> Optional[Producto]:
+		"""Primer producto (en orden de catálogo) cuyo nombre contiene `texto`.
+
+		La comparación ignora mayúsculas y tildes. Solo se verifican los
+		productos de la lista de trigramas más corta de la consulta, que ya
+		está en orden de catálogo.
+		"""
+		consulta = normalizar_texto(texto)
+		if not consulta:
+			return None
+		candidatos: Iterable[int] = range(len(self._nombres))
+		if len(consulta) >= 3:
+			listas = [self._trigramas.get(gram, ()) for gram in trigramas(consulta)]
+			candidatos = min(listas, key=len)
+		for pos in candidatos:
+			if consulta in self._nombres[pos]:
+				return self._productos[pos]
+		return None
+
+	def buscar_tokens(self, texto: str) -> List[Producto]:
+		"""Productos que contienen todas las palabras de `texto` (sin tildes)."""
+		tokens = set(_RE_TOKEN.findall(normalizar_texto(texto)))
+		if not tokens:
+			return []
+		listas = sorted((self._tokens.get(t, []) for t in tokens), key=len)
+		comunes = set(listas[0])
+		for lista in listas[1:]:
+			comunes.intersection_update(lista)
+		return [self._productos[pos] for pos in sorted(comunes)]
+
+	def buscar_difuso(self, texto: str, limite: int = 5, minimo: float = 0.3) -> List[Tuple[Producto, float]]:
+		"""Productos más parecidos a `texto`, tolerando errores de tipeo.
+
+		La similitud es el coeficiente de Dice entre los trigramas de la
+		consulta y los del nombre (0 a 1).
+		"""
+		consulta = normalizar_texto(texto)
+		grams = trigramas(consulta)
+		if not grams:
+			return []
+		compartidos: Counter = Counter()
+		for gram in grams:
+			compartidos.update(self._trigramas.get(gram, ()))
+		puntajes = (
+			(2.0 * n / (len(grams) + self._n_trigramas[pos]), pos)
+			for pos, n in compartidos.items()
+		)
+		mejores = heapq.nlargest(limite, (p for p in puntajes if p[0] >= minimo), key=lambda p: (p[0], -p[1]))
+		return [(self._productos[pos], round(score, 4)) for score, pos in mejores]
+
+	def sugerencias(self, texto: str, n: int = 3) -> List[str]:
+		"""IDs sugeridos para una entrada no encontrada."""
+		return [prod.id_convenio for prod, _ in self.buscar_difuso(texto, limite=n)]
+
+	def buscar(self, entrada: str) -> Optional[Producto]:
+		"""Busca por ID exacto o, si no, por nombre que contenga la entrada."""
+		return self.por_id(entrada) or self.buscar_subcadena(entrada)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import csv
+import glob
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .cotizador import cotizar_a_archivo
+from .indice import CatalogIndex
+from .proveedor import CatalogProvider, fuente_desde_texto, proveedor_por_defecto
+
+EXTENSIONES = (".csv", ".xlsx", ".xls", ".txt")
+RESUMEN_NO_ENCONTRADOS = "resumen_no_encontrados.csv"
+
+# Índice del catálogo en cada proceso del pool (ver `_iniciar_worker`)
+_INDICE_WORKER: Optional[CatalogIndex] = None
+
+
+def _dentro_de(ruta: str, directorio: str) -> bool:
+	ruta, directorio = os.path.realpath(ruta), os.path.realpath(directorio)
+	return os.path.commonpath([ruta, directorio]) == directorio
+
+
+def listar_archivos(patron: str, excluir: Optional[str] = None) -> List[str]:
+	"""Listas de compra de un directorio o de un patrón glob, ordenadas.
+
+	Los archivos dentro de `excluir` (el directorio de salida) se omiten para
+	que una nueva ejecución no cotice las salidas de la anterior.
+	"""
+	if os.path.isdir(patron):
+		rutas = [os.path.join(patron, n) for n in os.listdir(patron)]
+	else:
+		rutas = glob.glob(patron)
+	return sorted(
+		r for r in rutas
+		if os.path.isfile(r) and r.lower().endswith(EXTENSIONES) and not (excluir and _dentro_de(r, excluir))
+	)
+
+
+def _rutas_salida(archivos: List[str], dir_salida: str, formato: str) -> List[str]:
+	"""`lista.csv` → `<dir_salida>/lista_cotizacion.<formato>`; si dos entradas
+	comparten nombre base se agrega la extensión original, y si aun así
+	coinciden (mismo archivo en distintos directorios) un contador `_2`, `_3`…"""
+	bases = [os.path.splitext(os.path.basename(a)) for a in archivos]
+	repetidos = {b for b, n in Counter(b for b, _ in bases).items() if n > 1}
+	raices = [f"{base}{'_' + ext.lstrip('.') if base in repetidos else ''}" for base, ext in bases]
+	usadas = set(raices)
+	asignadas = set()
+	salidas = []
+	for raiz in raices:
+		nombre, n = raiz, 1
+		while nombre in asignadas or (nombre != raiz and nombre in usadas):
+			n += 1
+			nombre = f"{raiz}_{n}"
+		asignadas.add(nombre)
+		salidas.append(os.path.join(dir_salida, f"{nombre}_cotizacion.{formato}"))
+	return salidas
+
+
+def _iniciar_worker(fuente: Optional[str]) -> None:
+	"""Carga el catálogo y su índice una sola vez por proceso."""
+	global _INDICE_WORKER
+	proveedor = CatalogProvider(fuente_desde_texto(fuente)) if fuente else proveedor_por_defecto()
+	_INDICE_WORKER = proveedor.indice
+	_INDICE_WORKER.tabla()
+
+
+def _cotizar_uno(ruta: str, ruta_salida: str) -> Dict[str, Any]:
+	try:
+		resumen = cotizar_a_archivo(ruta, ruta_salida, indice=_INDICE_WORKER)
+	except Exception as exc:
+		return {"entrada": ruta, "salida": None, "items": 0, "no_encontrados": [], "sugerencias": {}, "error": str(exc)}
+	resumen["entrada"] = ruta
+	resumen["error"] = None
+	return resumen
+
+
+def consolidar_no_encontrados(resultados: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+	"""Une los no encontrados de todas las cotizaciones.
+
+	Returns:
+		Filas con `Entrada`, `Veces`, `Archivos` y `Sugerencias`, de la más
+		a la menos pedida: son los huecos del catálogo.
+	"""
+	veces: Counter = Counter()
+	archivos: Dict[str, List[str]] = {}
+	sugerencias: Dict[str, List[str]] = {}
+	for res in resultados:
+		nombre = os.path.basename(res["entrada"])
+		for entrada in res["no_encontrados"]:
+			veces[entrada] += 1
+			lista = archivos.setdefault(entrada, [])
+			if not lista or lista[-1] != nombre:
+				lista.append(nombre)
+		for entrada, ids in res["sugerencias"].items():
+			sugerencias.setdefault(entrada, ids)
+	return [
+		{
+			"Entrada": entrada,
+			"Veces": n,
+			"Archivos": ";".join(archivos[entrada]),
+			"Sugerencias": ";".join(sugerencias.get(entrada, [])),
+		}
+		for entrada, n in sorted(veces.items(), key=lambda kv: (-kv[1], kv[0]))
+	]
+
+
+def procesar_lote(
+	patron: str,
+	dir_salida: str,
+	workers: Optional[int] = None,
+	fuente: Optional[str] = None,
+	formato: str = "csv",
+) -> Dict[str, Any]:
+	"""Cotiza todas las listas de `patron` (directorio o glob).
+
+	Con `workers` > 1 los archivos se reparten en un pool de procesos; cada
+	proceso carga el catálogo una vez al iniciar. Escribe una cotización por
+	archivo y `resumen_no_encontrados.csv` en `dir_salida`, que se excluye de
+	las entradas (y no puede ser el directorio de entrada).
+
+	Returns:
+		Dict con `resultados` (uno por archivo, en orden), `no_encontrados`
+		(consolidado) y `resumen` (ruta del CSV consolidado).
+	"""
+	if os.path.isdir(patron) and _dentro_de(patron, dir_salida):
+		raise ValueError(f"El directorio de salida {dir_salida!r} no puede contener las listas de entrada")
+	archivos = listar_archivos(patron, excluir=dir_salida)
+	os.makedirs(dir_salida, exist_ok=True)
+	salidas = _rutas_salida(archivos, dir_salida, formato)
+	workers = workers or os.cpu_count() or 1
+
+	if workers <= 1 or len(archivos) <= 1:
+		_iniciar_worker(fuente)
+		resultados = [_cotizar_uno(a, s) for a, s in zip(archivos, salidas)]
+	else:
+		with ProcessPoolExecutor(max_workers=min(workers, len(archivos)), initializer=_iniciar_worker, initargs=(fuente,)) as pool:
+			resultados = list(pool.map(_cotizar_uno, archivos, salidas))
+
+	consolidado = consolidar_no_encontrados(resultados)
+	ruta_resumen = os.path.join(dir_salida, RESUMEN_NO_ENCONTRADOS)
+	with open(ruta_resumen, "w", newline="", encoding="utf-8") as f:
+		writer = csv.DictWriter(f, fieldnames=["Entrada", "Veces", "Archivos", "Sugerencias"])
+		writer.writeheader()
+		writer.writerows(consolidado)
+	return {"resultados": resultados, "no_encontrados": consolidado, "resumen": ruta_resumen}
+
+
+def _cli():
+	import argparse
+	import time
+	parser = argparse.ArgumentParser(description="Cotiza en lote todas las listas de un directorio o patrón glob.")
+	parser.add_argument("entradas", help="Directorio o patrón glob (p. ej. 'listas/*.xlsx')")
+	parser.add_argument("--salida-dir", default="cotizaciones", help="Directorio de salida")
+	parser.add_argument("--workers", type=int, default=None, help="Procesos en paralelo (por defecto, núcleos disponibles)")
+	parser.add_argument("--catalogo", help="CSV del catálogo o sheets:<pestaña> (por defecto CATALOGO_FUENTE o el simulado)")
+	parser.add_argument("--formato", choices=["csv", "xlsx"], default="csv", help="Formato de cada cotización")
+	args = parser.parse_args()
+
+	t0 = time.perf_counter()
+	lote = procesar_lote(args.entradas, args.salida_dir, args.workers, args.catalogo, args.formato)
+	for res in lote["resultados"]:
+		if res["error"]:
+			print(f"Error en {res['entrada']}: {res['error']}")
+		else:
+			print(f"{res['entrada']} → {res['salida']} ({res['items']} ítems, {len(res['no_encontrados'])} no encontrados)")
+	print(f"{len(lote['resultados'])} archivos en {time.perf_counter() - t0:.1f} s")
+	print(f"Productos no encontrados ({len(lote['no_encontrados'])} distintos): {lote['resumen']}")
+
+
+if __name__ == "__main__":
+	_cli()
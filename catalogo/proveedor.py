@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import csv
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from .data import Producto, cargar_catalogo_simulado
+from .indice import CatalogIndex
+
+logger = logging.getLogger(__name__)
+
+# Fuente del catálogo: ruta a un CSV, "sheets:<pestaña>" o vacío para el simulado
+CATALOGO_FUENTE = os.getenv("CATALOGO_FUENTE", "")
+# Segundos entre revisiones de cambios en la fuente
+CATALOGO_REVISION_S = float(os.getenv("CATALOGO_REVISION_S", "5"))
+
+
+def _precio(valor) -> float:
+	"""Interpreta precios como "1.890" o "$ 1.890,50"; 0.0 si no hay precio."""
+	if valor in (None, ""):
+		return 0.0
+	from agents.common.money import parse_minor
+
+	minor = parse_minor(valor)
+	return minor / 100 if minor is not None else 0.0
+
+
+def productos_desde_registros(registros: List[Dict[str, object]]) -> Dict[str, Producto]:
+	"""Convierte filas con `ID_Convenio_Marco`, `Nombre_Producto` y, si
+	existen, `Precio_Unitario` y `URL_Imagen` al dict del cotizador."""
+	catalogo: Dict[str, Producto] = {}
+	for fila in registros:
+		id_cm = str(fila.get("ID_Convenio_Marco") or "").strip()
+		if not id_cm:
+			continue
+		catalogo[id_cm] = Producto(
+			id_convenio=id_cm,
+			nombre=str(fila.get("Nombre_Producto") or "").strip(),
+			precio=_precio(fila.get("Precio_Unitario", fila.get("Precio"))),
+			url_imagen=str(fila.get("URL_Imagen") or "").strip(),
+		)
+	return catalogo
+
+
+class FuenteSimulada:
+	"""Catálogo de `catalogo.data`; nunca cambia."""
+
+	nombre = "simulado"
+
+	def version(self) -> str:
+		return "simulado"
+
+	def cargar(self) -> Dict[str, Producto]:
+		return cargar_catalogo_simulado()
+
+
+class FuenteCSV:
+	"""CSV del catálogo (p. ej. `productos_catalogo_con_imagenes.csv`).
+
+	La versión es el mtime y tamaño del archivo, que se obtienen con un
+	`stat` sin leerlo.
+	"""
+
+	def __init__(self, ruta: str):
+		self.ruta = ruta
+		self.nombre = ruta
+
+	def version(self) -> str:
+		st = os.stat(self.ruta)
+		return f"{st.st_mtime_ns}:{st.st_size}"
+
+	def cargar(self) -> Dict[str, Producto]:
+		with open(self.ruta, newline="", encoding="utf-8") as f:
+			return productos_desde_registros(list(csv.DictReader(f)))
+
+
+class FuenteSheets:
+	"""Pestaña de Google Sheets con el catálogo.
+
+	La versión es `lastUpdateTime` de la planilla (metadatos de Drive), así
+	que revisar cambios no descarga los valores.
+	"""
+
+	def __init__(self, tab: str, sheet_name: Optional[str] = None, abrir: Optional[Callable[[], object]] = None):
+		self.tab = tab
+		self.sheet_name = sheet_name or os.getenv("SHEET_NAME", "Vendedor360_DataHub")
+		self.nombre = f"sheets:{self.sheet_name}/{tab}"
+		self._abrir = abrir or self._abrir_gspread
+		self._planilla = None
+
+	def _abrir_gspread(self):
+		import gspread
+		from oauth2client.service_account import ServiceAccountCredentials
+
+		scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+		creds = ServiceAccountCredentials.from_json_keyfile_name(os.environ["GOOGLE_SERVICE_ACCOUNT_JSON"], scope)
+		return gspread.authorize(creds).open(self.sheet_name)
+
+	def _spreadsheet(self):
+		if self._planilla is None:
+			self._planilla = self._abrir()
+		return self._planilla
+
+	def version(self) -> str:
+		return str(self._spreadsheet().get_lastUpdateTime())
+
+	def cargar(self) -> Dict[str, Producto]:
+		return productos_desde_registros(self._spreadsheet().worksheet(self.tab).get_all_records())
+
+
+def fuente_desde_texto(texto: str):
+	"""Crea la fuente a partir de `CATALOGO_FUENTE` o del argumento de la CLI."""
+	if not texto or texto == "simulado":
+		return FuenteSimulada()
+	if texto.startswith("sheets:"):
+		return FuenteSheets(texto.split(":", 1)[1] or "Catalogo")
+	return FuenteCSV(texto)
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+	"""Catálogo e índice de una versión concreta de la fuente."""
+	productos: Dict[str, Producto]
+	indice: CatalogIndex
+	version: str
+	cargado_en: float
+	duracion_carga_s: float
+
+
+class CatalogProvider:
+	"""Mantiene en memoria el catálogo con su índice y lo recarga si cambia.
+
+	`snapshot()` revisa la versión de la fuente como máximo cada
+	`intervalo_revision` segundos. Si cambió, un solo hilo construye el
+	nuevo snapshot completo y lo publica reemplazando la referencia; las
+	cotizaciones en curso siguen usando el snapshot que ya tenían. Si la
+	recarga falla se conserva el snapshot anterior.
+	"""
+
+	def __init__(self, fuente=None, intervalo_revision: float = CATALOGO_REVISION_S, reloj: Callable[[], float] = time.monotonic):
+		self.fuente = fuente or FuenteSimulada()
+		self.intervalo_revision = intervalo_revision
+		self._reloj = reloj
+		self._lock = threading.Lock()
+		self._snapshot: Optional[CatalogSnapshot] = None
+		self._ultima_revision = 0.0
+		self._recargas = 0
+		self._errores = 0
+
+	def _cargar(self, version: str) -> CatalogSnapshot:
+		t0 = time.perf_counter()
+		productos = self.fuente.cargar()
+		indice = CatalogIndex.desde_catalogo(productos)
+		duracion = time.perf_counter() - t0
+		logger.info("Catálogo %s cargado: %d productos en %.3f s", self.fuente.nombre, len(productos), duracion)
+		return CatalogSnapshot(productos, indice, version, time.time(), duracion)
+
+	def snapshot(self) -> CatalogSnapshot:
+		"""Snapshot vigente, recargándolo antes si la fuente cambió."""
+		actual = self._snapshot
+		if actual is not None and self._reloj() - self._ultima_revision < self.intervalo_revision:
+			return actual
+		with self._lock:
+			actual = self._snapshot
+			if actual is not None and self._reloj() - self._ultima_revision < self.intervalo_revision:
+				return actual  # otro hilo acaba de revisar
+			try:
+				version = self.fuente.version()
+				if actual is None or version != actual.version:
+					self._snapshot = self._cargar(version)
+					self._recargas += 1
+			except Exception as exc:
+				if actual is None:
+					raise
+				self._errores += 1
+				logger.warning("No se pudo recargar el catálogo %s: %s", self.fuente.nombre, exc)
+			self._ultima_revision = self._reloj()
+			return self._snapshot
+
+	@property
+	def indice(self) -> CatalogIndex:
+		return self.snapshot().indice
+
+	def metricas(self) -> Dict[str, object]:
+		"""Tiempo de carga, cantidad de productos y edad del snapshot."""
+		snap = self._snapshot
+		return {
+			"fuente": self.fuente.nombre,
+			"version": snap.version if snap else None,
+			"productos": len(snap.productos) if snap else 0,
+			"duracion_carga_s": round(snap.duracion_carga_s, 4) if snap else None,
+			"edad_snapshot_s": round(time.time() - snap.cargado_en, 1) if snap else None,
+			"recargas": self._recargas,
+			"errores_recarga": self._errores,
+		}
+
+
+_PROVEEDOR: Optional[CatalogProvider] = None
+_PROVEEDOR_LOCK = threading.Lock()
+
+
+def proveedor_por_defecto() -> CatalogProvider:
+	"""Proveedor del proceso, creado una sola vez según `CATALOGO_FUENTE`."""
+	global _PROVEEDOR
+	if _PROVEEDOR is None:
+		with _PROVEEDOR_LOCK:
+			if _PROVEEDOR is None:
+				_PROVEEDOR = CatalogProvider(fuente_desde_texto(CATALOGO_FUENTE))
+	return _PROVEEDOR
+
+
+def configurar_proveedor(fuente) -> CatalogProvider:
+	"""Reemplaza el proveedor del proceso (CLI o pruebas)."""
+	global _PROVEEDOR
+	with _PROVEEDOR_LOCK:
+		_PROVEEDOR = CatalogProvider(fuente_desde_texto(fuente) if isinstance(fuente, str) else fuente)
+	return _PROVEEDOR
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from .scraper import ERROR_CANCELADO, ResultadoScrapeo, buscar_imagen
+
+# Fuente: (id, contexto) → ResultadoScrapeo. El contexto trae sesión,
+# limitador, caché, espera y el evento `cancelado` de la carrera.
+Resolvedor = Callable[..., ResultadoScrapeo]
+
+RESOLVEDORES: Dict[str, Resolvedor] = {}
+
+# Búsqueda de cada tienda; todas tienen estructura tipo Magento
+URL_BUSQUEDA = {
+	"prisa": "https://www.prisa.cl/buscar?q={id}",
+	"dimerc": os.getenv("DIMERC_BUSQUEDA_URL", "https://www.dimerc.cl/catalogsearch/result/?q={id}"),
+	"convenio_marco": os.getenv(
+		"CONVENIO_MARCO_BUSQUEDA_URL",
+		"https://conveniomarco2.mercadopublico.cl/catalogsearch/result/?q={id}",
+	),
+}
+
+
+def registrar(nombre: str, resolvedor: Resolvedor) -> None:
+	"""Agrega (o reemplaza) una fuente de imágenes."""
+	RESOLVEDORES[nombre] = resolvedor
+
+
+def _resolvedor_busqueda(plantilla: str) -> Resolvedor:
+	def _resolver(id_convenio_marco: str, **contexto) -> ResultadoScrapeo:
+		return buscar_imagen(id_convenio_marco, plantilla.format(id=id_convenio_marco), **contexto)
+	return _resolver
+
+
+for _nombre, _plantilla in URL_BUSQUEDA.items():
+	registrar(_nombre, _resolvedor_busqueda(_plantilla))
+
+
+@dataclass
+class EstadisticaFuente:
+	"""Éxitos y latencia de una fuente, para ordenar la cascada."""
+	intentos: int = 0
+	exitos: int = 0
+	cancelados: int = 0
+	latencia_media_s: float = 0.0
+
+	def registrar(self, exito: bool, latencia_s: float, alfa: float = 0.2) -> None:
+		self.intentos += 1
+		self.exitos += int(exito)
+		if self.intentos == 1:
+			self.latencia_media_s = latencia_s
+		else:
+			self.latencia_media_s += alfa * (latencia_s - self.latencia_media_s)
+
+	@property
+	def tasa_exito(self) -> float:
+		# Suavizado de Laplace: una fuente nueva parte en 0,5
+		return (self.exitos + 1) / (self.intentos + 2)
+
+	def puntaje(self) -> float:
+		"""Éxitos esperados por segundo de espera."""
+		return self.tasa_exito / max(self.latencia_media_s, 0.05)
+
+
+class ResolvedorImagenes:
+	"""Consulta varias fuentes de imágenes para un ID.
+
+	- `carrera`: todas las fuentes a la vez; gana la primera imagen válida y
+	  a las demás se les avisa (`cancelado`) para que no hagan su siguiente
+	  solicitud; las que no habían partido se cancelan.
+	- `cascada`: una fuente tras otra, en el orden que dan las estadísticas
+	  (tasa de éxito / latencia), así que la que mejor responde va primero.
+	"""
+
+	def __init__(self, fuentes: Optional[List[str]] = None, estrategia: str = "carrera", max_workers: int = 8):
+		fuentes = fuentes or list(RESOLVEDORES)
+		desconocidas = [f for f in fuentes if f not in RESOLVEDORES]
+		if desconocidas:
+			raise ValueError(f"Fuentes no registradas: {', '.join(desconocidas)}")
+		if estrategia not in ("carrera", "cascada"):
+			raise ValueError(f"Estrategia no soportada: {estrategia}")
+		self.fuentes = fuentes
+		self.estrategia = estrategia
+		self.estadisticas: Dict[str, EstadisticaFuente] = {f: EstadisticaFuente() for f in fuentes}
+		self._lock = threading.Lock()
+		self._pool = ThreadPoolExecutor(max_workers=max(max_workers, len(fuentes)), thread_name_prefix="fuente")
+
+	def orden(self) -> List[str]:
+		"""Fuentes de mejor a peor puntaje (empates: orden configurado)."""
+		with self._lock:
+			return sorted(self.fuentes, key=lambda f: -self.estadisticas[f].puntaje())
+
+	def _consultar(self, fuente: str, id_val: str, contexto: dict) -> ResultadoScrapeo:
+		t0 = time.perf_counter()
+		try:
+			res = RESOLVEDORES[fuente](id_val, **contexto)
+		except Exception as exc:
+			res = ResultadoScrapeo(id_val, None, f"{fuente}: {exc}")
+		with self._lock:
+			est = self.estadisticas[fuente]
+			if res.error == ERROR_CANCELADO:
+				est.cancelados += 1
+			else:
+				est.registrar(bool(res.url_imagen), time.perf_counter() - t0)
+		return res
+
+	def _cascada(self, id_val: str, contexto: dict) -> ResultadoScrapeo:
+		errores = []
+		for fuente in self.orden():
+			res = self._consultar(fuente, id_val, contexto)
+			if res.url_imagen:
+				return res
+			errores.append(f"{fuente}: {res.error}")
+		return ResultadoScrapeo(id_val, None, "; ".join(errores))
+
+	def _carrera(self, id_val: str, contexto: dict) -> ResultadoScrapeo:
+		cancelado = threading.Event()
+		contexto = dict(contexto, cancelado=cancelado)
+		futuros = {self._pool.submit(self._consultar, f, id_val, contexto): f for f in self.orden()}
+		errores = []
+		pendientes = set(futuros)
+		try:
+			while pendientes:
+				hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+				for futuro in hechos:
+					res = futuro.result()
+					if res.url_imagen:
+						return res
+					errores.append(f"{futuros[futuro]}: {res.error}")
+		finally:
+			cancelado.set()
+			for futuro in pendientes:
+				futuro.cancel()
+		return ResultadoScrapeo(id_val, None, "; ".join(errores))
+
+	def resolver(self, id_convenio_marco: str, **contexto) -> ResultadoScrapeo:
+		"""Imagen del ID según la estrategia. `contexto` se pasa a cada fuente
+		(sesion, limitador, cache, espera_s)."""
+		if self.estrategia == "cascada":
+			return self._cascada(id_convenio_marco, contexto)
+		return self._carrera(id_convenio_marco, contexto)
+
+	def stats(self) -> Dict[str, Dict[str, float]]:
+		"""Estadísticas por fuente para el reporte."""
+		with self._lock:
+			return {
+				f: {
+					"intentos": e.intentos,
+					"exitos": e.exitos,
+					"cancelados": e.cancelados,
+					"tasa_exito": round(e.exitos / e.intentos, 3) if e.intentos else None,
+					"latencia_media_s": round(e.latencia_media_s, 3),
+				}
+				for f, e in self.estadisticas.items()
+			}
+
+	def cerrar(self) -> None:
+		self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,12 +1,24 @@
 from __future__ import annotations
 
 import csv
+import logging
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import Optional, List, Dict
+from typing import Callable, Optional, List, Dict
+from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from agents.common import html_extract
+from agents.common.limitador import LimitadorPorHost
+
+from .cache import CacheHTTP, CheckpointScrapeo
+
+logger = logging.getLogger(__name__)
 
 
 USER_AGENT = (
@@ -22,11 +34,47 @@ class ResultadoScrapeo:
 	error: Optional[str]
 
 
-def _solicitar_html(url: str, timeout: float = 15.0) -> Optional[str]:
-	"""Obtiene HTML de una URL con headers adecuados y tolerancia a errores."""
-	headers = {"User-Agent": USER_AGENT, "Accept-Language": "es-CL,es;q=0.9"}
+HEADERS = {"User-Agent": USER_AGENT, "Accept-Language": "es-CL,es;q=0.9"}
+
+# Hilos por defecto al enriquecer; el ritmo real lo fija el limitador por host
+WORKERS_POR_DEFECTO = 8
+ERROR_CANCELADO = "Cancelado: otra fuente respondió antes"
+
+# Días tras los cuales un resultado del checkpoint se vuelve a consultar
+MAX_EDAD_DIAS = 30.0
+
+
+def crear_sesion(pool: int = WORKERS_POR_DEFECTO) -> requests.Session:
+	"""Sesión con conexiones keep-alive reutilizables entre hilos."""
+	sesion = requests.Session()
+	sesion.headers.update(HEADERS)
+	adaptador = HTTPAdapter(pool_connections=pool, pool_maxsize=pool)
+	sesion.mount("https://", adaptador)
+	sesion.mount("http://", adaptador)
+	return sesion
+
+
+def _solicitar_html(
+	url: str,
+	timeout: float = 15.0,
+	sesion: Optional[requests.Session] = None,
+	limitador: Optional[LimitadorPorHost] = None,
+	cache: Optional[CacheHTTP] = None,
+) -> Optional[str]:
+	"""Obtiene HTML de una URL con headers adecuados y tolerancia a errores.
+
+	Con `limitador`, espera el turno del host antes de solicitar; con
+	`cache` (requiere `sesion`), hace un GET condicional.
+	"""
+	if limitador is not None:
+		limitador.adquirir(url)
 	try:
-		resp = requests.get(url, headers=headers, timeout=timeout)
+		if cache is not None and sesion is not None:
+			return cache.obtener(sesion, url, timeout=timeout)
+		if sesion is not None:
+			resp = sesion.get(url, timeout=timeout)
+		else:
+			resp = requests.get(url, headers=HEADERS, timeout=timeout)
 		if resp.status_code != 200:
 			return None
 		return resp.text
@@ -40,49 +88,162 @@ def _parsear_prisa_busqueda(html: str) -> Optional[str]:
 	Esta función está basada en observación de estructura típica; si cambia,
 	retorna None.
 	"""
-	soup = BeautifulSoup(html, "html.parser")
+	arbol = html_extract.parsear(html)
 	# Ejemplos: enlaces con clase 'product-item-link' o contenedores de tarjetas
-	link = soup.select_one("a.product-item-link, a[itemprop='url']")
-	if link and link.get("href"):
-		return link["href"].strip()
+	link = html_extract.atributo(arbol, "a.product-item-link, a[itemprop='url']", "href")
+	if link:
+		return link
 	# Alternativa: primera tarjeta con data-product-url
-	card = soup.select_one("[data-product-url]")
-	if card and card.get("data-product-url"):
-		return card["data-product-url"].strip()
-	return None
+	return html_extract.atributo(arbol, "[data-product-url]", "data-product-url")
 
 
 def _parsear_prisa_imagen_producto(html: str) -> Optional[str]:
 	"""Extrae la URL de la imagen principal desde la página de producto de Prisa."""
-	soup = BeautifulSoup(html, "html.parser")
+	arbol = html_extract.parsear(html)
 	# Común en Magento: img#image, img.fotorama__img, meta property og:image
-	img = soup.select_one("img#image, img.fotorama__img, img.product.image")
-	if img and img.get("src"):
-		return img["src"].strip()
-	meta = soup.find("meta", attrs={"property": "og:image"})
-	if meta and meta.get("content"):
-		return meta["content"].strip()
-	return None
+	img = html_extract.atributo(arbol, "img#image, img.fotorama__img, img.product.image", "src")
+	if img:
+		return img
+	return html_extract.metas(arbol).get("og:image") or None
 
 
-def obtener_url_imagen_prisa(id_convenio_marco: str, espera_s: float = 1.0) -> ResultadoScrapeo:
-	"""Realiza búsqueda por ID en Prisa y retorna la URL de imagen si existe."""
-	busqueda = f"https://www.prisa.cl/buscar?q={id_convenio_marco}"
-	html_busqueda = _solicitar_html(busqueda)
+def buscar_imagen(
+	id_convenio_marco: str,
+	url_busqueda: str,
+	espera_s: float = 1.0,
+	sesion: Optional[requests.Session] = None,
+	limitador: Optional[LimitadorPorHost] = None,
+	cache: Optional[CacheHTTP] = None,
+	cancelado: Optional[threading.Event] = None,
+) -> ResultadoScrapeo:
+	"""Búsqueda → página de producto → imagen, para tiendas con estructura
+	tipo Magento (Prisa, Dimerc, tienda de Convenio Marco).
+
+	Sin `limitador` se duerme `espera_s` entre solicitudes; con él, la
+	cortesía la impone el balde del host. Si `cancelado` se activa (otra
+	fuente ya respondió) no se hace la siguiente solicitud.
+	"""
+	html_busqueda = _solicitar_html(url_busqueda, sesion=sesion, limitador=limitador, cache=cache)
 	if not html_busqueda:
 		return ResultadoScrapeo(id_convenio_marco, None, "No se pudo cargar resultados de búsqueda")
 	url_producto = _parsear_prisa_busqueda(html_busqueda)
 	if not url_producto:
 		return ResultadoScrapeo(id_convenio_marco, None, "Producto no encontrado en resultados")
-	# Cortesía con el sitio
-	time.sleep(espera_s)
-	html_producto = _solicitar_html(url_producto)
+	url_producto = urljoin(url_busqueda, url_producto)
+	if limitador is None:
+		# Cortesía con el sitio
+		time.sleep(espera_s)
+	if cancelado is not None and cancelado.is_set():
+		return ResultadoScrapeo(id_convenio_marco, None, ERROR_CANCELADO)
+	html_producto = _solicitar_html(url_producto, sesion=sesion, limitador=limitador, cache=cache)
 	if not html_producto:
 		return ResultadoScrapeo(id_convenio_marco, None, "No se pudo cargar página de producto")
 	url_imagen = _parsear_prisa_imagen_producto(html_producto)
 	if not url_imagen:
 		return ResultadoScrapeo(id_convenio_marco, None, "No se encontró imagen en la página")
-	return ResultadoScrapeo(id_convenio_marco, url_imagen, None)
+	return ResultadoScrapeo(id_convenio_marco, urljoin(url_producto, url_imagen), None)
+
+
+def obtener_url_imagen_prisa(
+	id_convenio_marco: str,
+	espera_s: float = 1.0,
+	sesion: Optional[requests.Session] = None,
+	limitador: Optional[LimitadorPorHost] = None,
+	cache: Optional[CacheHTTP] = None,
+	cancelado: Optional[threading.Event] = None,
+) -> ResultadoScrapeo:
+	"""Realiza búsqueda por ID en Prisa y retorna la URL de imagen si existe."""
+	busqueda = f"https://www.prisa.cl/buscar?q={id_convenio_marco}"
+	return buscar_imagen(id_convenio_marco, busqueda, espera_s, sesion, limitador, cache, cancelado)
+
+
+def _imprimir_progreso(hechos: int, total: int, res: ResultadoScrapeo, inicio: float) -> None:
+	"""Progreso en el log cada ~5 % y al terminar."""
+	paso = max(1, total // 20)
+	if hechos % paso and hechos != total:
+		return
+	dt = time.monotonic() - inicio
+	eta = dt / hechos * (total - hechos) if hechos else 0.0
+	logger.info("[%d/%d] %.2f IDs/s, ETA %.0f s", hechos, total, hechos / dt if dt else 0, eta)
+
+
+def resolver_ids(
+	ids: List[str],
+	sitio: str = "prisa",
+	espera_s: float = 1.0,
+	workers: int = WORKERS_POR_DEFECTO,
+	limitador: Optional[LimitadorPorHost] = None,
+	progreso: Optional[Callable[[int, int, ResultadoScrapeo, float], None]] = _imprimir_progreso,
+	checkpoint: Optional[CheckpointScrapeo] = None,
+	cache: Optional[CacheHTTP] = None,
+	resolvedor=None,
+) -> Dict[str, ResultadoScrapeo]:
+	"""Obtiene la imagen de cada ID con un pool de hilos.
+
+	`sitio` es una fuente de `catalogo.resolvedores.RESOLVEDORES` (`prisa`,
+	`dimerc`, `convenio_marco`) o `auto`, que usa `resolvedor` (por defecto
+	un `ResolvedorImagenes` en carrera con todas las fuentes).
+
+	Todos los hilos comparten una `requests.Session` y un limitador por host
+	(por defecto, una solicitud cada `espera_s` segundos por sitio). Con
+	`checkpoint`, cada resultado se guarda apenas termina.
+	"""
+	from .resolvedores import RESOLVEDORES, ResolvedorImagenes
+
+	limitador = limitador or LimitadorPorHost(tasa=1.0 / espera_s if espera_s > 0 else 1000.0)
+	propio = sitio == "auto" and resolvedor is None
+	if propio:
+		resolvedor = ResolvedorImagenes(max_workers=workers * 3)
+	sesion = crear_sesion(workers * (len(resolvedor.fuentes) if resolvedor else 1))
+	contexto = {"espera_s": espera_s, "sesion": sesion, "limitador": limitador, "cache": cache}
+	resultados: Dict[str, ResultadoScrapeo] = {}
+	pendientes = list(dict.fromkeys(ids))
+	lock = threading.Lock()
+	inicio = time.monotonic()
+
+	def _uno(id_val: str) -> ResultadoScrapeo:
+		if sitio == "auto":
+			return resolvedor.resolver(id_val, **contexto)
+		if sitio in RESOLVEDORES:
+			return RESOLVEDORES[sitio](id_val, **contexto)
+		return ResultadoScrapeo(id_val, None, f"Sitio no soportado: {sitio}")
+
+	try:
+		with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+			futuros = {pool.submit(_uno, id_val): id_val for id_val in pendientes}
+			for futuro in as_completed(futuros):
+				id_val = futuros[futuro]
+				try:
+					res = futuro.result()
+				except Exception as exc:
+					res = ResultadoScrapeo(id_val, None, f"Error inesperado: {exc}")
+				if checkpoint is not None:
+					checkpoint.guardar(res.id_convenio_marco, res.url_imagen, res.error)
+				with lock:
+					resultados[id_val] = res
+					if progreso is not None:
+						progreso(len(resultados), len(pendientes), res, inicio)
+	finally:
+		sesion.close()
+		if propio:
+			resolvedor.cerrar()
+			logger.info("Fuentes: %s", resolvedor.stats())
+	return resultados
+
+
+def _urls_existentes(*rutas: str) -> Dict[str, str]:
+	"""ID → URL_Imagen ya presente en CSVs previos (entrada o salida anterior)."""
+	urls: Dict[str, str] = {}
+	for ruta in rutas:
+		if not ruta or not os.path.exists(ruta):
+			continue
+		with open(ruta, newline="", encoding="utf-8") as f:
+			for row in csv.DictReader(f):
+				id_val = str(row.get("ID_Convenio_Marco") or "").strip()
+				url = str(row.get("URL_Imagen") or "").strip()
+				if id_val and url:
+					urls.setdefault(id_val, url)
+	return urls
 
 
 def enriquecer_catalogo_con_imagenes(
@@ -90,10 +251,26 @@ def enriquecer_catalogo_con_imagenes(
 	out_csv: str = "productos_catalogo_con_imagenes.csv",
 	sitio: str = "prisa",
 	espera_s: float = 1.0,
+	workers: int = WORKERS_POR_DEFECTO,
+	progreso: Optional[Callable[[int, int, ResultadoScrapeo, float], None]] = _imprimir_progreso,
+	checkpoint_path: Optional[str] = None,
+	cache_dir: Optional[str] = None,
+	incremental: bool = True,
+	max_edad_dias: Optional[float] = MAX_EDAD_DIAS,
 ) -> None:
 	"""Lee un CSV con columna ID_Convenio_Marco y agrega URL_Imagen mediante scraping.
 
-	Actualmente implementado para sitio 'prisa'. Se puede extender con 'dimerc'.
+	`sitio` es `prisa`, `dimerc`, `convenio_marco` o `auto` (todas las
+	fuentes en carrera; ver `catalogo.resolvedores`).
+	Los IDs se procesan en paralelo (`workers` hilos) respetando `espera_s`
+	entre solicitudes a un mismo host.
+
+	Cada resultado se registra en `checkpoint_path` (por defecto
+	`<out_csv>.checkpoint.sqlite`) apenas termina. En modo `incremental` solo
+	se consultan los IDs sin imagen en la entrada ni en la salida anterior y
+	cuyo checkpoint falta, tiene error o supera `max_edad_dias`. Con
+	`cache_dir`, las páginas se guardan en disco y se revalidan con
+	ETag/Last-Modified.
 	"""
 	# Leer IDs
 	ids: List[str] = []
@@ -106,18 +283,41 @@ def enriquecer_catalogo_con_imagenes(
 			if val:
 				ids.append(val)
 
-	resultados: Dict[str, ResultadoScrapeo] = {}
-	for id_val in ids:
-		if sitio == "prisa":
-			res = obtener_url_imagen_prisa(id_val, espera_s=espera_s)
+	checkpoint = CheckpointScrapeo(checkpoint_path or f"{out_csv}.checkpoint.sqlite")
+	cache = CacheHTTP(cache_dir) if cache_dir else None
+	try:
+		urls: Dict[str, str] = {}
+		if incremental:
+			urls = _urls_existentes(in_csv, out_csv)
+			registros = checkpoint.cargar()
+			max_edad_s = max_edad_dias * 86400 if max_edad_dias is not None else None
+			# Una URL en los CSV sin registro en el checkpoint vino de otra
+			# parte (p. ej. cargada a mano) y se respeta; las demás siguen las
+			# reglas del checkpoint (faltante, con error o vencida).
+			pendientes = [
+				i for i in checkpoint.pendientes(ids, max_edad_s)
+				if i in registros or i not in urls
+			]
+			for id_val, (url, error, _) in registros.items():
+				if url and not error:
+					urls[id_val] = url
 		else:
-			res = ResultadoScrapeo(id_val, None, f"Sitio no soportado: {sitio}")
-		resultados[id_val] = res
-		# Respeto de ritmo para no sobrecargar
-		time.sleep(espera_s)
+			pendientes = ids
+
+		resultados = resolver_ids(
+			pendientes, sitio=sitio, espera_s=espera_s, workers=workers,
+			progreso=progreso, checkpoint=checkpoint, cache=cache,
+		)
+	finally:
+		checkpoint.cerrar()
+	for id_val, res in resultados.items():
+		if res.url_imagen:
+			urls[id_val] = res.url_imagen
 
-	# Releer e escribir salida con nueva columna
-	with open(in_csv, newline="", encoding="utf-8") as fin, open(out_csv, "w", newline="", encoding="utf-8") as fout:
+	# Releer e escribir salida con nueva columna (a un temporal, para no
+	# perder la salida anterior si algo falla)
+	tmp_csv = f"{out_csv}.tmp"
+	with open(in_csv, newline="", encoding="utf-8") as fin, open(tmp_csv, "w", newline="", encoding="utf-8") as fout:
 		reader = csv.DictReader(fin)
 		fieldnames = list(reader.fieldnames or [])
 		if "URL_Imagen" not in fieldnames:
@@ -126,9 +326,9 @@ def enriquecer_catalogo_con_imagenes(
 		writer.writeheader()
 		for row in reader:
 			id_val = str(row.get("ID_Convenio_Marco", "")).strip()
-			res = resultados.get(id_val)
-			row["URL_Imagen"] = res.url_imagen if res and res.url_imagen else ""
+			row["URL_Imagen"] = urls.get(id_val, "")
 			writer.writerow(row)
+	os.replace(tmp_csv, out_csv)
 
 
 def _cli():
@@ -136,15 +336,26 @@ def _cli():
 	parser = argparse.ArgumentParser(description="Enriquece catálogo con URL de imágenes vía scraping")
 	parser.add_argument("--in", dest="in_csv", default="productos_catalogo.csv", help="CSV de entrada con ID_Convenio_Marco")
 	parser.add_argument("--out", dest="out_csv", default="productos_catalogo_con_imagenes.csv", help="CSV de salida")
-	parser.add_argument("--sitio", default="prisa", choices=["prisa"], help="Sitio objetivo")
-	parser.add_argument("--espera", type=float, default=1.0, help="Espera entre solicitudes (seg)")
+	parser.add_argument("--sitio", default="prisa", choices=["prisa", "dimerc", "convenio_marco", "auto"], help="Sitio objetivo ('auto': todas las fuentes, gana la primera imagen)")
+	parser.add_argument("--espera", type=float, default=1.0, help="Espera entre solicitudes a un mismo sitio (seg)")
+	parser.add_argument("--workers", type=int, default=WORKERS_POR_DEFECTO, help="Hilos en paralelo")
+	parser.add_argument("--checkpoint", default=None, help="SQLite de avance (por defecto <out>.checkpoint.sqlite)")
+	parser.add_argument("--cache-http", default="artifacts/cache/scraper_http", help="Directorio de caché HTTP ('' para desactivar)")
+	parser.add_argument("--completo", action="store_true", help="Volver a consultar todos los IDs, no solo los pendientes")
+	parser.add_argument("--max-edad-dias", type=float, default=MAX_EDAD_DIAS, help="Reconsultar resultados más viejos que esto")
 	args = parser.parse_args()
+	logging.basicConfig(level=logging.INFO, format="%(message)s")
 
 	enriquecer_catalogo_con_imagenes(
 		in_csv=args.in_csv,
 		out_csv=args.out_csv,
 		sitio=args.sitio,
 		espera_s=args.espera,
+		workers=args.workers,
+		checkpoint_path=args.checkpoint,
+		cache_dir=args.cache_http or None,
+		incremental=not args.completo,
+		max_edad_dias=args.max_edad_dias,
 	)
 	print(f"Archivo enriquecido escrito en {args.out_csv}")
 
@@ -55,6 +55,9 @@ def consolidate_dashboard_data():
                     if isinstance(data, dict):
                         if "ofertas" in data:
                             consolidated_data["summary"]["total_ofertas"] += len(data["ofertas"])
+                        elif "total_ofertas" in data:
+                            # Exportación en JSON Lines: el resumen ya trae el total
+                            consolidated_data["summary"]["total_ofertas"] += data["total_ofertas"]
                         if "keywords" in data:
                             consolidated_data["summary"]["total_keywords"] += len(data["keywords"])
             except Exception as e:
@@ -19,26 +19,57 @@ Environment variables can be used to override default settings:
   - CONTACTS_MAX_PAGES: maximum pages to visit per seed (default: 80)
   - CONTACTS_MAX_DEPTH: maximum crawl depth (default: 2)
   - CONTACTS_DELAY: delay between requests in seconds (default: 0.6)
+  - CONTACTS_WORKERS: number of sites crawled concurrently (default: 4)
+  - CONTACTS_HTTP_FIRST: fetch pages over plain HTTP before Chromium (default: 1)
+  - CONTACTS_BLOOM_CAPACITY: use a Bloom filter sized for this many URLs
+    instead of an exact set to remember seen pages (default: 0, exact set)
   - CONTACTS_SHEETS_ID: Google Sheets ID to upload results (optional)
 
 The script also optionally uploads results to Google Sheets when
 credentials are available and CONTACTS_SHEETS_ID is set.
 
+A single headless Chromium is launched per run.  Each seed gets its own
+lightweight browser context, and up to CONTACTS_WORKERS domains are
+crawled at the same time (seeds sharing a domain are crawled one after
+another so the politeness delay holds per domain).  Rows are merged as
+each site finishes.
+
+Pages are fetched HTTP-first: a pooled keep-alive `requests.Session`
+downloads the HTML, and the page only escalates to the browser when the
+response looks script-rendered (empty body, a `noscript` JavaScript wall,
+or no links and no emails) or the server blocks non-browser clients.  The
+browser context of a seed is only opened on its first escalation, and the
+escalation rate per domain is reported at the end of the run.
+
+Within a site, the next page is taken from a heap ordered by link score
+(highest first), then depth, then discovery order.  Pages are deduplicated
+by canonical URL (no fragment, sorted query, no trailing slash, either
+scheme), so each page is fetched at most once per seed.
+
 Note: This scraper requires Playwright with Chromium installed.  See
 `agents/contacts/requirements.txt` for the list of dependencies.
 """
 
+import asyncio
 import csv
+import hashlib
+import heapq
+import itertools
+import math
 import os
 import re
-import time
-from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
-from urllib.parse import urljoin, urlparse
+from typing import Optional
+from urllib.parse import parse_qsl, urldefrag, urlencode, urljoin, urlparse, urlsplit
 
 import pandas as pd
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
+import requests
+import urllib3
+from playwright.async_api import async_playwright
+from requests.adapters import HTTPAdapter
+
+from agents.common.html_extract import PaginaExtraida, extraer_pagina
 
 # ---------------------------------------------------------------------------
 # Configuration constants
@@ -122,6 +153,30 @@ CATEGORIAS = {
     ],
 }
 
+# HTTP tier: timeouts (connect, read), statuses that usually mean "browsers
+# only" and the minimum visible text for a page to count as rendered
+HTTP_TIMEOUT = (10, 25)
+HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/126.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "es-CL,es;q=0.9",
+}
+ESCALATE_STATUS = {401, 403, 429, 503}
+MIN_VISIBLE_TEXT = 32
+
+_RE_INVISIBLE = re.compile(r"<(script|style|noscript|template)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_RE_NOSCRIPT = re.compile(r"<noscript\b[^>]*>(.*?)</noscript\s*>", re.IGNORECASE | re.DOTALL)
+_RE_TAG = re.compile(r"<[^>]+>")
+
+# Frontier dedup: 0 keeps an exact set of seen URLs; otherwise a Bloom filter
+# sized for this many URLs with BLOOM_ERROR_RATE false positives (a false
+# positive skips a page, it never fetches one twice)
+BLOOM_CAPACITY = int(os.getenv("CONTACTS_BLOOM_CAPACITY", "0"))
+BLOOM_ERROR_RATE = 0.001
+
 # Default file locations
 DEFAULT_OUT_CSV = Path("data/contactos_estado.csv")
 DEFAULT_SEEDS_CSV = Path("agents/contacts/seeds.csv")
@@ -162,20 +217,39 @@ def is_same_site_or_child(seed_netloc: str, target_url: str) -> bool:
 
 
 def normalize_url(base: str, href: str) -> str:
-    """Resolve relative href against base URL."""
+    """Resolve relative href against base URL, without the fragment."""
     try:
-        return urljoin(base, href)
+        return urldefrag(urljoin(base, href.strip()))[0]
     except Exception:
         return ""
 
 
+def canonicalize_url(url: str) -> str:
+    """Dedup key for a URL: lowercase host without default port, no
+    fragment, sorted query, no trailing slash and no scheme (http and https
+    serve the same page).  Non-HTTP URLs are returned unchanged."""
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    if parts.scheme.lower() not in ("http", "https"):
+        return url
+    host = (parts.hostname or "").rstrip(".")
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"//{host}{path}" + (f"?{query}" if query else "")
+
+
 def should_visit_link(href: str) -> bool:
     """Return True if the href should be visited."""
     if not href:
         return False
     if href.startswith(("mailto:", "tel:", "javascript:")):
         return False
-    lower = href.lower()
+    lower = urlparse(href).path.lower()
     # Skip common binary file types
     if any(lower.endswith(ext) for ext in [
         ".pdf",
@@ -206,52 +280,220 @@ def extract_emails(html: str) -> set[str]:
 def extract_title(html: str) -> str:
     """Extract the page title from HTML."""
     try:
-        soup = BeautifulSoup(html, "lxml")
-        if soup.title and soup.title.string:
-            return soup.title.string.strip()
+        return extraer_pagina(html).titulo
     except Exception:
-        pass
-    return ""
+        return ""
 
 
-def crawl_site(play, start_url: str, max_pages: int, max_depth: int, per_domain_delay: float) -> list[dict]:
-    """Crawl a single site and return a list of discovered contact rows."""
-    browser = play.chromium.launch(headless=True)
-    context = browser.new_context(ignore_https_errors=True)
-    page = context.new_page()
+def parse_page(html: str) -> Optional[PaginaExtraida]:
+    """Single lxml pass for both the title and the links (None if unparsable)."""
+    try:
+        return extraer_pagina(html)
+    except Exception:
+        return None
+
+
+def looks_script_rendered(html: str, pagina: Optional[PaginaExtraida]) -> bool:
+    """Return True if an HTTP response probably needs a browser to render:
+    a noscript wall asking for JavaScript, an empty body (almost no visible
+    text and no emails), or no links and no emails at all."""
+    if pagina is None:
+        return True
+    if any("javascript" in n.lower() for n in _RE_NOSCRIPT.findall(html)):
+        return True
+    has_emails = bool(extract_emails(html))
+    visible = _RE_TAG.sub(" ", _RE_INVISIBLE.sub(" ", html))
+    if len(" ".join(visible.split())) < MIN_VISIBLE_TEXT and not has_emails:
+        return True
+    return not pagina.enlaces and not has_emails
+
+
+def create_http_session(pool: int = 4) -> requests.Session:
+    """Session with keep-alive connections shared by all workers; requests
+    negotiates gzip on its own.  Like the browser context (ignore_https_errors),
+    it accepts the invalid certificates common on public sites."""
+    session = requests.Session()
+    session.headers.update(HTTP_HEADERS)
+    session.verify = False
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+@dataclass
+class FetchStats:
+    """Pages of one domain served over plain HTTP and through the browser."""
+
+    http: int = 0
+    browser: int = 0
+
+    @property
+    def escalation_rate(self) -> float:
+        total = self.http + self.browser
+        return self.browser / total if total else 0.0
+
+
+class PageFetcher:
+    """Tiered fetcher for one seed: HTTP first, browser only when needed.
+
+    The browser context is created on the first escalation, so a fully
+    static site never opens one.  Pass session=None to always use the
+    browser.
+    """
+
+    def __init__(self, browser, session: Optional[requests.Session] = None, stats: Optional[dict] = None):
+        self.browser = browser
+        self.session = session
+        self.stats: dict[str, FetchStats] = stats if stats is not None else {}
+        self._context = None
+        self._page = None
+
+    async def fetch(self, url: str) -> Optional[tuple[str, Optional[PaginaExtraida]]]:
+        """Return (html, parsed page), or None for non-HTML responses."""
+        stats = self.stats.setdefault(urlparse(url).netloc, FetchStats())
+        if self.session is not None:
+            try:
+                response = await asyncio.to_thread(self.session.get, url, timeout=HTTP_TIMEOUT)
+            except requests.RequestException:
+                response = None
+            if response is not None and response.status_code not in ESCALATE_STATUS:
+                content_type = response.headers.get("Content-Type", "").lower()
+                if content_type and "html" not in content_type:
+                    return None
+                encoding = response.encoding if "charset" in content_type else "utf-8"
+                html = response.content.decode(encoding or "utf-8", errors="replace")
+                pagina = parse_page(html)
+                if not looks_script_rendered(html, pagina):
+                    stats.http += 1
+                    return html, pagina
+        html = await self._fetch_browser(url)
+        stats.browser += 1
+        return html, parse_page(html)
+
+    async def _fetch_browser(self, url: str) -> str:
+        if self._page is None:
+            self._context = await self.browser.new_context(ignore_https_errors=True)
+            self._page = await self._context.new_page()
+        await self._page.goto(url, wait_until="domcontentloaded", timeout=25000)
+        return await self._page.content()
+
+    async def close(self) -> None:
+        if self._context is not None:
+            await self._context.close()
+            self._context = self._page = None
+
+
+class BloomFilter:
+    """Set-like membership for very large crawls in fixed memory.
+
+    `in` may give false positives (at about `error_rate` once `capacity`
+    items were added) but never false negatives.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class Frontier:
+    """Pages waiting to be crawled, popped by (-score, depth, insertion).
+
+    `push` ignores URLs whose canonical form was already pushed, so a page
+    is queued (and fetched) once regardless of depth or URL spelling.
+    """
+
+    def __init__(self, seen=None):
+        self._heap: list[tuple[int, int, int, str]] = []
+        self._order = itertools.count()
+        self._seen = seen if seen is not None else set()
+
+    def push(self, url: str, depth: int, score: int = 0) -> bool:
+        key = canonicalize_url(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        heapq.heappush(self._heap, (-score, depth, next(self._order), url))
+        return True
+
+    def pop(self) -> tuple[str, int, int]:
+        """Return (url, depth, score) of the best pending page."""
+        neg_score, depth, _, url = heapq.heappop(self._heap)
+        return url, depth, -neg_score
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+async def crawl_site(
+    browser,
+    start_url: str,
+    max_pages: int,
+    max_depth: int,
+    per_domain_delay: float,
+    session: Optional[requests.Session] = None,
+    stats: Optional[dict] = None,
+    bloom_capacity: int = BLOOM_CAPACITY,
+) -> list[dict]:
+    """Crawl a single site (HTTP first when a session is given, otherwise in
+    its own context of the shared browser) and return a list of discovered
+    contact rows."""
+    fetcher = PageFetcher(browser, session, stats)
+    frontier = Frontier(BloomFilter(bloom_capacity) if bloom_capacity > 0 else None)
+    try:
+        return await _crawl_pages(fetcher, frontier, start_url, max_pages, max_depth, per_domain_delay)
+    finally:
+        await fetcher.close()
+
+
+async def _crawl_pages(
+    fetcher: PageFetcher,
+    frontier: Frontier,
+    start_url: str,
+    max_pages: int,
+    max_depth: int,
+    per_domain_delay: float,
+) -> list[dict]:
+    """Best-first crawl of start_url's site: contact-like links first."""
 
     results: list[dict] = []
-    visited: set[tuple[str, int]] = set()
 
     seed_netloc = urlparse(start_url).netloc
-    queue: deque = deque()
-    queue.append((start_url, 0, 0))  # (url, depth, priority)
+    frontier.push(urldefrag(start_url)[0], 0)
     pages_visited = 0
     discovered_emails: set[tuple[str, str]] = set()
 
-    while queue and pages_visited < max_pages:
-        # Select the best link from a small window to prioritize contact pages
-        best_idx, best_score = 0, -1
-        for i in range(min(10, len(queue))):
-            _, _, score = queue[i]
-            if score > best_score:
-                best_idx, best_score = i, score
-        # Rotate queue to bring best to the left
-        for _ in range(best_idx):
-            queue.append(queue.popleft())
-
-        current_url, depth, priority = queue.popleft()
+    while frontier and pages_visited < max_pages:
+        current_url, depth, priority = frontier.pop()
 
         # Visit the page
         try:
-            page.goto(current_url, wait_until="domcontentloaded", timeout=25000)
-            time.sleep(per_domain_delay)
-            html = page.content()
+            fetched = await fetcher.fetch(current_url)
+            await asyncio.sleep(per_domain_delay)
         except Exception:
             continue
+        if fetched is None:
+            continue
 
         pages_visited += 1
-        title = extract_title(html)
+        html, pagina = fetched
+        title = pagina.titulo if pagina else ""
         emails = {e for e in extract_emails(html) if is_allowed_email(e)}
 
         for e in emails:
@@ -268,33 +510,96 @@ def crawl_site(play, start_url: str, max_pages: int, max_depth: int, per_domain_
                     }
                 )
 
-        if depth < max_depth:
+        if depth < max_depth and pagina is not None:
             try:
-                soup = BeautifulSoup(html, "lxml")
-                links: set[tuple[str, int]] = set()
-                for a in soup.find_all("a", href=True):
-                    href = normalize_url(current_url, a["href"])
+                links: dict[str, int] = {}
+                for raw_href, link_text in pagina.enlaces:
+                    href = normalize_url(current_url, raw_href)
                     if not should_visit_link(href):
                         continue
                     if not is_same_site_or_child(seed_netloc, href):
                         continue
-                    prio = score_link_text(
-                        (a.get_text(strip=True) or "") + " " + (a.get("href") or "")
-                    )
-                    links.add((href, prio))
-                # Enqueue links sorted by descending priority
-                for h, pr in sorted(links, key=lambda x: -x[1]):
-                    if (h, depth + 1) not in visited:
-                        visited.add((h, depth + 1))
-                        queue.append((h, depth + 1, pr))
+                    prio = score_link_text((link_text or "") + " " + raw_href)
+                    links[href] = max(prio, links.get(href, 0))
+                # Push the best-scored spelling of each page first
+                for h, pr in sorted(links.items(), key=lambda x: -x[1]):
+                    frontier.push(h, depth + 1, pr)
             except Exception:
                 pass
 
-    context.close()
-    browser.close()
     return results
 
 
+async def crawl_seeds(
+    browser,
+    seeds: list[str],
+    max_pages: int,
+    max_depth: int,
+    per_domain_delay: float,
+    workers: int = 4,
+    session: Optional[requests.Session] = None,
+    stats: Optional[dict] = None,
+) -> list[dict]:
+    """Crawl every seed with the shared browser (and HTTP session, if given),
+    up to `workers` domains at a time, and return the merged rows in the
+    order the sites finish.  Per-domain fetch counts go to `stats`."""
+    by_domain: dict[str, list[str]] = {}
+    for s in seeds:
+        by_domain.setdefault(urlparse(s).netloc, []).append(s)
+    semaphore = asyncio.Semaphore(max(1, workers))
+
+    async def crawl_domain(domain_seeds: list[str]) -> list[dict]:
+        rows: list[dict] = []
+        async with semaphore:
+            for s in domain_seeds:
+                try:
+                    print(f"[INFO] Crawling {s}")
+                    rows.extend(await crawl_site(
+                        browser,
+                        start_url=s,
+                        max_pages=max_pages,
+                        max_depth=max_depth,
+                        per_domain_delay=per_domain_delay,
+                        session=session,
+                        stats=stats,
+                    ))
+                except Exception as e:
+                    print(f"[WARN] Error processing {s}: {e}")
+        return rows
+
+    all_rows: list[dict] = []
+    tasks = [asyncio.create_task(crawl_domain(d)) for d in by_domain.values()]
+    for finished in asyncio.as_completed(tasks):
+        rows = await finished
+        all_rows.extend(rows)
+        if rows:
+            print(f"[INFO] {rows[0]['institucion']}: {len(rows)} contacts")
+    return all_rows
+
+
+async def crawl_all(
+    seeds: list[str],
+    max_pages: int,
+    max_depth: int,
+    per_domain_delay: float,
+    workers: int,
+    http_first: bool = True,
+    stats: Optional[dict] = None,
+) -> list[dict]:
+    """Launch one headless Chromium for the whole run and crawl the seeds."""
+    session = create_http_session(workers) if http_first else None
+    try:
+        async with async_playwright() as play:
+            browser = await play.chromium.launch(headless=True)
+            try:
+                return await crawl_seeds(browser, seeds, max_pages, max_depth, per_domain_delay, workers, session, stats)
+            finally:
+                await browser.close()
+    finally:
+        if session is not None:
+            session.close()
+
+
 def main() -> None:
     """Entry point for running the scraper."""
     # Determine paths and limits from environment or defaults
@@ -303,6 +608,8 @@ def main() -> None:
     max_pages = int(os.getenv("CONTACTS_MAX_PAGES", "80"))
     max_depth = int(os.getenv("CONTACTS_MAX_DEPTH", "2"))
     crawl_delay = float(os.getenv("CONTACTS_DELAY", "0.6"))
+    workers = int(os.getenv("CONTACTS_WORKERS", "4"))
+    http_first = os.getenv("CONTACTS_HTTP_FIRST", "1").lower() not in ("0", "false", "no")
 
     if not seeds_path.exists():
         print(f"[ERROR] Seeds file {seeds_path} not found.")
@@ -319,21 +626,11 @@ def main() -> None:
             if url and url.startswith("http"):
                 seeds.append(url)
 
-    all_rows: list[dict] = []
-    with sync_playwright() as play:
-        for s in seeds:
-            try:
-                print(f"[INFO] Crawling {s}")
-                rows = crawl_site(
-                    play,
-                    start_url=s,
-                    max_pages=max_pages,
-                    max_depth=max_depth,
-                    per_domain_delay=crawl_delay,
-                )
-                all_rows.extend(rows)
-            except Exception as e:
-                print(f"[WARN] Error processing {s}: {e}")
+    stats: dict[str, FetchStats] = {}
+    all_rows = asyncio.run(crawl_all(seeds, max_pages, max_depth, crawl_delay, workers, http_first, stats))
+    for domain, st in sorted(stats.items()):
+        print(f"[INFO] {domain}: {st.http} pages over HTTP, {st.browser} in browser "
+              f"(escalation {st.escalation_rate:.0%})")
 
     df = pd.DataFrame(all_rows)
     if df.empty:
@@ -1,13 +1,228 @@
+"""Lectura de pestañas de Google Sheets con cliente único y snapshot local.
+
+`fetch(tab)` mantiene su interfaz, pero ahora usa una `SheetsDataSource`
+compartida: las credenciales y `gspread.authorize` se hacen una sola vez, y
+las lecturas repetidas salen del snapshot mientras no venza el TTL. Vencido,
+se pregunta la revisión de la planilla (`lastUpdateTime`, una llamada
+liviana) y solo se vuelve a descargar si cambió. `fetch_many(tabs)` trae
+varias pestañas en un solo `values_batch_get`.
+
+Con `SHEETS_SNAPSHOT_DIR` el snapshot también se guarda en disco (pickle),
+así otro proceso lo reutiliza sin llamar a la API. Con
+`DATA_SOURCE_BACKEND=local:<directorio>` las pestañas se leen de
+`<directorio>/<pestaña>.csv` (tests y benchmarks sin conexión).
+"""
+import csv
 import os
+import pickle
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
 import gspread
 import pandas as pd
 from oauth2client.service_account import ServiceAccountCredentials
 
 SHEET_NAME = os.getenv('SHEET_NAME', 'Vendedor360_DataHub')
+SNAPSHOT_TTL_S = float(os.getenv('SHEETS_SNAPSHOT_TTL_S', '300'))
+
+SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+
+
+def _numericise(valor):
+    """Como `gspread.utils.numericise`: "12" → 12, "1.5" → 1.5, el resto igual."""
+    if not isinstance(valor, str) or not valor or '_' in valor:
+        return valor
+    try:
+        return int(valor)
+    except ValueError:
+        try:
+            return float(valor)
+        except ValueError:
+            return valor
+
+
+def _records(filas: List[List]) -> List[Dict]:
+    """Filas de valores (encabezado primero) → registros, con el mismo relleno
+    y conversión numérica que `Worksheet.get_all_records`."""
+    if not filas:
+        return []
+    ancho = max(len(f) for f in filas)
+    filas = [list(f) + [''] * (ancho - len(f)) for f in filas]
+    claves = filas[0]
+    if len(claves) != len(set(claves)):
+        raise ValueError(f"Encabezados repetidos: {claves}")
+    return [dict(zip(claves, map(_numericise, fila))) for fila in filas[1:]]
+
+
+class GspreadBackend:
+    """Un cliente autorizado y la planilla abierta, reutilizados entre lecturas."""
+
+    def __init__(self, sheet_name: Optional[str] = None, credentials_path: Optional[str] = None):
+        self.sheet_name = sheet_name or SHEET_NAME
+        self.credentials_path = credentials_path
+        self._lock = threading.Lock()
+        self._spreadsheet = None
+        self._worksheets: Dict[str, object] = {}
+        self.llamadas = 0
+
+    def spreadsheet(self):
+        with self._lock:
+            if self._spreadsheet is None:
+                ruta = self.credentials_path or os.environ['GOOGLE_SERVICE_ACCOUNT_JSON']
+                creds = ServiceAccountCredentials.from_json_keyfile_name(ruta, SCOPE)
+                self._spreadsheet = gspread.authorize(creds).open(self.sheet_name)
+            return self._spreadsheet
+
+    def revision(self) -> str:
+        self.llamadas += 1
+        return str(self.spreadsheet().get_lastUpdateTime())
+
+    def read(self, tabs: List[str]) -> Dict[str, List[Dict]]:
+        """Registros de cada pestaña. Una pestaña: `get_all_records` de la hoja
+        ya abierta; varias: un solo `values_batch_get`."""
+        planilla = self.spreadsheet()
+        self.llamadas += 1
+        if len(tabs) == 1:
+            tab = tabs[0]
+            if tab not in self._worksheets:
+                self._worksheets[tab] = planilla.worksheet(tab)
+            return {tab: self._worksheets[tab].get_all_records()}
+        respuesta = planilla.values_batch_get([f"'{t}'" for t in tabs])
+        rangos = respuesta.get('valueRanges', [])
+        return {tab: _records(r.get('values', [])) for tab, r in zip(tabs, rangos)}
+
+
+class LocalBackend:
+    """Pestañas como CSV en un directorio (`<tab>.csv`); revisión = mtimes."""
+
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        self.llamadas = 0
+
+    def _ruta(self, tab: str) -> str:
+        return os.path.join(self.directorio, f"{tab}.csv")
+
+    def revision(self) -> str:
+        self.llamadas += 1
+        nombres = sorted(n for n in os.listdir(self.directorio) if n.endswith('.csv'))
+        return ';'.join(f"{n}:{os.stat(os.path.join(self.directorio, n)).st_mtime_ns}" for n in nombres)
+
+    def read(self, tabs: List[str]) -> Dict[str, List[Dict]]:
+        self.llamadas += 1
+        salida = {}
+        for tab in tabs:
+            with open(self._ruta(tab), newline='', encoding='utf-8') as f:
+                salida[tab] = _records(list(csv.reader(f)))
+        return salida
+
+
+class SheetsDataSource:
+    """Pestañas de una planilla servidas desde un snapshot con TTL.
+
+    Args:
+        backend: `GspreadBackend` (por defecto) o `LocalBackend`.
+        ttl_s: segundos en que una pestaña se sirve sin consultar la API.
+        snapshot_dir: si se indica, el snapshot se guarda en disco (pickle).
+    """
+
+    def __init__(self, backend=None, ttl_s: float = SNAPSHOT_TTL_S,
+                 snapshot_dir: Optional[str] = None,
+                 reloj: Callable[[], float] = time.time):
+        self.backend = backend or GspreadBackend()
+        self.ttl_s = ttl_s
+        self.snapshot_dir = snapshot_dir
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        # tab → (DataFrame, revisión, momento en que se validó)
+        self._snapshot: Dict[str, tuple] = {}
+        if snapshot_dir:
+            os.makedirs(snapshot_dir, exist_ok=True)
+
+    def _ruta_snapshot(self, tab: str) -> str:
+        return os.path.join(self.snapshot_dir, f"{tab}.pkl")
+
+    def _cargar_disco(self, tab: str):
+        try:
+            with open(self._ruta_snapshot(tab), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _guardar(self, tab: str, entrada: tuple) -> None:
+        self._snapshot[tab] = entrada
+        if self.snapshot_dir:
+            tmp = f"{self._ruta_snapshot(tab)}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                pickle.dump(entrada, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._ruta_snapshot(tab))
+
+    def fetch_many(self, tabs: Iterable[str]) -> Dict[str, pd.DataFrame]:
+        """DataFrame de cada pestaña. Lo vigente sale del snapshot; lo vencido
+        se revalida con una consulta de revisión y lo que cambió se descarga
+        en un solo lote."""
+        tabs = list(dict.fromkeys(tabs))
+        with self._lock:
+            ahora = self._reloj()
+            vencidas = []
+            for tab in tabs:
+                entrada = self._snapshot.get(tab)
+                if entrada is None and self.snapshot_dir:
+                    entrada = self._cargar_disco(tab)
+                    if entrada is not None:
+                        self._snapshot[tab] = entrada
+                if entrada is None or ahora - entrada[2] >= self.ttl_s:
+                    vencidas.append(tab)
+            if vencidas:
+                revision = self.backend.revision()
+                descargar = []
+                for tab in vencidas:
+                    entrada = self._snapshot.get(tab)
+                    if entrada is not None and entrada[1] == revision:
+                        self._guardar(tab, (entrada[0], revision, ahora))
+                    else:
+                        descargar.append(tab)
+                if descargar:
+                    for tab, registros in self.backend.read(descargar).items():
+                        self._guardar(tab, (pd.DataFrame(registros), revision, ahora))
+            return {tab: self._snapshot[tab][0].copy() for tab in tabs}
+
+    def fetch(self, tab: str) -> pd.DataFrame:
+        return self.fetch_many([tab])[tab]
+
+    def invalidate(self, tab: Optional[str] = None) -> None:
+        """Olvida el snapshot (de una pestaña o de todas) para forzar la descarga."""
+        with self._lock:
+            for t in ([tab] if tab else list(self._snapshot)):
+                self._snapshot.pop(t, None)
+                if self.snapshot_dir and os.path.exists(self._ruta_snapshot(t)):
+                    os.remove(self._ruta_snapshot(t))
+
+
+_fuentes: Dict[tuple, SheetsDataSource] = {}
+_fuentes_lock = threading.Lock()
+
+
+def default_source() -> SheetsDataSource:
+    """Fuente compartida del proceso para la planilla y credenciales del entorno."""
+    backend = os.getenv('DATA_SOURCE_BACKEND', '')
+    sheet_name = os.getenv('SHEET_NAME', SHEET_NAME)
+    clave = (backend, sheet_name, os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON'))
+    with _fuentes_lock:
+        fuente = _fuentes.get(clave)
+        if fuente is None:
+            if backend.startswith('local:'):
+                base = LocalBackend(backend.split(':', 1)[1])
+            else:
+                base = GspreadBackend(sheet_name)
+            fuente = SheetsDataSource(base, snapshot_dir=os.getenv('SHEETS_SNAPSHOT_DIR') or None)
+            _fuentes[clave] = fuente
+        return fuente
+
 
 def fetch(tab):
-    scope = ['https://spreadsheets.google.com/feeds','https://www.googleapis.com/auth/drive']
-    creds = ServiceAccountCredentials.from_json_keyfile_name(os.environ['GOOGLE_SERVICE_ACCOUNT_JSON'], scope)
-    gs = gspread.authorize(creds)
-    ws = gs.open(SHEET_NAME).worksheet(tab)
-    return pd.DataFrame(ws.get_all_records())
+    return default_source().fetch(tab)
+
+
+def fetch_many(tabs):
+    return default_source().fetch_many(tabs)
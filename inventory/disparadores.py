@@ -0,0 +1,251 @@
+"""
+Disparadores de stock (Ofertas Flash del blueprint: stock bajo el 10%).
+
+`MotorDisparadores.procesar(cambios)` recibe el `CambiosInventario` que
+devuelve `actualizar_inventario()` y solo mira los productos cuyo stock
+cambió. Cada producto tiene un nivel (normal, bajo, agotado) guardado en
+SQLite junto con su último stock y su stock de referencia (el de la última
+reposición); se emite un evento únicamente cuando el nivel cambia, así que
+el costo depende de la cantidad de cambios y no del tamaño del catálogo, y
+reiniciar el proceso no repite eventos.
+
+La referencia se fija al stock nuevo cada vez que el stock sube (una
+reposición), así que un pico histórico no deja al producto bajo el umbral
+para siempre.
+
+Los eventos se agregan a `queues/eventos_stock.jsonl`, que consumen los
+agentes de Meta y LinkedIn (`--eventos`).
+
+Umbral de cada producto: el de `umbrales` (unidades) si lo tiene; si no,
+`porcentaje` (10%) de su stock de referencia.
+
+Con `--intervalo` el CLI queda vigilando la fuente: tras la carga inicial,
+cada pasada aplica la fuente sobre el inventario vivo (`aplicar_registros`)
+y el motor solo recibe lo que cambió.
+"""
+
+import csv
+import math
+import os
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from agents.common.queue import JsonlQueue
+
+from .inventory import CambiosInventario
+
+COLA_EVENTOS_STOCK = os.getenv("COLA_EVENTOS_STOCK", "queues/eventos_stock.jsonl")
+ESTADO_DISPARADORES = os.getenv("ESTADO_DISPARADORES", "queues/disparadores_stock.sqlite")
+PORCENTAJE_STOCK_BAJO = float(os.getenv("PORCENTAJE_STOCK_BAJO", "0.10"))
+
+NIVEL_NORMAL = 0
+NIVEL_BAJO = 1
+NIVEL_AGOTADO = 2
+
+# Tipo de evento según el nivel al que entra el producto
+EVENTO_REPUESTO = "repuesto"
+EVENTO_STOCK_BAJO = "stock_bajo"
+EVENTO_AGOTADO = "agotado"
+_TIPOS = {NIVEL_NORMAL: EVENTO_REPUESTO, NIVEL_BAJO: EVENTO_STOCK_BAJO, NIVEL_AGOTADO: EVENTO_AGOTADO}
+
+_LOTE_IN = 500
+
+
+@dataclass
+class EventoStock:
+    tipo: str
+    id_convenio: str
+    stock_anterior: Optional[int]
+    stock: int
+    umbral: int
+    fecha: float
+    nombre: str = ""
+    precio: Optional[float] = None
+    url_imagen: str = ""
+
+
+def cargar_umbrales(ruta: str) -> Dict[str, int]:
+    """CSV con `id_convenio` (o `ID_Convenio_Marco`) y `umbral`."""
+    umbrales: Dict[str, int] = {}
+    with open(ruta, newline="", encoding="utf-8") as f:
+        for fila in csv.DictReader(f):
+            id_convenio = (fila.get("id_convenio") or fila.get("ID_Convenio_Marco") or "").strip()
+            valor = (fila.get("umbral") or "").strip()
+            if id_convenio and valor:
+                umbrales[id_convenio] = int(float(valor))
+    return umbrales
+
+
+class MotorDisparadores:
+    """Detecta cruces de umbral de stock a partir de los cambios del inventario."""
+
+    def __init__(
+        self,
+        ruta_estado: str = ESTADO_DISPARADORES,
+        umbrales: Optional[Dict[str, int]] = None,
+        porcentaje: float = PORCENTAJE_STOCK_BAJO,
+        reloj: Callable[[], float] = time.time,
+    ):
+        directorio = os.path.dirname(ruta_estado)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self.umbrales = dict(umbrales or {})
+        self.porcentaje = porcentaje
+        self._reloj = reloj
+        self._con = sqlite3.connect(ruta_estado)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS estado ("
+            " id_convenio TEXT PRIMARY KEY,"
+            " referencia INTEGER NOT NULL,"
+            " nivel INTEGER NOT NULL,"
+            " stock INTEGER)"
+        )
+        columnas = {fila[1] for fila in self._con.execute("PRAGMA table_info(estado)")}
+        if "stock" not in columnas:
+            self._con.execute("ALTER TABLE estado ADD COLUMN stock INTEGER")
+        self._con.commit()
+
+    def umbral(self, id_convenio: str, referencia: int) -> int:
+        if id_convenio in self.umbrales:
+            return self.umbrales[id_convenio]
+        return math.ceil(referencia * self.porcentaje)
+
+    def nivel(self, stock: int, umbral: int) -> int:
+        if stock <= 0:
+            return NIVEL_AGOTADO
+        return NIVEL_BAJO if stock < umbral else NIVEL_NORMAL
+
+    def _estado(self, ids: List[str]) -> Dict[str, Tuple[int, int, Optional[int]]]:
+        """ID → (referencia, nivel, último stock)."""
+        estado: Dict[str, Tuple[int, int, Optional[int]]] = {}
+        for i in range(0, len(ids), _LOTE_IN):
+            lote = ids[i:i + _LOTE_IN]
+            sql = f"SELECT id_convenio, referencia, nivel, stock FROM estado WHERE id_convenio IN ({','.join('?' * len(lote))})"
+            for id_convenio, referencia, nivel, stock in self._con.execute(sql, lote):
+                estado[id_convenio] = (referencia, nivel, stock)
+        return estado
+
+    def referencia(self, id_convenio: str, previo: Optional[Tuple[int, int, Optional[int]]],
+                   antes: Optional[int], despues: int) -> int:
+        """Stock de referencia: el de la última reposición. Pasa a ser el
+        nuevo stock solo si sube hasta el umbral de la referencia actual (una
+        reposición real); una corrección menor o una baja la mantienen."""
+        if previo is None:
+            return max(v for v in (antes, despues) if v is not None)
+        anterior = antes if antes is not None else previo[2]
+        if anterior is not None and despues > anterior and despues >= self.umbral(id_convenio, previo[0]):
+            return despues
+        return previo[0]
+
+    def procesar(self, cambios: CambiosInventario, inventario=None) -> List[EventoStock]:
+        """Eventos de los productos de `cambios.stock` que cambiaron de nivel.
+
+        Con `inventario` (`Inventory` o `InventarioSQLite`) los eventos llevan
+        nombre, precio e imagen para armar la publicación.
+        """
+        if not cambios.stock:
+            return []
+        ids = list(cambios.stock)
+        estado = self._estado(ids)
+        ahora = self._reloj()
+        eventos: List[EventoStock] = []
+        guardar: List[Tuple[str, int, int, int]] = []
+        borrar: List[Tuple[str]] = []
+        for id_convenio, (antes, despues) in cambios.stock.items():
+            previo = estado.get(id_convenio)
+            if despues is None:
+                if previo is not None:
+                    borrar.append((id_convenio,))
+                continue
+            referencia = self.referencia(id_convenio, previo, antes, despues)
+            umbral = self.umbral(id_convenio, referencia)
+            nivel = self.nivel(despues, umbral)
+            nivel_previo = previo[1] if previo else NIVEL_NORMAL
+            if nivel != nivel_previo:
+                evento = EventoStock(_TIPOS[nivel], id_convenio, antes, despues, umbral, ahora)
+                producto = inventario.obtener(id_convenio) if inventario is not None else None
+                if producto is not None:
+                    evento.nombre, evento.precio, evento.url_imagen = producto.nombre, producto.precio, producto.url_imagen
+                eventos.append(evento)
+            if previo != (referencia, nivel, despues):
+                guardar.append((id_convenio, referencia, nivel, despues))
+        with self._con:
+            self._con.executemany(
+                "INSERT OR REPLACE INTO estado (id_convenio, referencia, nivel, stock) VALUES (?, ?, ?, ?)", guardar
+            )
+            self._con.executemany("DELETE FROM estado WHERE id_convenio = ?", borrar)
+        return eventos
+
+    def cerrar(self) -> None:
+        self._con.close()
+
+
+def publicar_eventos(eventos: List[EventoStock], cola: str = COLA_EVENTOS_STOCK) -> int:
+    """Agrega los eventos a la cola JSONL que leen los agentes."""
+    return JsonlQueue(cola).append([asdict(e) for e in eventos])
+
+
+def actualizar_y_disparar(
+    motor: MotorDisparadores,
+    fuente: Optional[str] = None,
+    cola: str = COLA_EVENTOS_STOCK,
+) -> List[EventoStock]:
+    """`actualizar_inventario(fuente)` y publicación de los cruces de umbral."""
+    from . import inventory
+
+    cambios = inventory.actualizar_inventario(fuente)
+    eventos = motor.procesar(cambios, inventory.inventario())
+    publicar_eventos(eventos, cola)
+    return eventos
+
+
+def _cli():
+    import argparse
+    parser = argparse.ArgumentParser(description="Aplica cambios de inventario y publica eventos de stock bajo.")
+    parser.add_argument("--fuente", default=None, help="CSV o sheets:<pestaña> (por defecto INVENTARIO_FUENTE)")
+    parser.add_argument("--sqlite", default=None, help="Inventario SQLite (por defecto INVENTARIO_SQLITE)")
+    parser.add_argument("--cola", default=COLA_EVENTOS_STOCK, help="Archivo JSONL de eventos")
+    parser.add_argument("--estado", default=ESTADO_DISPARADORES, help="SQLite con el nivel de cada producto")
+    parser.add_argument("--umbrales", default=None, help="CSV id_convenio,umbral con umbrales por producto")
+    parser.add_argument("--porcentaje", type=float, default=PORCENTAJE_STOCK_BAJO, help="Umbral por defecto (fracción del stock de referencia)")
+    parser.add_argument("--intervalo", type=float, default=0, help="Segundos entre pasadas vigilando la fuente (0 = una sola pasada)")
+    args = parser.parse_args()
+
+    from . import inventory
+
+    fuente = args.fuente or inventory.INVENTARIO_FUENTE
+    if not fuente:
+        parser.error("Indique --fuente o INVENTARIO_FUENTE")
+    motor = MotorDisparadores(args.estado, cargar_umbrales(args.umbrales) if args.umbrales else None, args.porcentaje)
+
+    def informar(eventos: List[EventoStock]) -> None:
+        for evento in eventos:
+            print(f"{evento.tipo}: {evento.id_convenio} {evento.nombre} ({evento.stock_anterior} → {evento.stock}, umbral {evento.umbral})")
+        print(f"{len(eventos)} eventos en {args.cola}")
+
+    try:
+        # Carga inicial. En memoria trae todo el inventario como altas (el
+        # estado guardado del motor evita repetir eventos ya publicados); con
+        # SQLite solo llega lo que cambió desde la última carga.
+        cambios = inventory.cargar_inventario(fuente, sqlite=args.sqlite)
+        eventos = motor.procesar(cambios, inventory.inventario())
+        publicar_eventos(eventos, args.cola)
+        informar(eventos)
+        # Las pasadas siguientes aplican la fuente sobre el inventario ya
+        # cargado: el motor solo recibe los productos que cambiaron
+        while args.intervalo > 0:
+            time.sleep(args.intervalo)
+            eventos = actualizar_y_disparar(motor, fuente, args.cola)
+            if eventos:
+                informar(eventos)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        motor.cerrar()
+
+
+if __name__ == "__main__":
+    _cli()
@@ -1,21 +1,49 @@
 """
 Módulo de inventario para Vendedor360.
 
-Este módulo proporciona una interfaz para un inventario inteligente y autónomo. Debe ser completado para conectarse con la fuente real de datos (por ejemplo, una hoja de cálculo de Google Sheets, una base de datos o un servicio de inventario externo).
+El inventario se consulta en cada cotización y en cada decisión de
+publicación, así que vive en memoria en un `Inventory` indexado:
 
-Funciones sugeridas:
+- ID → registro en un dict (búsqueda O(1)).
+- Índice de tokens del nombre (en minúsculas, calculados una sola vez) para
+  buscar por nombre sin recorrer todo el catálogo.
+- Registros `Producto` con `__slots__`.
+
+`actualizar_inventario()` aplica cambios (altas, modificaciones, bajas y
+stock) desde un CSV o una pestaña de Google Sheets tocando solo los
+productos que cambian, y devuelve un `CambiosInventario` con lo aplicado.
+
+Para catálogos grandes, `INVENTARIO_SQLITE=<ruta>` guarda el inventario en
+SQLite (`inventory.sqlite_backend`): el arranque no carga nada y varios
+procesos comparten el mismo archivo.
+
+Funciones del módulo (usan el inventario compartido del proceso):
 - `cargar_inventario()`: Carga los datos del inventario en memoria.
 - `actualizar_inventario()`: Sincroniza cambios con la fuente externa.
 - `buscar_producto_por_id(id_convenio: str)`: Devuelve un registro de producto según su ID.
 - `buscar_productos_por_nombre(nombre: str)`: Devuelve una lista de productos cuyo nombre coincida.
-
-Las funciones aquí son meramente ilustrativas y deben adaptarse a las necesidades reales.
 """
 
-from dataclasses import dataclass
-from typing import List, Optional
+import csv
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
 
-@dataclass
+# Fuente del inventario: ruta a un CSV, "sheets:<pestaña>" o vacío para el ejemplo
+INVENTARIO_FUENTE = os.getenv("INVENTARIO_FUENTE", "")
+# Ruta de un SQLite para guardar el inventario (ver `sqlite_backend`); vacío = en memoria
+INVENTARIO_SQLITE = os.getenv("INVENTARIO_SQLITE", "")
+
+# Valores de la columna opcional `Accion` en un CSV/pestaña de cambios
+ACCION_UPSERT = "upsert"
+ACCION_ELIMINAR = "eliminar"
+ACCION_STOCK = "stock"
+
+_RE_TOKEN = re.compile(r"\w+")
+
+
+@dataclass(slots=True)
 class Producto:
     id_convenio: str
     nombre: str
@@ -23,28 +51,328 @@ class Producto:
     url_imagen: str
     stock: Optional[int] = None
 
-# Inventario interno (ejemplo básico)
-_catalogo: List[Producto] = []
 
-def cargar_inventario() -> None:
-    """Carga el inventario desde la fuente de datos en la variable interna.
+@dataclass
+class CambiosInventario:
+    """Resultado de aplicar cambios al inventario."""
+    insertados: List[str] = field(default_factory=list)
+    actualizados: List[str] = field(default_factory=list)
+    eliminados: List[str] = field(default_factory=list)
+    # ID → (stock anterior, stock nuevo); incluye altas (anterior None) y bajas (nuevo None)
+    stock: Dict[str, Tuple[Optional[int], Optional[int]]] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return len(self.insertados) + len(self.actualizados) + len(self.eliminados)
+
+    def __bool__(self) -> bool:
+        return bool(self.total or self.stock)
+
+
+def _tokens(texto: str) -> List[str]:
+    return _RE_TOKEN.findall(texto.lower())
+
+
+class Inventory:
+    """Inventario en memoria con índices por ID y por tokens del nombre."""
+
+    def __init__(self, productos: Iterable[Producto] = ()):
+        self._por_id: Dict[str, Producto] = {}
+        self._nombres: Dict[str, str] = {}  # ID → nombre en minúsculas
+        self._orden: Dict[str, int] = {}  # ID → posición de alta (orden de resultados)
+        self._tokens: Dict[str, Set[str]] = {}  # token → IDs
+        self._secuencia = 0
+        self._versiones: Dict[str, str] = {}  # fuente → versión aplicada
+        for producto in productos:
+            self.upsert(producto)
+
+    def __len__(self) -> int:
+        return len(self._por_id)
+
+    def __contains__(self, id_convenio: str) -> bool:
+        return id_convenio in self._por_id
+
+    def __iter__(self) -> Iterator[Producto]:
+        return iter(self._por_id.values())
+
+    def obtener(self, id_convenio: str) -> Optional[Producto]:
+        return self._por_id.get(id_convenio)
+
+    def buscar_por_nombre(self, nombre: str) -> List[Producto]:
+        """Productos cuyo nombre contiene `nombre` (sin distinguir mayúsculas).
+
+        Las palabras de la consulta con algo antes y después son palabras
+        completas del nombre y salen directo del índice de tokens; si no hay
+        ninguna, la más larga se busca dentro del vocabulario (más chico que
+        el catálogo). A los candidatos se les verifica la subcadena completa.
+        """
+        consulta = nombre.lower()
+        if not consulta.strip():
+            return list(self._por_id.values())
+        palabras = list(_RE_TOKEN.finditer(consulta))
+        completas = {m.group() for m in palabras if m.start() > 0 and m.end() < len(consulta)}
+        if completas:
+            candidatos: Iterable[str] = set.intersection(*(self._tokens.get(t, set()) for t in completas))
+        elif palabras:
+            parte = max((m.group() for m in palabras), key=len)
+            candidatos = set().union(*(ids for t, ids in self._tokens.items() if parte in t))
+        else:
+            candidatos = self._por_id.keys()
+        encontrados = [i for i in candidatos if consulta in self._nombres[i]]
+        encontrados.sort(key=self._orden.__getitem__)
+        return [self._por_id[i] for i in encontrados]
+
+    def _indexar(self, id_convenio: str, nombre: str) -> None:
+        self._nombres[id_convenio] = nombre.lower()
+        for token in set(_tokens(nombre)):
+            self._tokens.setdefault(token, set()).add(id_convenio)
+
+    def _desindexar(self, id_convenio: str) -> None:
+        for token in set(_tokens(self._nombres.pop(id_convenio, ""))):
+            ids = self._tokens.get(token)
+            if ids is not None:
+                ids.discard(id_convenio)
+                if not ids:
+                    del self._tokens[token]
+
+    def upsert(self, producto: Producto, cambios: Optional[CambiosInventario] = None) -> None:
+        """Agrega o reemplaza un producto; solo reindexa si cambió el nombre."""
+        actual = self._por_id.get(producto.id_convenio)
+        if actual is None:
+            self._secuencia += 1
+            self._orden[producto.id_convenio] = self._secuencia
+            self._indexar(producto.id_convenio, producto.nombre)
+            if cambios is not None:
+                cambios.insertados.append(producto.id_convenio)
+                cambios.stock[producto.id_convenio] = (None, producto.stock)
+        else:
+            if actual == producto:
+                return
+            if actual.nombre != producto.nombre:
+                self._desindexar(producto.id_convenio)
+                self._indexar(producto.id_convenio, producto.nombre)
+            if cambios is not None:
+                cambios.actualizados.append(producto.id_convenio)
+                if actual.stock != producto.stock:
+                    cambios.stock[producto.id_convenio] = (actual.stock, producto.stock)
+        self._por_id[producto.id_convenio] = producto
+
+    def eliminar(self, id_convenio: str, cambios: Optional[CambiosInventario] = None) -> bool:
+        actual = self._por_id.pop(id_convenio, None)
+        if actual is None:
+            return False
+        self._desindexar(id_convenio)
+        del self._orden[id_convenio]
+        if cambios is not None:
+            cambios.eliminados.append(id_convenio)
+            cambios.stock[id_convenio] = (actual.stock, None)
+        return True
+
+    def ajustar_stock(self, id_convenio: str, stock: Optional[int], cambios: Optional[CambiosInventario] = None) -> bool:
+        """Cambia solo el stock (sin tocar los índices); False si el ID no existe."""
+        actual = self._por_id.get(id_convenio)
+        if actual is None:
+            return False
+        if actual.stock != stock:
+            if cambios is not None:
+                anterior = cambios.stock.get(id_convenio, (actual.stock, None))[0]
+                cambios.stock[id_convenio] = (anterior, stock)
+            actual.stock = stock
+        return True
+
+    def aplicar(
+        self,
+        upserts: Iterable[Producto] = (),
+        eliminados: Iterable[str] = (),
+        stock: Optional[Mapping[str, Optional[int]]] = None,
+    ) -> CambiosInventario:
+        """Aplica un lote de cambios y devuelve lo que efectivamente cambió."""
+        cambios = CambiosInventario()
+        for producto in upserts:
+            self.upsert(producto, cambios)
+        for id_convenio in eliminados:
+            self.eliminar(id_convenio, cambios)
+        for id_convenio, valor in (stock or {}).items():
+            self.ajustar_stock(id_convenio, valor, cambios)
+        return cambios
+
+    def sincronizar(self, productos: Iterable[Producto]) -> CambiosInventario:
+        """Deja el inventario igual a `productos` (foto completa de la fuente):
+        aplica altas, modificaciones y bajas sin reconstruir los índices."""
+        cambios = CambiosInventario()
+        vistos = set()
+        for producto in productos:
+            vistos.add(producto.id_convenio)
+            self.upsert(producto, cambios)
+        for id_convenio in [i for i in self._por_id if i not in vistos]:
+            self.eliminar(id_convenio, cambios)
+        return cambios
+
+    def aplicar_registros(self, registros: Iterable[Mapping[str, object]]) -> CambiosInventario:
+        """Aplica filas de un CSV o de Sheets (ver `aplicar_registros`)."""
+        return aplicar_registros(self, registros)
+
+    def version(self, fuente: str) -> Optional[str]:
+        """Última versión de `fuente` aplicada."""
+        return self._versiones.get(fuente)
+
+    def guardar_version(self, fuente: str, version: str) -> None:
+        self._versiones[fuente] = version
+
+    def bajo_stock(self, umbral: int) -> List[Producto]:
+        """Productos con stock conocido menor o igual a `umbral`."""
+        return [p for p in self._por_id.values() if p.stock is not None and p.stock <= umbral]
 
-    Modifique esta función para conectar con su base de datos o Google Sheets.
+
+def aplicar_registros(destino, registros: Iterable[Mapping[str, object]]) -> CambiosInventario:
+    """Aplica filas de un CSV o de Sheets a un inventario (`Inventory` o
+    `InventarioSQLite`).
+
+    Si las filas traen columna `Accion` son cambios (`upsert`, `eliminar`
+    o `stock`); si no, son la foto completa del inventario y lo que falte
+    se da de baja.
     """
-    global _catalogo
-    # TODO: leer de la fuente real. Aquí se carga un ejemplo estático.
-    _catalogo = [
+    registros = list(registros)
+    if not registros or "Accion" not in registros[0]:
+        return destino.sincronizar(p for p in map(producto_desde_registro, registros) if p is not None)
+    upserts: List[Producto] = []
+    eliminados: List[str] = []
+    stock: Dict[str, Optional[int]] = {}
+    for fila in registros:
+        accion = str(fila.get("Accion") or ACCION_UPSERT).strip().lower()
+        id_convenio = _valor(fila, "id_convenio", "ID_Convenio_Marco")
+        if not id_convenio:
+            continue
+        if accion == ACCION_ELIMINAR:
+            eliminados.append(id_convenio)
+        elif accion == ACCION_STOCK:
+            stock[id_convenio] = _stock(_valor(fila, "stock", "Stock"))
+        else:
+            producto = producto_desde_registro(fila)
+            if producto is not None:
+                upserts.append(producto)
+    return destino.aplicar(upserts, eliminados, stock)
+
+
+def _valor(fila: Mapping[str, object], *columnas: str) -> str:
+    for columna in columnas:
+        valor = fila.get(columna)
+        if valor not in (None, ""):
+            return str(valor).strip()
+    return ""
+
+
+def _stock(valor: str) -> Optional[int]:
+    if not valor:
+        return None
+    try:
+        return int(float(valor))
+    except ValueError:
+        return None
+
+
+def _precio(valor: str) -> float:
+    if not valor:
+        return 0.0
+    from agents.common.money import parse_minor
+
+    minor = parse_minor(valor)
+    return minor / 100 if minor is not None else 0.0
+
+
+def producto_desde_registro(fila: Mapping[str, object]) -> Optional[Producto]:
+    """Fila con columnas del inventario (`id_convenio`, `nombre`, `precio`,
+    `url_imagen`, `stock`) o del catálogo (`ID_Convenio_Marco`,
+    `Nombre_Producto`, `Precio_Unitario`, `URL_Imagen`, `Stock`)."""
+    id_convenio = _valor(fila, "id_convenio", "ID_Convenio_Marco")
+    if not id_convenio:
+        return None
+    return Producto(
+        id_convenio=id_convenio,
+        nombre=_valor(fila, "nombre", "Nombre_Producto"),
+        precio=_precio(_valor(fila, "precio", "Precio_Unitario", "Precio")),
+        url_imagen=_valor(fila, "url_imagen", "URL_Imagen"),
+        stock=_stock(_valor(fila, "stock", "Stock")),
+    )
+
+
+def leer_registros(fuente: str) -> List[Dict[str, object]]:
+    """Filas de un CSV o de `sheets:<pestaña>` (vía `data_source.fetch`)."""
+    if fuente.startswith("sheets:"):
+        import data_source
+
+        return data_source.fetch(fuente.split(":", 1)[1] or "Inventario").to_dict("records")
+    with open(fuente, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _version_csv(ruta: str) -> str:
+    st = os.stat(ruta)
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+# Inventario compartido del proceso
+_inventario = Inventory()
+
+
+def inventario():
+    """Inventario compartido por las funciones del módulo (`Inventory` o
+    `InventarioSQLite`)."""
+    return _inventario
+
+
+def cargar_inventario(fuente: Optional[str] = None, sqlite: Optional[str] = None) -> CambiosInventario:
+    """Carga el inventario desde `fuente` (o `INVENTARIO_FUENTE`) en la
+    variable interna. Sin fuente se carga un ejemplo estático.
+
+    Con `sqlite` (o `INVENTARIO_SQLITE`) el inventario se abre desde ese
+    archivo, sin cargarlo en memoria; la fuente, si hay, solo se aplica si
+    cambió desde la última vez que algún proceso la aplicó.
+
+    Returns:
+        Los cambios aplicados al cargar (en memoria, todo el inventario).
+    """
+    global _inventario
+    fuente = fuente or INVENTARIO_FUENTE
+    ruta_sqlite = sqlite or INVENTARIO_SQLITE
+    if ruta_sqlite:
+        from .sqlite_backend import InventarioSQLite
+
+        _inventario = InventarioSQLite(ruta_sqlite)
+        return actualizar_inventario(fuente) if fuente else CambiosInventario()
+    if fuente:
+        _inventario = Inventory()
+        return actualizar_inventario(fuente)
+    _inventario = Inventory([
         Producto(id_convenio="CM-0001", nombre="Ejemplo Producto 1", precio=1000.0, url_imagen="https://example.com/img1.jpg", stock=10),
         Producto(id_convenio="CM-0002", nombre="Ejemplo Producto 2", precio=2500.0, url_imagen="https://example.com/img2.jpg", stock=5),
-    ]
+    ])
+    return CambiosInventario()
+
+
+def actualizar_inventario(fuente: Optional[str] = None) -> CambiosInventario:
+    """Actualiza el inventario con los cambios de `fuente` (o `INVENTARIO_FUENTE`).
 
-def actualizar_inventario() -> None:
-    """Actualiza el inventario sincronizando cambios en la fuente de datos.
+    La fuente puede ser la foto completa del inventario o un archivo de
+    cambios con columna `Accion`. Un CSV que no cambió (mismo mtime y tamaño)
+    no se vuelve a leer.
 
-    Implemente la lógica necesaria para sincronizar cambios (por ejemplo, leer un fichero CSV actualizado o consultar una API).
+    Returns:
+        Los cambios aplicados (vacío si no hubo).
     """
-    # TODO: Implementar sincronización con la fuente de datos externa.
-    pass
+    fuente = fuente or INVENTARIO_FUENTE
+    if not fuente:
+        return CambiosInventario()
+    version = None
+    if not fuente.startswith("sheets:"):
+        version = _version_csv(fuente)
+        if _inventario.version(fuente) == version:
+            return CambiosInventario()
+    cambios = _inventario.aplicar_registros(leer_registros(fuente))
+    if version is not None:
+        _inventario.guardar_version(fuente, version)
+    return cambios
+
 
 def buscar_producto_por_id(id_convenio: str) -> Optional[Producto]:
     """Busca un producto en el inventario por su ID de convenio.
@@ -55,10 +383,8 @@ def buscar_producto_por_id(id_convenio: str) -> Optional[Producto]:
     Returns:
         Una instancia de `Producto` si se encuentra, de lo contrario `None`.
     """
-    for producto in _catalogo:
-        if producto.id_convenio == id_convenio:
-            return producto
-    return None
+    return _inventario.obtener(id_convenio)
+
 
 def buscar_productos_por_nombre(nombre: str) -> List[Producto]:
     """Busca productos cuyo nombre contenga la cadena proporcionada (no sensible a mayúsculas/minúsculas).
@@ -69,6 +395,4 @@ def buscar_productos_por_nombre(nombre: str) -> List[Producto]:
     Returns:
         Lista de productos coincidentes.
     """
-    nombre_lower = nombre.lower()
-    return [prod for prod in _catalogo if nombre_lower in prod.nombre.lower()]
-
+    return _inventario.buscar_por_nombre(nombre)
@@ -0,0 +1,258 @@
+"""
+Inventario en SQLite (opcional) para catálogos grandes.
+
+Con `INVENTARIO_SQLITE=<ruta>` el inventario vive en un archivo SQLite en vez
+de cargarse en memoria en cada arranque:
+
+- Modo WAL: varios procesos de agentes leen a la vez mientras uno escribe.
+- Tabla virtual FTS5 (tokenizador `trigram`) sobre los nombres, sincronizada
+  con triggers (o reconstruida de una vez en cargas masivas), para buscar
+  subcadenas sin recorrer la tabla.
+- Índice sobre `stock` para las consultas de stock bajo.
+- Sentencias SQL fijas, que el módulo `sqlite3` prepara una vez y reutiliza
+  desde su caché, y altas/cambios en lote dentro de una transacción.
+
+`InventarioSQLite` tiene la misma interfaz que `Inventory`.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .inventory import CambiosInventario, Producto, aplicar_registros
+
+_ESQUEMA = (
+    "CREATE TABLE IF NOT EXISTS productos ("
+    " id_convenio TEXT PRIMARY KEY,"
+    " nombre TEXT NOT NULL,"
+    " precio REAL NOT NULL,"
+    " url_imagen TEXT NOT NULL,"
+    " stock INTEGER)",
+    "CREATE INDEX IF NOT EXISTS productos_stock ON productos(stock)",
+    "CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)",
+)
+_ESQUEMA_FTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5("
+    " nombre, content='productos', content_rowid='rowid', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS productos_ai AFTER INSERT ON productos BEGIN"
+    " INSERT INTO productos_fts(rowid, nombre) VALUES (new.rowid, new.nombre); END",
+    "CREATE TRIGGER IF NOT EXISTS productos_ad AFTER DELETE ON productos BEGIN"
+    " INSERT INTO productos_fts(productos_fts, rowid, nombre) VALUES ('delete', old.rowid, old.nombre); END",
+    "CREATE TRIGGER IF NOT EXISTS productos_au AFTER UPDATE OF nombre ON productos BEGIN"
+    " INSERT INTO productos_fts(productos_fts, rowid, nombre) VALUES ('delete', old.rowid, old.nombre);"
+    " INSERT INTO productos_fts(rowid, nombre) VALUES (new.rowid, new.nombre); END",
+)
+
+_COLUMNAS = "id_convenio, nombre, precio, url_imagen, stock"
+_SQL_POR_ID = f"SELECT {_COLUMNAS} FROM productos WHERE id_convenio = ?"
+_SQL_TODOS = f"SELECT {_COLUMNAS} FROM productos ORDER BY rowid"
+_SQL_FTS = (
+    f"SELECT {_COLUMNAS} FROM productos WHERE rowid IN"
+    " (SELECT rowid FROM productos_fts WHERE productos_fts MATCH ?) ORDER BY rowid"
+)
+_SQL_BAJO_STOCK = f"SELECT {_COLUMNAS} FROM productos WHERE stock <= ? ORDER BY rowid"
+_SQL_UPSERT = (
+    f"INSERT INTO productos ({_COLUMNAS}) VALUES (?, ?, ?, ?, ?)"
+    " ON CONFLICT(id_convenio) DO UPDATE SET nombre = excluded.nombre, precio = excluded.precio,"
+    " url_imagen = excluded.url_imagen, stock = excluded.stock"
+)
+_SQL_ELIMINAR = "DELETE FROM productos WHERE id_convenio = ?"
+_SQL_STOCK = "UPDATE productos SET stock = ? WHERE id_convenio = ?"
+_SQL_IDS_STOCK = "SELECT id_convenio, stock FROM productos"
+_SQL_CONTAR = "SELECT COUNT(*) FROM productos"
+_SQL_META = "SELECT valor FROM meta WHERE clave = ?"
+_SQL_META_GUARDAR = "INSERT OR REPLACE INTO meta VALUES (?, ?)"
+
+# Desde cuántas filas escritas conviene reconstruir el índice FTS de una vez
+# en vez de actualizarlo fila a fila con los triggers (~10 veces más lento)
+LOTE_MASIVO = 5000
+_TRIGGERS_FTS = ("productos_ai", "productos_ad", "productos_au")
+
+# Máximo de parámetros por consulta `IN (...)` (SQLite antiguo admite 999)
+_LOTE_IN = 500
+
+
+def _producto(fila: Tuple) -> Producto:
+    return Producto(*fila)
+
+
+def _tupla(producto: Producto) -> Tuple:
+    return (producto.id_convenio, producto.nombre, producto.precio, producto.url_imagen, producto.stock)
+
+
+class InventarioSQLite:
+    """Inventario persistido en SQLite (WAL + FTS5). Seguro entre hilos."""
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(ruta, check_same_thread=False, cached_statements=64)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        for sql in _ESQUEMA:
+            self._con.execute(sql)
+        try:
+            for sql in _ESQUEMA_FTS:
+                self._con.execute(sql)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite sin FTS5 o sin tokenizador trigram (< 3.34): se busca recorriendo
+            self.fts = False
+        self._con.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._con.execute(_SQL_CONTAR).fetchone()[0]
+
+    def __contains__(self, id_convenio: str) -> bool:
+        return self.obtener(id_convenio) is not None
+
+    def __iter__(self) -> Iterator[Producto]:
+        with self._lock:
+            filas = self._con.execute(_SQL_TODOS).fetchall()
+        return iter(map(_producto, filas))
+
+    def obtener(self, id_convenio: str) -> Optional[Producto]:
+        with self._lock:
+            fila = self._con.execute(_SQL_POR_ID, (id_convenio,)).fetchone()
+        return _producto(fila) if fila else None
+
+    def buscar_por_nombre(self, nombre: str) -> List[Producto]:
+        """Productos cuyo nombre contiene `nombre` (sin distinguir mayúsculas).
+
+        Con 3 o más caracteres la consulta va al índice trigram como frase;
+        el resultado se confirma con la misma regla que `Inventory`.
+        """
+        consulta = nombre.lower()
+        if not consulta.strip():
+            return list(self)
+        if self.fts and len(consulta) >= 3:
+            with self._lock:
+                filas = self._con.execute(_SQL_FTS, ('"' + consulta.replace('"', '""') + '"',)).fetchall()
+        else:
+            with self._lock:
+                filas = self._con.execute(_SQL_TODOS).fetchall()
+        return [_producto(f) for f in filas if consulta in f[1].lower()]
+
+    def bajo_stock(self, umbral: int) -> List[Producto]:
+        """Productos con stock conocido menor o igual a `umbral` (usa el índice)."""
+        with self._lock:
+            filas = self._con.execute(_SQL_BAJO_STOCK, (umbral,)).fetchall()
+        return [_producto(f) for f in filas]
+
+    def _existentes(self, ids: List[str]) -> Dict[str, Producto]:
+        existentes: Dict[str, Producto] = {}
+        for i in range(0, len(ids), _LOTE_IN):
+            lote = ids[i:i + _LOTE_IN]
+            sql = f"SELECT {_COLUMNAS} FROM productos WHERE id_convenio IN ({','.join('?' * len(lote))})"
+            for fila in self._con.execute(sql, lote):
+                existentes[fila[0]] = _producto(fila)
+        return existentes
+
+    def _aplicar(self, upserts: List[Producto], eliminados: List[str], stock: Mapping[str, Optional[int]], cambios: CambiosInventario) -> None:
+        """Escribe los cambios en una sola transacción (con el lock tomado)."""
+        upserts = list({p.id_convenio: p for p in upserts}.values())
+        existentes = self._existentes([p.id_convenio for p in upserts] + list(eliminados) + list(stock))
+        escribir = []
+        for producto in upserts:
+            actual = existentes.get(producto.id_convenio)
+            if actual is None:
+                cambios.insertados.append(producto.id_convenio)
+                cambios.stock[producto.id_convenio] = (None, producto.stock)
+            elif actual != producto:
+                cambios.actualizados.append(producto.id_convenio)
+                if actual.stock != producto.stock:
+                    cambios.stock[producto.id_convenio] = (actual.stock, producto.stock)
+            else:
+                continue
+            escribir.append(_tupla(producto))
+            existentes[producto.id_convenio] = producto
+        borrar = []
+        for id_convenio in dict.fromkeys(eliminados):
+            actual = existentes.pop(id_convenio, None)
+            if actual is not None:
+                borrar.append((id_convenio,))
+                cambios.eliminados.append(id_convenio)
+                cambios.stock[id_convenio] = (actual.stock, None)
+        ajustes = []
+        for id_convenio, valor in stock.items():
+            actual = existentes.get(id_convenio)
+            if actual is not None and actual.stock != valor:
+                anterior = cambios.stock.get(id_convenio, (actual.stock, None))[0]
+                cambios.stock[id_convenio] = (anterior, valor)
+                actual.stock = valor
+                ajustes.append((valor, id_convenio))
+        masivo = self.fts and len(escribir) + len(borrar) >= LOTE_MASIVO
+        with self._con:
+            if masivo:
+                # Todo en la misma transacción: los lectores ven el antes o el después
+                self._con.execute("BEGIN")
+                for trigger in _TRIGGERS_FTS:
+                    self._con.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            self._con.executemany(_SQL_UPSERT, escribir)
+            self._con.executemany(_SQL_ELIMINAR, borrar)
+            self._con.executemany(_SQL_STOCK, ajustes)
+            if masivo:
+                self._con.execute("INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')")
+                for sql in _ESQUEMA_FTS[1:]:
+                    self._con.execute(sql)
+
+    def upsert(self, producto: Producto, cambios: Optional[CambiosInventario] = None) -> None:
+        with self._lock:
+            self._aplicar([producto], [], {}, cambios if cambios is not None else CambiosInventario())
+
+    def eliminar(self, id_convenio: str, cambios: Optional[CambiosInventario] = None) -> bool:
+        cambios = cambios if cambios is not None else CambiosInventario()
+        antes = len(cambios.eliminados)
+        with self._lock:
+            self._aplicar([], [id_convenio], {}, cambios)
+        return len(cambios.eliminados) > antes
+
+    def ajustar_stock(self, id_convenio: str, stock: Optional[int], cambios: Optional[CambiosInventario] = None) -> bool:
+        with self._lock:
+            self._aplicar([], [], {id_convenio: stock}, cambios if cambios is not None else CambiosInventario())
+        return id_convenio in self
+
+    def aplicar(
+        self,
+        upserts: Iterable[Producto] = (),
+        eliminados: Iterable[str] = (),
+        stock: Optional[Mapping[str, Optional[int]]] = None,
+    ) -> CambiosInventario:
+        """Aplica un lote de cambios en una transacción y devuelve lo que cambió."""
+        cambios = CambiosInventario()
+        with self._lock:
+            self._aplicar(list(upserts), list(eliminados), dict(stock or {}), cambios)
+        return cambios
+
+    def sincronizar(self, productos: Iterable[Producto]) -> CambiosInventario:
+        """Deja la tabla igual a `productos`; solo se escriben las filas que cambian."""
+        productos = list(productos)
+        vistos = {p.id_convenio for p in productos}
+        cambios = CambiosInventario()
+        with self._lock:
+            sobrantes = [i for (i, _) in self._con.execute(_SQL_IDS_STOCK) if i not in vistos]
+            self._aplicar(productos, sobrantes, {}, cambios)
+        return cambios
+
+    def aplicar_registros(self, registros: Iterable[Mapping[str, object]]) -> CambiosInventario:
+        """Aplica filas de un CSV o de Sheets (ver `inventory.aplicar_registros`)."""
+        return aplicar_registros(self, registros)
+
+    def version(self, fuente: str) -> Optional[str]:
+        """Última versión de `fuente` aplicada (compartida entre procesos)."""
+        with self._lock:
+            fila = self._con.execute(_SQL_META, (f"version:{fuente}",)).fetchone()
+        return fila[0] if fila else None
+
+    def guardar_version(self, fuente: str, version: str) -> None:
+        with self._lock, self._con:
+            self._con.execute(_SQL_META_GUARDAR, (f"version:{fuente}", version))
+
+    def cerrar(self) -> None:
+        with self._lock:
+            self._con.close()
@@ -1,12 +1,18 @@
 import os
+import json
 import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
+from agents.common.sheets_writer import BufferedSheetWriter
+from agents.common.money import parse_money
+from agents.common.sesiones import sesiones_paralelas
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, filename='lici_agent.log', 
@@ -17,6 +23,12 @@ LICI_USER = os.environ.get("LICI_USER")
 LICI_PASS = os.environ.get("LICI_PASS")
 GOOGLE_CREDS_JSON = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS_JSON")
 SHEET_NAME = os.environ.get("LICI_SHEET_NAME", "PostulacionesAutomatizadas")
+SHEET_SPILL_CSV = os.environ.get("LICI_SHEET_SPILL", "artifacts/lici_sheet_pendientes.csv")
+# Reporte JSONL de las tarjetas que no se pudieron interpretar en cada ciclo
+REPORTE_ERRORES_DIR = os.environ.get("LICI_REPORTE_ERRORES_DIR", "artifacts")
+# Sesiones headless simultáneas, una por empresa y cada una con su propio
+# login (acotado por memoria disponible)
+LICI_PARALELO = int(os.environ.get("LICI_PARALELO", "1"))
 
 EMPRESAS = [
     "FirmaVB Mobiliario",
@@ -54,30 +66,63 @@ def cambiar_empresa(driver, empresa):
     except Exception:
         logging.warning(f"No se pudo cambiar a empresa: {empresa}")
 
-def obtener_ofertas(driver):
+# Extrae todas las tarjetas de auto_bids en una sola llamada a chromedriver
+# (en vez de seis find_element por tarjeta). Ajusta selectores según HTML real.
+JS_TARJETAS = """
+return Array.from(document.querySelectorAll('.card')).map(function (card) {
+    function txt(sel) {
+        var el = card.querySelector(sel);
+        return el ? el.innerText : null;
+    }
+    var a = card.querySelector('a');
+    return {
+        match: txt('.match'),
+        productos: txt('.productos'),
+        presupuesto: txt('.presupuesto'),
+        ofertado: txt('.ofertado'),
+        estado: txt('.estado'),
+        link: a ? a.href : null
+    };
+});
+"""
+
+def _monto(raw, campo):
+    monto = parse_money(raw.get(campo))
+    if monto is None:
+        raise ValueError(f"monto inválido en '{campo}': {raw.get(campo)!r}")
+    return float(monto.to_decimal())
+
+def parsear_tarjeta(raw):
+    """Convierte el objeto plano devuelto por JS_TARJETAS en un dict de oferta."""
+    match_txt = (raw.get("match") or "").replace("%", "").strip()
+    if not match_txt.isdigit():
+        raise ValueError(f"match inválido: {raw.get('match')!r}")
+    if not raw.get("link"):
+        raise ValueError("tarjeta sin link")
+    return {
+        "match": int(match_txt),
+        "productos": (raw.get("productos") or "").strip(),
+        "presupuesto": _monto(raw, "presupuesto"),
+        "ofertado": _monto(raw, "ofertado"),
+        "estado": (raw.get("estado") or "").strip(),
+        "link": raw["link"],
+    }
+
+def obtener_ofertas(driver, errores=None):
+    """Lee las tarjetas de auto_bids. Si se entrega `errores` (lista), agrega
+    un registro por cada tarjeta que no se pudo interpretar."""
     driver.get("https://lici.cl/auto_bids")
     time.sleep(2)
-    # Parsing avanzado: ajusta selectores según HTML real (dummy de ejemplo)
-    cards = driver.find_elements(By.CSS_SELECTOR, ".card")
+    tarjetas = driver.execute_script(JS_TARJETAS) or []
     ofertas = []
-    for card in cards:
+    for indice, raw in enumerate(tarjetas):
         try:
-            total_items = int(card.find_element(By.CSS_SELECTOR, ".match").text.replace("%", ""))
-            productos = card.find_element(By.CSS_SELECTOR, ".productos").text
-            presupuesto = float(card.find_element(By.CSS_SELECTOR, ".presupuesto").text.replace("$", "").replace(".","").replace(",",""))
-            ofertado = float(card.find_element(By.CSS_SELECTOR, ".ofertado").text.replace("$", "").replace(".","").replace(",",""))
-            estado = card.find_element(By.CSS_SELECTOR, ".estado").text
-            link = card.find_element(By.TAG_NAME, "a").get_attribute("href")
-            ofertas.append({
-                "match": total_items,
-                "productos": productos,
-                "presupuesto": presupuesto,
-                "ofertado": ofertado,
-                "estado": estado,
-                "link": link
-            })
+            ofertas.append(parsear_tarjeta(raw))
         except Exception as ex:
-            logging.error(f"Error parsing tarjeta: {ex}")
+            registro = {"indice": indice, "error": str(ex), "tarjeta": raw}
+            if errores is not None:
+                errores.append(registro)
+            logging.error(f"Error parsing tarjeta: {registro}")
     return ofertas
 
 def ajustar_oferta(driver, card, nuevo_monto):
@@ -98,29 +143,102 @@ def conectar_gsheet():
     return sheet
 
 def guardar_sheet(sheet, fila):
-    sheet.append_row(fila, value_input_option="USER_ENTERED")
+    """Registra una fila en la hoja. Con un `BufferedSheetWriter` la encola;
+    con una hoja de gspread usa un writer de una sola vez (append + close)."""
+    if isinstance(sheet, BufferedSheetWriter):
+        sheet.append(fila)
+        return
+    with BufferedSheetWriter(sheet, spill_path=SHEET_SPILL_CSV) as writer:
+        writer.append(fila)
+
+class ColectorResultados:
+    """Acumula las filas registradas y las tarjetas con error de todas las
+    sesiones (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.filas = []
+        self.errores = []
+
+    def agregar(self, fila):
+        with self._lock:
+            self.filas.append(fila)
 
-def ciclo():
-    # Autenticación y setup
+    def agregar_errores(self, empresa, errores):
+        with self._lock:
+            self.errores.extend(dict(e, empresa=empresa) for e in errores)
+
+def escribir_reporte_errores(errores, directorio=None):
+    """Guarda los registros de tarjetas inválidas del ciclo en un JSONL y
+    devuelve la ruta (None si no hubo errores)."""
+    if not errores:
+        return None
+    directorio = directorio or REPORTE_ERRORES_DIR
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f"lici_tarjetas_invalidas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    with open(ruta, "w", encoding="utf-8") as f:
+        for registro in errores:
+            f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+    logging.warning(f"{len(errores)} tarjetas no interpretadas; detalle en {ruta}")
+    return ruta
+
+def procesar_empresa(driver, empresa, writer, colector):
+    cambiar_empresa(driver, empresa)
+    errores = []
+    ofertas = obtener_ofertas(driver, errores)
+    colector.agregar_errores(empresa, errores)
+    for oferta in ofertas:
+        # Aplicar lógica: match, ajuste, faltantes
+        if oferta['match'] == 100 and oferta['ofertado'] > oferta['presupuesto'] * 0.95:
+            ajustar_oferta(driver, oferta, oferta['presupuesto'] * 0.95)
+        enviar_oferta(driver, oferta)
+        fila = [
+            now_fmt(), empresa, oferta['link'], oferta['match'],
+            oferta['ofertado'], oferta['presupuesto'], oferta['estado']
+        ]
+        guardar_sheet(writer, fila)
+        colector.agregar(fila)
+        logging.info(f"Encolado para Google Sheet: {fila}")
+    # Agrega bucles similares para 1 y 2 productos faltantes
+
+def _sesion_empresa(empresa, writer, colector):
+    """Procesa `empresa` en una sesión con login propio: la empresa elegida
+    queda en la sesión del servidor, así que dos hilos no pueden compartirla."""
     driver = setup_driver()
+    try:
+        login_lici(driver)
+        procesar_empresa(driver, empresa, writer, colector)
+    except Exception as ex:
+        logging.error(f"Error procesando empresa {empresa}: {ex}")
+    finally:
+        driver.quit()
+
+def ciclo(paralelo=None):
     gs = conectar_gsheet()
-    login_lici(driver)
-    for empresa in EMPRESAS:
-        cambiar_empresa(driver, empresa)
-        ofertas = obtener_ofertas(driver)
-        for oferta in ofertas:
-            # Aplicar lógica: match, ajuste, faltantes
-            if oferta['match'] == 100 and oferta['ofertado'] > oferta['presupuesto'] * 0.95:
-                ajustar_oferta(driver, oferta, oferta['presupuesto'] * 0.95)
-            enviar_oferta(driver, oferta)
-            fila = [
-                now_fmt(), empresa, oferta['link'], oferta['match'],
-                oferta['ofertado'], oferta['presupuesto'], oferta['estado']
-            ]
-            guardar_sheet(gs, fila)
-            logging.info(f"Registrado en Google Sheet: {fila}")
-        # Agrega bucles similares para 1 y 2 productos faltantes
-    driver.quit()
+    # Las filas se envían por lotes desde un hilo aparte; el navegador no espera a Sheets
+    writer = BufferedSheetWriter(gs, spill_path=SHEET_SPILL_CSV)
+    colector = ColectorResultados()
+    workers = sesiones_paralelas(paralelo or LICI_PARALELO, len(EMPRESAS))
+    driver = None
+    try:
+        if workers > 1:
+            # Una sesión con login propio por empresa, todas alimentan el mismo
+            # writer; no queda un driver principal ocupando memoria
+            logging.info(f"Procesando {len(EMPRESAS)} empresas en {workers} sesiones paralelas")
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for empresa in EMPRESAS:
+                    pool.submit(_sesion_empresa, empresa, writer, colector)
+        else:
+            driver = setup_driver()
+            login_lici(driver)
+            for empresa in EMPRESAS:
+                procesar_empresa(driver, empresa, writer, colector)
+    finally:
+        writer.close()
+        if driver is not None:
+            driver.quit()
+        escribir_reporte_errores(colector.errores)
+    return colector.filas
 
 if __name__ == "__main__":
     try:
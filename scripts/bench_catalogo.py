@@ -0,0 +1,111 @@
+"""
+Benchmark de búsqueda en el catálogo del cotizador (catalogo.indice).
+
+Compara el recorrido lineal anterior de `_buscar_producto` con
+`CatalogIndex` sobre un catálogo sintético de tamaño real, y el armado de
+una cotización fila por fila con la versión columnar (`_cotizar_df`).
+
+Usage:
+    python scripts/bench_catalogo.py [n_productos]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+from catalogo.cotizador import _cotizar_df, _entradas_df  # noqa: E402
+from catalogo.data import Producto  # noqa: E402
+from catalogo.indice import CatalogIndex  # noqa: E402
+
+PALABRAS = [
+    "lápiz", "pasta", "azul", "rojo", "cuaderno", "universitario", "hojas", "block",
+    "notas", "corchetera", "metálica", "archivador", "carpeta", "resma", "papel",
+    "carta", "oficio", "tijera", "pegamento", "barra", "destacador", "plumón",
+]
+
+
+def generar_catalogo(n: int, seed: int = 11) -> dict:
+    rnd = random.Random(seed)
+    catalogo = {}
+    for i in range(n):
+        nombre = " ".join(rnd.sample(PALABRAS, 4)) + f" {rnd.randint(1, 500)}"
+        catalogo[f"CM-{i:06d}"] = Producto(f"CM-{i:06d}", nombre, float(i), "")
+    return catalogo
+
+
+def buscar_lineal(catalogo: dict, entrada: str):
+    entrada_norm = entrada.strip()
+    if entrada_norm in catalogo:
+        return catalogo[entrada_norm]
+    entrada_lower = entrada_norm.lower()
+    for prod in catalogo.values():
+        if prod.nombre.lower().find(entrada_lower) != -1:
+            return prod
+    return None
+
+
+def cotizar_por_filas(df: pd.DataFrame, indice: CatalogIndex) -> pd.DataFrame:
+    """Armado anterior: iterrows, un dict por fila y DataFrame al final."""
+    registros = []
+    for _, row in df.iterrows():
+        entrada = str(row[df.columns[0]]).strip()
+        try:
+            cantidad = int(row[df.columns[1]])
+        except Exception:
+            cantidad = 1
+        prod = indice.buscar(entrada)
+        if prod is None:
+            continue
+        registros.append({
+            "ID_Convenio_Marco": prod.id_convenio,
+            "Nombre_Producto": prod.nombre,
+            "Precio_Unitario": prod.precio,
+            "Cantidad": cantidad,
+            "URL_Imagen": prod.url_imagen,
+            "Subtotal": prod.precio * cantidad,
+        })
+    return pd.DataFrame(registros)
+
+
+def medir(nombre: str, fn, n: int) -> float:
+    t0 = time.perf_counter()
+    fn()
+    dt = time.perf_counter() - t0
+    print(f"{nombre:<26} {dt:.3f} s  ({n / dt:,.0f} búsquedas/s)")
+    return dt
+
+
+def main(n: int) -> None:
+    catalogo = generar_catalogo(n)
+    rnd = random.Random(12)
+    nombres = [p.nombre for p in catalogo.values()]
+    consultas = [rnd.choice(nombres).split(" ", 2)[1] + " " + rnd.choice(PALABRAS) for _ in range(200)]
+    consultas += ["inexistente total"] * 50
+    print(f"productos: {n}, consultas: {len(consultas)}")
+
+    t0 = time.perf_counter()
+    indice = CatalogIndex.desde_catalogo(catalogo)
+    print(f"{'construir índice':<26} {time.perf_counter() - t0:.3f} s")
+    medir("recorrido lineal", lambda: [buscar_lineal(catalogo, c) for c in consultas], len(consultas))
+    medir("CatalogIndex.buscar", lambda: [indice.buscar(c) for c in consultas], len(consultas))
+    medir("CatalogIndex.sugerencias", lambda: [indice.sugerencias(c) for c in consultas[:50]], 50)
+
+    ids = list(catalogo)
+    lineas = 20_000
+    lista = pd.DataFrame({
+        "Producto": [rnd.choice(ids) if rnd.random() < 0.9 else rnd.choice(consultas) for _ in range(lineas)],
+        "Cantidad": [rnd.randint(1, 50) for _ in range(lineas)],
+    })
+    indice.tabla()
+    print(f"\ncotización de {lineas} líneas:")
+    medir("fila por fila", lambda: cotizar_por_filas(lista, indice), lineas)
+    medir("columnar (_cotizar_df)", lambda: _cotizar_df(_entradas_df(lista), indice), lineas)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 30_000)
@@ -0,0 +1,94 @@
+"""
+Benchmark de lecturas de Google Sheets (data_source), sin conexión.
+
+Usa `LocalBackend` (CSV) con una latencia simulada por llamada a la API para
+comparar el `fetch` anterior (credenciales + authorize + open + worksheet +
+get_all_records en cada llamada) con `SheetsDataSource`: cliente único,
+lote con `values_batch_get`, snapshot con TTL y revisión.
+
+Usage:
+    python scripts/bench_data_source.py [lecturas] [latencia_ms]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+from data_source import LocalBackend, SheetsDataSource  # noqa: E402
+
+TABS = ["Catalogo", "Inventario", "Precios", "Postulaciones", "Publicaciones"]
+
+
+class BackendConLatencia(LocalBackend):
+    """`LocalBackend` que espera `latencia_s` por cada llamada a la API."""
+
+    def __init__(self, directorio: str, latencia_s: float):
+        super().__init__(directorio)
+        self.latencia_s = latencia_s
+
+    def revision(self) -> str:
+        time.sleep(self.latencia_s)
+        return super().revision()
+
+    def read(self, tabs):
+        time.sleep(self.latencia_s)
+        return super().read(tabs)
+
+
+def generar_tabs(directorio: str, filas: int = 2000, seed: int = 5) -> None:
+    rnd = random.Random(seed)
+    for tab in TABS:
+        with open(os.path.join(directorio, f"{tab}.csv"), "w", encoding="utf-8") as f:
+            f.write("id,nombre,precio,stock\n")
+            for i in range(filas):
+                f.write(f"CM-{i:06d},producto {rnd.randint(1, 999)},{rnd.randint(100, 99999)},{rnd.randint(0, 500)}\n")
+
+
+def fetch_anterior(backend: BackendConLatencia, tab: str) -> pd.DataFrame:
+    """credenciales/authorize, open, worksheet y get_all_records: 4 llamadas."""
+    time.sleep(backend.latencia_s * 3)
+    return pd.DataFrame(backend.read([tab])[tab])
+
+
+def main(lecturas: int, latencia_ms: float) -> None:
+    latencia_s = latencia_ms / 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        generar_tabs(tmp)
+        rnd = random.Random(7)
+        pedidos = [rnd.sample(TABS, 2) for _ in range(lecturas)]
+        print(f"lecturas: {lecturas} (2 pestañas c/u), latencia simulada: {latencia_ms:.0f} ms por llamada")
+
+        backend = BackendConLatencia(tmp, latencia_s)
+        t0 = time.perf_counter()
+        for tabs in pedidos:
+            for tab in tabs:
+                fetch_anterior(backend, tab)
+        print(f"{'fetch anterior':<36} {time.perf_counter() - t0:.2f} s")
+
+        backend = BackendConLatencia(tmp, latencia_s)
+        fuente = SheetsDataSource(backend, ttl_s=300)
+        t0 = time.perf_counter()
+        for tabs in pedidos:
+            fuente.fetch_many(tabs)
+        print(f"{'SheetsDataSource (TTL 300 s)':<36} {time.perf_counter() - t0:.2f} s  ({backend.llamadas} llamadas)")
+
+        backend = BackendConLatencia(tmp, latencia_s)
+        fuente = SheetsDataSource(backend, ttl_s=0)
+        t0 = time.perf_counter()
+        for tabs in pedidos:
+            fuente.fetch_many(tabs)
+        print(f"{'SheetsDataSource (TTL 0, revisión)':<36} {time.perf_counter() - t0:.2f} s  ({backend.llamadas} llamadas)")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 100.0,
+    )
@@ -0,0 +1,73 @@
+"""
+Benchmark del motor de decisiones de oferta: escalar vs. vectorial.
+
+Genera ofertas sintéticas y compara el tiempo de evaluar cada una con
+`debe_ajustar_oferta_95` / `debe_postular` contra una sola llamada a
+`evaluar_ofertas` sobre el lote completo. Verifica además que ambos modos
+entreguen las mismas decisiones.
+
+Usage:
+    python scripts/bench_decisiones.py [n_ofertas]
+"""
+
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+from agents.common.decisiones import evaluar_ofertas, desde_centavos  # noqa: E402
+from agents.common.filters import debe_postular  # noqa: E402
+from agents.lici.run import debe_ajustar_oferta_95  # noqa: E402
+
+
+def generar_ofertas(n: int, seed: int = 42) -> pd.DataFrame:
+    """Genera `n` ofertas sintéticas con montos CLP y algunos valores faltantes."""
+    rnd = random.Random(seed)
+    filas = []
+    for _ in range(n):
+        presupuesto = rnd.randint(10_000, 50_000_000)
+        ofertado = int(presupuesto * rnd.uniform(0.5, 1.8))
+        filas.append({
+            "presupuesto": None if rnd.random() < 0.01 else Decimal(presupuesto),
+            "ofertado": Decimal(ofertado),
+            "match_pct": rnd.choice([50, 70, 80, 90, 100, 100]),
+            "tipo_compra": rnd.choice(["Licitación Pública", "Trato Directo", "Compra Ágil"]),
+            "monto_catalogo": Decimal(rnd.randint(10_000, 50_000_000)),
+        })
+    return pd.DataFrame(filas)
+
+
+def main(n: int) -> None:
+    df = generar_ofertas(n)
+    registros = df.to_dict("records")
+
+    t0 = time.perf_counter()
+    escalar = []
+    for r in registros:
+        ajustar, nuevo, razon = debe_ajustar_oferta_95(r["presupuesto"], r["ofertado"], r["match_pct"])
+        postular = r["presupuesto"] is not None and debe_postular(r["presupuesto"], r["monto_catalogo"], r["tipo_compra"])
+        escalar.append((ajustar, nuevo, razon, postular))
+    t_escalar = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vectorial = evaluar_ofertas(df)
+    t_vectorial = time.perf_counter() - t0
+
+    nuevos = [desde_centavos(c) if c is not pd.NA else None for c in vectorial["nuevo_monto_centavos"]]
+    iguales = all(
+        e == (a, nv, rz, p)
+        for e, a, nv, rz, p in zip(escalar, vectorial["ajustar"], nuevos, vectorial["razon"], vectorial["postular"])
+    )
+    print(f"ofertas:    {n}")
+    print(f"escalar:    {t_escalar:.3f} s")
+    print(f"vectorial:  {t_vectorial:.3f} s  ({t_escalar / t_vectorial:.1f}x)")
+    print(f"coinciden:  {iguales}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,139 @@
+"""
+Micro-benchmarks de extracción HTML: BeautifulSoup vs agents.common.html_extract.
+
+Mide cada uso real con páginas de tamaño típico (búsqueda y producto de
+Prisa, ficha de Convenio Marco con tabla de ofertas y página institucional
+para contacts_scraper). Si se pasa un directorio con páginas grabadas
+(`*.html`), se usan esas en lugar de las sintéticas.
+
+Usage:
+    python scripts/bench_html_extract.py [repeticiones] [directorio_html]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from agents.common import html_extract  # noqa: E402
+
+
+def _relleno(n: int) -> str:
+    return "".join(
+        f"<div class='bloque b{i}'><p>Texto de relleno {i} con <span>detalle</span></p>"
+        f"<a href='/seccion/{i}'>Sección {i}</a></div>"
+        for i in range(n)
+    )
+
+
+def paginas_sinteticas() -> dict:
+    busqueda = (
+        "<html><head><title>Resultados</title></head><body>" + _relleno(300)
+        + "".join(f"<li class='item'><a class='product-item-link' href='https://www.prisa.cl/p/{i}'>P {i}</a></li>" for i in range(24))
+        + "</body></html>"
+    )
+    producto = (
+        "<html><head><title>Producto</title><meta property='og:image' content='https://img/og.jpg'></head><body>"
+        + _relleno(400) + "<img class='fotorama__img' src='https://img/1.jpg'>" + _relleno(200) + "</body></html>"
+    )
+    ofertas = (
+        "<html><body>" + _relleno(200) + "<table class='ofertas'>"
+        + "".join(
+            f"<tr><td class='col-vendedor'>Proveedor {i}</td><td class='col-precio'>$ {1000 + i}.990</td>"
+            f"<td class='col-stock'>{i} u</td></tr>" for i in range(60)
+        )
+        + "</table></body></html>"
+    )
+    contacto = (
+        "<html><head><title>Contacto | Municipalidad</title></head><body>" + _relleno(600)
+        + "<a href='mailto:oficina@muni.cl'>oficina@muni.cl</a></body></html>"
+    )
+    return {"prisa_busqueda": busqueda, "prisa_producto": producto, "convenio_ofertas": ofertas, "contacto": contacto}
+
+
+def bs4_busqueda(html):
+    soup = BeautifulSoup(html, "html.parser")
+    link = soup.select_one("a.product-item-link, a[itemprop='url']")
+    return link["href"].strip() if link else None
+
+
+def lxml_busqueda(html):
+    return html_extract.atributo(html_extract.parsear(html), "a.product-item-link, a[itemprop='url']", "href")
+
+
+def bs4_producto(html):
+    soup = BeautifulSoup(html, "html.parser")
+    img = soup.select_one("img#image, img.fotorama__img, img.product.image")
+    return img["src"].strip() if img else None
+
+
+def lxml_producto(html):
+    return html_extract.atributo(html_extract.parsear(html), "img#image, img.fotorama__img, img.product.image", "src")
+
+
+def bs4_ofertas(html):
+    soup = BeautifulSoup(html, "html.parser")
+    salida = []
+    for f in soup.select(".offer-row, .seller-line, table.ofertas tr"):
+        v, p = f.select_one(".col-vendedor"), f.select_one(".col-precio")
+        if v and p:
+            salida.append((v.get_text(strip=True), p.get_text(strip=True)))
+    return salida
+
+
+def lxml_ofertas(html):
+    filas = html_extract.filas_precio(
+        html_extract.parsear(html), ".offer-row, .seller-line, table.ofertas tr",
+        {"v": ".col-vendedor", "p": ".col-precio"},
+    )
+    return [(f["v"], f["p"]) for f in filas if f["v"] is not None and f["p"] is not None]
+
+
+def bs4_contacto(html):
+    # Versión anterior de contacts_scraper: dos parseos por página
+    soup = BeautifulSoup(html, "lxml")
+    titulo = soup.title.string.strip() if soup.title and soup.title.string else ""
+    soup = BeautifulSoup(html, "lxml")
+    return titulo, [a["href"] for a in soup.find_all("a", href=True)]
+
+
+def lxml_contacto(html):
+    pagina = html_extract.extraer_pagina(html)
+    return pagina.titulo, [h for h, _ in pagina.enlaces]
+
+
+CASOS = {
+    "prisa_busqueda": (bs4_busqueda, lxml_busqueda),
+    "prisa_producto": (bs4_producto, lxml_producto),
+    "convenio_ofertas": (bs4_ofertas, lxml_ofertas),
+    "contacto": (bs4_contacto, lxml_contacto),
+}
+
+
+def medir(fn, html, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(html)
+    return (time.perf_counter() - t0) / n * 1000
+
+
+def main(n: int, directorio: str = "") -> None:
+    paginas = paginas_sinteticas()
+    if directorio:
+        for ruta in Path(directorio).glob("*.html"):
+            if ruta.stem in CASOS:
+                paginas[ruta.stem] = ruta.read_text(encoding="utf-8", errors="replace")
+    print(f"{'página':<18} {'KB':>6} {'bs4 ms':>9} {'lxml ms':>9} {'x':>6}")
+    for nombre, (viejo, nuevo) in CASOS.items():
+        html = paginas[nombre]
+        if viejo(html) != nuevo(html):
+            print(f"  ¡{nombre}: resultados distintos!")
+        t_viejo, t_nuevo = medir(viejo, html, n), medir(nuevo, html, n)
+        print(f"{nombre:<18} {len(html) / 1024:6.0f} {t_viejo:9.2f} {t_nuevo:9.2f} {t_viejo / t_nuevo:6.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20, sys.argv[2] if len(sys.argv) > 2 else "")
@@ -0,0 +1,72 @@
+"""
+Benchmark del parser de montos compartido (agents.common.money).
+
+Compara la versión anterior de `limpiar_monto` (Decimal + `re.sub` por
+llamada) con `parse_money` y con `parse_many` sobre una columna de pandas.
+
+Usage:
+    python scripts/bench_money.py [n_montos]
+"""
+
+import random
+import re
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+from agents.common.money import parse_money, parse_many  # noqa: E402
+
+
+def limpiar_monto_anterior(texto):
+    s = str(texto).strip()
+    s = s.replace("$", "").replace("CLP", "").replace("cop", "").replace("COP", "")
+    s = re.sub(r"\s+", "", s)
+    s = s.replace(".", "").replace(",", ".")
+    try:
+        return Decimal(s)
+    except Exception:
+        return None
+
+
+def generar_montos(n: int, seed: int = 7) -> list[str]:
+    rnd = random.Random(seed)
+    return [f"$ {rnd.randint(0, 10**9):,}".replace(",", ".") + f",{rnd.randint(0, 99):02d}" for _ in range(n)]
+
+
+def generar_columna_repetida(n: int, distintos: int = 5_000, seed: int = 8) -> list[str]:
+    """Columna realista: muchos presupuestos repetidos entre licitaciones."""
+    rnd = random.Random(seed)
+    base = generar_montos(distintos, seed)
+    return [rnd.choice(base) for _ in range(n)]
+
+
+def medir(nombre: str, fn, n: int) -> float:
+    t0 = time.perf_counter()
+    fn()
+    dt = time.perf_counter() - t0
+    print(f"{nombre:<26} {dt:.3f} s  ({n / dt:,.0f} montos/s)")
+    return dt
+
+
+def main(n: int) -> None:
+    montos = generar_montos(n)
+    serie = pd.Series(montos)
+    print(f"montos: {n}")
+    medir("limpiar_monto anterior", lambda: [limpiar_monto_anterior(m) for m in montos], n)
+    medir("parse_money", lambda: [parse_money(m) for m in montos], n)
+    medir("parse_many (pandas)", lambda: parse_many(serie), n)
+
+    repetidos = generar_columna_repetida(n)
+    serie_rep = pd.Series(repetidos)
+    print("\ncolumna con 5.000 montos distintos:")
+    medir("limpiar_monto anterior", lambda: [limpiar_monto_anterior(m) for m in repetidos], n)
+    medir("parse_many (pandas)", lambda: parse_many(serie_rep), n)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
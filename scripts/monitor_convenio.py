@@ -23,12 +23,17 @@ See the accompanying README for more details.
 """
 
 import csv
+import sys
 import time
 from dataclasses import dataclass
+from pathlib import Path
 from typing import List, Optional
 
 import requests
-from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from agents.common import html_extract  # noqa: E402
+from agents.common.money import parse_minor  # noqa: E402
 
 
 @dataclass
@@ -42,14 +47,13 @@ class Oferta:
 def parse_precio(txt: str) -> float:
     """Convierte un texto de precio a un número flotante.
 
-    Normaliza distintos formatos como '1.234,56' o '1,234.56'.
+    Normaliza distintos formatos como '1.234,56' o '1,234.56' con el parser
+    compartido `agents.common.money`. Lanza ValueError si no es un monto.
     """
-    t = txt.strip().replace("$", "").replace("\u00a0", " ").replace("CLP", "").strip()
-    if t.count(",") == 1 and t.count(".") >= 1 and t.rfind(",") > t.rfind("."):
-        t = t.replace(".", "").replace(",", ".")
-    else:
-        t = t.replace(",", "")
-    return float(t)
+    minor = parse_minor(txt)
+    if minor is None:
+        raise ValueError(f"Precio inválido: {txt!r}")
+    return minor / 100
 
 
 def scrap_ofertas(url: str) -> List[Oferta]:
@@ -59,29 +63,31 @@ def scrap_ofertas(url: str) -> List[Oferta]:
     """
     r = requests.get(url, timeout=20)
     r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
+    arbol = html_extract.parsear(r.text)
     ofertas: List[Oferta] = []
-    filas = soup.select(".offer-row, .seller-line, table.ofertas tr")
-    if not filas:
-        filas = soup.find_all("tr")
+    filas = html_extract.filas_precio(
+        arbol,
+        ".offer-row, .seller-line, table.ofertas tr",
+        {
+            "vendedor": ".seller-name, .vendedor, .col-vendedor",
+            "precio": ".price, .precio, .col-precio",
+            "stock": ".stock, .col-stock",
+        },
+    )
     for f in filas:
-        vend_el = f.select_one(".seller-name, .vendedor, .col-vendedor")
-        precio_el = f.select_one(".price, .precio, .col-precio")
-        if not vend_el or not precio_el:
+        if f["vendedor"] is None or f["precio"] is None:
             continue
-        vendedor = vend_el.get_text(strip=True)
         try:
-            precio = parse_precio(precio_el.get_text())
+            precio = parse_precio(f["precio"])
         except Exception:
             continue
-        stock_el = f.select_one(".stock, .col-stock")
         stock: Optional[int] = None
-        if stock_el:
+        if f["stock"] is not None:
             try:
-                stock = int("".join(ch for ch in stock_el.get_text() if ch.isdigit()))
+                stock = int("".join(ch for ch in f["stock"] if ch.isdigit()))
             except Exception:
                 stock = None
-        ofertas.append(Oferta(vendedor=vendedor, precio=precio, stock=stock))
+        ofertas.append(Oferta(vendedor=f["vendedor"], precio=precio, stock=stock))
     ofertas.sort(key=lambda o: o.precio)
     return ofertas
 
@@ -23,6 +23,13 @@ incorporando las siguientes capacidades:
   Senegocia. Estas funciones utilizan Playwright y se dejan como
   pseudocódigo, ya que la interacción exacta depende de la estructura de
   la página y de selectores específicos que deberán ajustarse.
+* Búsqueda por lotes (`find_best_matches`): licitaciones marco con miles de
+  líneas se reparten entre procesos de un `ProcessPoolExecutor`, cada uno
+  con su copia de las descripciones cargada una sola vez.
+* Memoria persistente de coincidencias (`MatchMemo`): las descripciones que
+  se repiten entre licitaciones ("resma carta 75g", "cloro 5 litros") se
+  resuelven con un acceso a diccionario en lugar de recorrer toda la lista
+  de precios. La memoria se invalida sola cuando cambia la lista de precios.
 
 Para usar este script es necesario instalar las dependencias que utiliza
 Playwright y pandas. Además, se recomienda ejecutar la función
@@ -33,13 +40,21 @@ en Senegocia. El login se puede reutilizar del script original.
 from __future__ import annotations
 
 import os
+import json
+import hashlib
 import logging
-from typing import Optional, Tuple, Dict, Any
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple, Dict, Any, List, Sequence
 
 import pandas as pd
 from difflib import SequenceMatcher
 from playwright.sync_api import Page
 
+from agents.common.money import parse_money
+
 # Umbrales para determinar el nivel de coincidencia. Se expresan como
 # porcentajes sobre 1.0 (por ejemplo, 0.90 equivale a 90 %).
 MATCH_100_THRESHOLD = 0.95
@@ -49,6 +64,14 @@ MATCH_80_THRESHOLD = 0.80
 # Descuento máximo a aplicar en ausencia de presupuesto específico (7 %).
 DEFAULT_DISCOUNT = 0.07
 
+# Memoria persistente de coincidencias: ruta por defecto y capacidad LRU.
+DEFAULT_MEMO_PATH = os.getenv("SENEGOCIA_MATCH_MEMO", "artifacts/cache/senegocia_match_memo.json")
+DEFAULT_MEMO_SIZE = 50_000
+
+# Lotes con menos descripciones pendientes que este umbral se resuelven en el
+# proceso actual: arrancar el pool costaría más que el cálculo.
+PARALLEL_MIN_BATCH = 200
+
 log = logging.getLogger(__name__)
 
 
@@ -88,25 +111,264 @@ def similarity(a: str, b: str) -> float:
     return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
 
-def find_best_match(item_name: str, price_df: pd.DataFrame) -> Tuple[Optional[pd.Series], float]:
+def normalize_description(text: str) -> str:
+    """Normaliza una descripción para usarla como clave de la memoria.
+
+    Pasa a minúsculas y colapsa los espacios, de modo que "Resma  Carta 75g"
+    y "resma carta 75g" compartan la misma entrada.
+    """
+    return " ".join(str(text or "").lower().split())
+
+
+def price_list_version(price_df: pd.DataFrame) -> str:
+    """Calcula un hash estable del contenido de la lista de precios.
+
+    Cualquier cambio en descripciones, códigos, precios u orden de las filas
+    produce una versión distinta, lo que invalida la memoria de coincidencias.
+    """
+    digest = hashlib.sha1()
+    digest.update(str(list(price_df.columns)).encode("utf-8"))
+    hashed = pd.util.hash_pandas_object(price_df.astype(str), index=False)
+    digest.update(hashed.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class MatchMemo:
+    """Memoria LRU persistente de resultados de `find_best_match`.
+
+    Las entradas se indexan por (descripción normalizada, versión de la lista
+    de precios) y guardan el código y la posición de la mejor fila junto con
+    su puntuación. Al enlazar una lista de precios con otra versión se
+    descartan todas las entradas previas.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = DEFAULT_MEMO_SIZE):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._bound_df: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def load(cls, path: str, max_entries: int = DEFAULT_MEMO_SIZE) -> "MatchMemo":
+        """Carga la memoria desde disco; si el archivo no existe o está dañado, parte vacía."""
+        memo = cls(path, max_entries)
+        p = Path(path)
+        if not p.exists():
+            return memo
+        try:
+            data = json.loads(p.read_text(encoding="utf-8"))
+            memo.version = data.get("version")
+            for key, code, pos, score in data.get("entries", [])[-max_entries:]:
+                memo._entries[key] = (code, int(pos), float(score))
+        except Exception as e:
+            log.warning("No se pudo leer la memoria de coincidencias %s: %s", p, e)
+            memo._entries.clear()
+            memo.version = None
+        return memo
+
+    def save(self) -> None:
+        """Escribe la memoria en disco (de la entrada más antigua a la más reciente)."""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": self.version,
+            "entries": [[key, code, pos, score] for key, (code, pos, score) in self._entries.items()],
+        }
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.path)
+
+    def bind(self, price_df: pd.DataFrame) -> None:
+        """Asocia la memoria a una lista de precios, invalidándola si cambió."""
+        if price_df is self._bound_df:
+            return
+        version = price_list_version(price_df)
+        if self.version is not None and version != self.version and self._entries:
+            log.info("Lista de precios modificada: se invalidan %d coincidencias memorizadas", len(self._entries))
+            self._entries.clear()
+            self.invalidations += 1
+        self.version = version
+        self._bound_df = price_df
+
+    def get(self, item_name: str) -> Optional[Tuple[Any, int, float]]:
+        """Retorna (código, posición, puntuación) si la descripción está memorizada."""
+        key = normalize_description(item_name)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, item_name: str, code: Any, position: int, score: float) -> None:
+        """Memoriza el resultado, expulsando la entrada menos usada si se supera el límite."""
+        key = normalize_description(item_name)
+        self._entries[key] = (code, position, score)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas de uso para el reporte de ejecución."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def _scan_descriptions(item_name: str, descriptions: Sequence[str]) -> Tuple[Optional[int], float]:
+    """Recorre las descripciones y retorna (posición, puntuación) de la mejor."""
+    best_pos = None
+    best_score = 0.0
+    for pos, descripcion in enumerate(descriptions):
+        score = similarity(item_name, descripcion)
+        if score > best_score:
+            best_score = score
+            best_pos = pos
+    return best_pos, best_score
+
+
+def _best_match_scan(item_name: str, price_df: pd.DataFrame) -> Tuple[Optional[int], float]:
+    """Recorre la lista de precios y retorna (posición, puntuación) de la mejor fila."""
+    return _scan_descriptions(item_name, price_df["DESCRIPCION"].tolist())
+
+
+# Descripciones de la lista de precios cargadas una vez por proceso trabajador.
+_WORKER_DESCRIPTIONS: List[str] = []
+
+
+def _init_match_worker(descriptions: List[str]) -> None:
+    global _WORKER_DESCRIPTIONS
+    _WORKER_DESCRIPTIONS = descriptions
+
+
+def _match_chunk(item_names: List[str]) -> List[Tuple[Optional[int], float]]:
+    return [_scan_descriptions(name, _WORKER_DESCRIPTIONS) for name in item_names]
+
+
+def _remember(memo: MatchMemo, item_name: str, price_df: pd.DataFrame, pos: Optional[int], score: float) -> None:
+    code = price_df["CODIGO"].iloc[pos] if pos is not None and "CODIGO" in price_df.columns else None
+    if hasattr(code, "item"):
+        code = code.item()
+    memo.put(item_name, code, pos if pos is not None else -1, score)
+
+
+def find_best_match(
+    item_name: str,
+    price_df: pd.DataFrame,
+    memo: Optional[MatchMemo] = None,
+) -> Tuple[Optional[pd.Series], float]:
     """Busca la mejor coincidencia entre el nombre solicitado y la lista de precios.
 
     Args:
         item_name: nombre o descripción del producto proveniente de la licitación.
         price_df: DataFrame con la lista de precios.
+        memo: memoria de coincidencias opcional. Si se entrega, las
+            descripciones ya resueltas para esta versión de la lista de
+            precios no vuelven a recorrerla.
 
     Returns:
         Una tupla con la fila que mejor coincide (o None si no se encuentra)
         y la puntuación de similitud alcanzada.
+
+    La puntuación se calcula sobre la descripción normalizada, la misma que
+    usa la memoria como clave, para que dos escrituras equivalentes obtengan
+    siempre el mismo resultado.
     """
-    best_row = None
-    best_score = 0.0
-    for _, row in price_df.iterrows():
-        score = similarity(item_name, row["DESCRIPCION"])
-        if score > best_score:
-            best_score = score
-            best_row = row
-    return best_row, best_score
+    key = normalize_description(item_name)
+    if memo is not None:
+        memo.bind(price_df)
+        cached = memo.get(key)
+        if cached is not None:
+            _, pos, score = cached
+            return (price_df.iloc[pos] if pos >= 0 else None), score
+    pos, score = _best_match_scan(key, price_df)
+    if memo is not None:
+        _remember(memo, key, price_df, pos, score)
+    return (price_df.iloc[pos] if pos is not None else None), score
+
+
+def find_best_matches(
+    item_names: Sequence[str],
+    price_df: pd.DataFrame,
+    memo: Optional[MatchMemo] = None,
+    workers: Optional[int] = None,
+    min_parallel: int = PARALLEL_MIN_BATCH,
+) -> List[Tuple[Optional[pd.Series], float]]:
+    """Versión por lotes de `find_best_match` para licitaciones con muchas líneas.
+
+    Las descripciones repetidas (comparadas ya normalizadas, como en la
+    memoria) se calculan una sola vez y las que ya están en la memoria no se
+    recalculan. Si quedan al menos `min_parallel`
+    descripciones pendientes, se reparten en bloques entre un
+    `ProcessPoolExecutor`; cada proceso recibe las descripciones de la lista
+    de precios una única vez al iniciarse.
+
+    Args:
+        item_names: nombres o descripciones solicitadas, en el orden de la licitación.
+        price_df: DataFrame con la lista de precios.
+        memo: memoria de coincidencias opcional.
+        workers: número de procesos (por defecto, los núcleos disponibles).
+        min_parallel: mínimo de descripciones pendientes para usar el pool.
+
+    Returns:
+        Lista de tuplas (fila, puntuación) en el mismo orden que `item_names`.
+    """
+    if memo is not None:
+        memo.bind(price_df)
+
+    # Agrupa por la misma clave normalizada que usa la memoria
+    keys = [normalize_description(name) for name in item_names]
+    resueltos: Dict[str, Tuple[Optional[int], float]] = {}
+    pendientes: List[str] = []
+    for key in keys:
+        if key in resueltos:
+            continue
+        cached = memo.get(key) if memo is not None else None
+        if cached is not None:
+            _, pos, score = cached
+            resueltos[key] = (pos if pos >= 0 else None, score)
+        else:
+            resueltos[key] = (None, 0.0)
+            pendientes.append(key)
+
+    workers = workers or os.cpu_count() or 1
+    if len(pendientes) >= min_parallel and workers > 1:
+        descriptions = price_df["DESCRIPCION"].tolist()
+        chunk_size = max(1, -(-len(pendientes) // (workers * 4)))
+        chunks = [pendientes[i:i + chunk_size] for i in range(0, len(pendientes), chunk_size)]
+        log.info("Coincidencias por lotes: %d descripciones en %d procesos", len(pendientes), workers)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_match_worker, initargs=(descriptions,)) as pool:
+            calculados = [res for chunk_res in pool.map(_match_chunk, chunks) for res in chunk_res]
+    else:
+        descriptions = price_df["DESCRIPCION"].tolist()
+        calculados = [_scan_descriptions(name, descriptions) for name in pendientes]
+
+    for key, (pos, score) in zip(pendientes, calculados):
+        resueltos[key] = (pos, score)
+        if memo is not None:
+            _remember(memo, key, price_df, pos, score)
+
+    return [
+        ((price_df.iloc[pos] if pos is not None else None), score)
+        for pos, score in (resueltos[key] for key in keys)
+    ]
 
 
 def classify_match(score: float) -> Optional[int]:
@@ -128,7 +390,7 @@ def classify_match(score: float) -> Optional[int]:
     return None
 
 
-def calculate_offer_price(base_price: float, buyer_budget: Optional[float] = None) -> float:
+def calculate_offer_price(base_price: float, buyer_budget: Optional[float | str] = None) -> float:
     """Calcula el precio ofertado aplicando descuentos.
 
     Si se dispone del presupuesto del comprador, el precio no puede
@@ -139,17 +401,22 @@ def calculate_offer_price(base_price: float, buyer_budget: Optional[float] = Non
     Args:
         base_price: precio listado en la lista de precios.
         buyer_budget: presupuesto asignado por el comprador para el ítem.
+            Si viene como texto del portal ("$ 1.234.567") se interpreta con
+            `agents.common.money.parse_money`; un texto inválido se ignora.
 
     Returns:
         Precio que se debe ofertar.
     """
+    if isinstance(buyer_budget, str):
+        money = parse_money(buyer_budget)
+        buyer_budget = float(money.to_decimal()) if money is not None else None
     if buyer_budget is not None:
         max_price = buyer_budget * (1 - DEFAULT_DISCOUNT)
         return min(base_price, max_price)
     return base_price * (1 - DEFAULT_DISCOUNT)
 
 
-def prepare_offers(page: Page, price_df: pd.DataFrame) -> None:
+def prepare_offers(page: Page, price_df: pd.DataFrame, memo: Optional[MatchMemo] = None) -> None:
     """Recorre las licitaciones activas y prepara las ofertas.
 
     Este procedimiento navega por la lista de licitaciones públicas o
@@ -166,6 +433,7 @@ def prepare_offers(page: Page, price_df: pd.DataFrame) -> None:
     Args:
         page: instancia de Playwright Page con sesión iniciada.
         price_df: DataFrame de la lista de precios.
+        memo: memoria de coincidencias compartida entre licitaciones.
     """
     # Pseudocódigo para ilustrar el flujo.
     # 1. Navegar a la sección de licitaciones públicas/privadas.
@@ -189,8 +457,8 @@ def prepare_offers(page: Page, price_df: pd.DataFrame) -> None:
     #     # Extraer productos
     #     products = extract_products_from_modal(page)
     #     offers: Dict[str, Dict[str, Any]] = {}
-    #     for product in products:
-    #         match_row, score = find_best_match(product["name"], price_df)
+    #     matches = find_best_matches([p["name"] for p in products], price_df, memo)
+    #     for product, (match_row, score) in zip(products, matches):
     #         level = classify_match(score)
     #         if level is None:
     #             log.info("Producto sin coincidencia: %s", product["name"])
@@ -212,6 +480,25 @@ def prepare_offers(page: Page, price_df: pd.DataFrame) -> None:
     log.info("Función prepare_offers: implementar la lógica específica para iterar y ofertar")
 
 
+def write_run_report(memo: MatchMemo, artifacts_dir: str = "artifacts") -> Path:
+    """Exporta el reporte de ejecución con las métricas de la memoria de coincidencias.
+
+    Args:
+        memo: memoria utilizada durante la ejecución.
+        artifacts_dir: carpeta donde se deja el JSON para el dashboard.
+
+    Returns:
+        Ruta del archivo generado.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = Path(artifacts_dir) / f"senegocia_extended_{timestamp}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {"timestamp": timestamp, "match_memo": memo.stats()}
+    path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    log.info("Memoria de coincidencias: %s", report["match_memo"])
+    return path
+
+
 def main() -> int:
     """Punto de entrada principal para ejecutar el agente extendido.
 
@@ -228,6 +515,7 @@ def main() -> int:
 
     parser = argparse.ArgumentParser(description="Agente extendido para Senegocia")
     parser.add_argument("--price_list", required=True, help="Ruta al archivo Excel de precios")
+    parser.add_argument("--memo", default=DEFAULT_MEMO_PATH, help="Ruta a la memoria persistente de coincidencias")
     args = parser.parse_args()
 
     # Cargar lista de precios
@@ -236,6 +524,8 @@ def main() -> int:
         return 1
     price_df = load_price_list(args.price_list)
     log.info("Lista de precios cargada: %d productos", len(price_df))
+    memo = MatchMemo.load(args.memo)
+    memo.bind(price_df)
 
     # Comprobar que existen las credenciales de acceso
     user = os.getenv("SENEGOCIA_USER")
@@ -256,9 +546,11 @@ def main() -> int:
         page.click("button[type='submit']")
         page.wait_for_load_state("networkidle")
         # Llamar al flujo de generación de ofertas
-        prepare_offers(page, price_df)
+        prepare_offers(page, price_df, memo)
         browser.close()
 
+    memo.save()
+    write_run_report(memo)
     return 0
 
 
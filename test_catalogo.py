@@ -0,0 +1,315 @@
+"""Unit tests for catalogo/indice.py and catalogo/cotizador.py"""
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from catalogo.data import Producto, cargar_catalogo_simulado
+    from catalogo.indice import CatalogIndex
+    from catalogo import cotizador
+    import pandas as pd
+    from catalogo.proveedor import CatalogProvider, FuenteCSV, FuenteSheets
+    from catalogo.lote import procesar_lote
+except ImportError:
+    pass  # Module may not be importable without dependencies
+
+
+def productos_prueba():
+    nombres = [
+        "Lápiz Pasta Azul BIC",
+        "Lápiz Pasta Rojo BIC",
+        "Cuaderno Universitario 100 Hojas",
+        "Block de Notas 75x75mm",
+        "Corchetera Metálica",
+    ]
+    return [Producto(f"CM-{i:04d}", n, 100.0 * i, "") for i, n in enumerate(nombres, start=1)]
+
+
+class TestCatalogIndex(unittest.TestCase):
+    """Test cases for CatalogIndex"""
+
+    def setUp(self):
+        self.indice = CatalogIndex(productos_prueba())
+
+    def test_exact_id(self):
+        self.assertEqual(self.indice.buscar(" CM-0003 ").nombre, "Cuaderno Universitario 100 Hojas")
+
+    def test_substring_ignores_case_and_accents(self):
+        self.assertEqual(self.indice.buscar("lapiz pasta").id_convenio, "CM-0001")
+        self.assertEqual(self.indice.buscar("METALICA").id_convenio, "CM-0005")
+        self.assertEqual(self.indice.buscar("75").id_convenio, "CM-0004")
+        self.assertIsNone(self.indice.buscar("tijera"))
+
+    def test_substring_matches_linear_scan(self):
+        """The trigram lookup returns the same first hit as a full scan"""
+        productos = productos_prueba()
+        for consulta in ["a", "pasta", "bic", "de n", "hojas", "rojo bic", "xyz", "uni"]:
+            esperado = next((p for p in productos if consulta in p.nombre.lower().replace("á", "a")), None)
+            self.assertEqual(self.indice.buscar_subcadena(consulta), esperado, consulta)
+
+    def test_tokens(self):
+        ids = [p.id_convenio for p in self.indice.buscar_tokens("bic lápiz")]
+        self.assertEqual(ids, ["CM-0001", "CM-0002"])
+
+    def test_fuzzy_and_suggestions(self):
+        resultados = self.indice.buscar_difuso("cuadreno universitaro")
+        self.assertEqual(resultados[0][0].id_convenio, "CM-0003")
+        self.assertGreater(resultados[0][1], 0.5)
+        self.assertEqual(self.indice.sugerencias("lapis pasta roja", n=2)[0], "CM-0002")
+        self.assertEqual(self.indice.sugerencias("zzzz"), [])
+
+
+class TestCotizador(unittest.TestCase):
+    """Test cases for procesar_archivo_cotizacion"""
+
+    def test_quote_with_suggestions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = os.path.join(tmp, "lista.txt")
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write("CM-0001,3\nlapiz pasta\ncuadreno universitario,2\n")
+            resultado = cotizador.procesar_archivo_cotizacion(ruta)
+
+        registros = resultado.to_dict("records") if hasattr(resultado, "to_dict") else resultado["cotizacion"]
+        no_encontrados = resultado.attrs["no_encontrados"] if hasattr(resultado, "attrs") else resultado["no_encontrados"]
+        sugerencias = resultado.attrs["sugerencias"] if hasattr(resultado, "attrs") else resultado["sugerencias"]
+        self.assertEqual([r["ID_Convenio_Marco"] for r in registros], ["CM-0001", "CM-0001"])
+        self.assertEqual(registros[0]["Subtotal"], 750.0)
+        self.assertEqual(no_encontrados, ["cuadreno universitario"])
+        self.assertEqual(sugerencias["cuadreno universitario"][0], "CM-0002")
+
+    def test_columnar_matches_row_by_row(self):
+        """The vectorized path gives the same rows as the per-item loop"""
+        indice = CatalogIndex(productos_prueba())
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = os.path.join(tmp, "lista.csv")
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write("Producto,Cantidad\nCM-0003,2\n lápiz pasta rojo ,x\nno existe,4\nCM-0003,1.9\n,3\nCORCHETERA,\nno existe,1\n")
+            resultado = cotizador.procesar_archivo_cotizacion(ruta, indice=indice)
+
+            esperado = []
+            no_encontrados = []
+            for e in cotizador._leer_archivo_generico(ruta):
+                prod = indice.buscar(e["entrada"])
+                if prod is None:
+                    no_encontrados.append(e["entrada"])
+                    continue
+                esperado.append([prod.id_convenio, prod.nombre, prod.precio, e["cantidad"], prod.url_imagen,
+                                 prod.precio * e["cantidad"]])
+
+        self.assertEqual(list(resultado.columns), cotizador.COLUMNAS_COTIZACION)
+        self.assertEqual(resultado.values.tolist(), esperado)
+        self.assertEqual([r[3] for r in esperado], [2, 1, 1, 1])
+        self.assertEqual(resultado.attrs["no_encontrados"], no_encontrados)
+        self.assertEqual(no_encontrados, ["no existe", "no existe"])  # la fila sin producto se omite
+        self.assertEqual(str(resultado["Cantidad"].dtype), "int64")
+
+    def test_streaming_blocks_and_writers(self):
+        """Small blocks give the same quote as one pass, in CSV and XLSX"""
+        from openpyxl import Workbook, load_workbook
+
+        indice = CatalogIndex(productos_prueba())
+        filas = [("CM-0001", 2), ("bic", 1), ("nada", 3), ("CM-0005", 7)] * 5
+        with tempfile.TemporaryDirectory() as tmp:
+            entrada_csv = os.path.join(tmp, "lista.csv")
+            with open(entrada_csv, "w", encoding="utf-8") as f:
+                f.write("Producto,Cantidad\n" + "".join(f"{a},{b}\n" for a, b in filas))
+            entrada_xlsx = os.path.join(tmp, "lista.xlsx")
+            wb = Workbook()
+            wb.active.append(["Producto", "Cantidad"])
+            for fila in filas:
+                wb.active.append(list(fila))
+            wb.save(entrada_xlsx)
+
+            completo = cotizador.procesar_archivo_cotizacion(entrada_csv, indice=indice)
+            bloques = list(cotizador.iterar_bloques_entradas(entrada_xlsx, tamano_bloque=3))
+            self.assertEqual(len(bloques), 7)
+            self.assertEqual(next(cotizador.iterar_entradas(entrada_xlsx)), {"entrada": "CM-0001", "cantidad": 2})
+
+            for entrada in (entrada_csv, entrada_xlsx):
+                for salida in ("out.csv", "out.xlsx"):
+                    ruta_salida = os.path.join(tmp, salida)
+                    resumen = cotizador.cotizar_a_archivo(entrada, ruta_salida, indice=indice, tamano_bloque=3)
+                    self.assertEqual(resumen["items"], 15)
+                    self.assertEqual(resumen["no_encontrados"], ["nada"] * 5)
+                    if salida.endswith(".csv"):
+                        escrito = pd.read_csv(ruta_salida)
+                    else:
+                        ws = load_workbook(ruta_salida, read_only=True).active
+                        valores = list(ws.iter_rows(values_only=True))
+                        escrito = pd.DataFrame(valores[1:], columns=valores[0])
+                    escrito["URL_Imagen"] = escrito["URL_Imagen"].fillna("")
+                    self.assertEqual(escrito.values.tolist(), completo.values.tolist(), (entrada, salida))
+
+    def test_buscar_producto_accepts_dict(self):
+        catalogo = cargar_catalogo_simulado()
+        self.assertEqual(cotizador._buscar_producto(catalogo, "block").id_convenio, "CM-0003")
+
+    def test_dict_catalog_indexed_once(self):
+        catalogo = cargar_catalogo_simulado()
+        with patch.object(CatalogIndex, "desde_catalogo", wraps=CatalogIndex.desde_catalogo) as construir:
+            for _ in range(5):
+                self.assertEqual(cotizador._buscar_producto(catalogo, "block").id_convenio, "CM-0003")
+            self.assertEqual(construir.call_count, 1)
+            catalogo["CM-9999"] = Producto("CM-9999", "Tijera Escolar", 990.0, "")
+            self.assertEqual(cotizador._buscar_producto(catalogo, "tijera").id_convenio, "CM-9999")
+            self.assertEqual(construir.call_count, 2)
+
+
+class FakeSpreadsheet:
+    def __init__(self, registros):
+        self.registros = registros
+        self.actualizado = "2025-01-01T00:00:00Z"
+        self.lecturas = 0
+
+    def get_lastUpdateTime(self):
+        return self.actualizado
+
+    def worksheet(self, tab):
+        planilla = self
+
+        class Hoja:
+            def get_all_records(self):
+                planilla.lecturas += 1
+                return planilla.registros
+
+        return Hoja()
+
+
+class TestCatalogProvider(unittest.TestCase):
+    """Test cases for CatalogProvider"""
+
+    def escribir_csv(self, ruta, filas):
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write("ID_Convenio_Marco,Nombre_Producto,Precio_Unitario,URL_Imagen\n")
+            for fila in filas:
+                f.write(",".join(fila) + "\n")
+
+    def test_csv_loads_once_and_reloads_on_change(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = os.path.join(tmp, "catalogo.csv")
+            self.escribir_csv(ruta, [("CM-1", "Resma Carta", "3.490", "")])
+            reloj = [0.0]
+            proveedor = CatalogProvider(FuenteCSV(ruta), intervalo_revision=10, reloj=lambda: reloj[0])
+
+            primero = proveedor.snapshot()
+            self.assertEqual(primero.productos["CM-1"].precio, 3490.0)
+            self.assertIs(proveedor.snapshot(), primero)
+
+            self.escribir_csv(ruta, [("CM-1", "Resma Carta", "3.490", ""), ("CM-2", "Resma Oficio", "3.990", "")])
+            os.utime(ruta, ns=(0, os.stat(ruta).st_mtime_ns + 10**9))
+            self.assertIs(proveedor.snapshot(), primero)  # aún dentro del intervalo
+            reloj[0] = 11.0
+            segundo = proveedor.snapshot()
+            self.assertIsNot(segundo, primero)
+            self.assertEqual(segundo.indice.buscar("oficio").id_convenio, "CM-2")
+            self.assertEqual(len(primero.productos), 1)  # el snapshot viejo no se modifica
+
+            metricas = proveedor.metricas()
+            self.assertEqual(metricas["productos"], 2)
+            self.assertEqual(metricas["recargas"], 2)
+            self.assertIsNotNone(metricas["duracion_carga_s"])
+
+            os.remove(ruta)
+            reloj[0] = 30.0
+            self.assertIs(proveedor.snapshot(), segundo)  # un error conserva el snapshot
+            self.assertEqual(proveedor.metricas()["errores_recarga"], 1)
+
+    def test_sheets_reloads_only_when_updated(self):
+        planilla = FakeSpreadsheet([{"ID_Convenio_Marco": "CM-9", "Nombre_Producto": "Tijera", "Precio_Unitario": 990}])
+        proveedor = CatalogProvider(FuenteSheets("Catalogo", abrir=lambda: planilla), intervalo_revision=0)
+        self.assertEqual(proveedor.indice.buscar("tijera").precio, 990.0)
+        proveedor.snapshot()
+        self.assertEqual(planilla.lecturas, 1)
+        planilla.actualizado = "2025-01-02T00:00:00Z"
+        proveedor.snapshot()
+        self.assertEqual(planilla.lecturas, 2)
+
+
+class TestLote(unittest.TestCase):
+    """Test cases for the batch cotizador"""
+
+    def test_batch_pool_matches_sequential(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            catalogo = os.path.join(tmp, "catalogo.csv")
+            with open(catalogo, "w", encoding="utf-8") as f:
+                f.write("ID_Convenio_Marco,Nombre_Producto,Precio_Unitario\nCM-1,Resma Carta,3490\nCM-2,Resma Oficio,3990\n")
+            listas = os.path.join(tmp, "listas")
+            os.makedirs(listas)
+            for i, contenido in enumerate(["CM-1,2\ntijera\n", "resma oficio\ntijera\ngrapas\n", "CM-2,5\n"]):
+                with open(os.path.join(listas, f"lista{i}.txt"), "w", encoding="utf-8") as f:
+                    f.write(contenido)
+            with open(os.path.join(listas, "lista0.csv"), "w", encoding="utf-8") as f:
+                f.write("Producto,Cantidad\nresma carta,1\n")
+
+            secuencial = procesar_lote(listas, os.path.join(tmp, "a"), workers=1, fuente=catalogo)
+            paralelo = procesar_lote(os.path.join(listas, "*"), os.path.join(tmp, "b"), workers=2, fuente=catalogo)
+
+            for lote in (secuencial, paralelo):
+                self.assertEqual(len(lote["resultados"]), 4)
+                self.assertEqual(lote["no_encontrados"][0]["Entrada"], "tijera")
+                self.assertEqual(lote["no_encontrados"][0]["Veces"], 2)
+                self.assertEqual(lote["no_encontrados"][0]["Archivos"], "lista0.txt;lista1.txt")
+                self.assertTrue(os.path.exists(lote["resumen"]))
+            salidas = sorted(os.listdir(os.path.join(tmp, "b")))
+            self.assertIn("lista0_csv_cotizacion.csv", salidas)
+            self.assertIn("lista0_txt_cotizacion.csv", salidas)
+            for a, b in zip(secuencial["resultados"], paralelo["resultados"]):
+                with open(a["salida"], encoding="utf-8") as fa, open(b["salida"], encoding="utf-8") as fb:
+                    self.assertEqual(fa.read(), fb.read())
+
+    def test_rerun_ignores_previous_outputs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            catalogo = os.path.join(tmp, "catalogo.csv")
+            with open(catalogo, "w", encoding="utf-8") as f:
+                f.write("ID_Convenio_Marco,Nombre_Producto,Precio_Unitario\nCM-1,Resma Carta,3490\n")
+            listas = os.path.join(tmp, "listas")
+            os.makedirs(listas)
+            with open(os.path.join(listas, "lista.txt"), "w", encoding="utf-8") as f:
+                f.write("CM-1,2\ntijera\n")
+
+            salida = os.path.join(listas, "cotizaciones")
+            for patron in (listas, os.path.join(listas, "*"), os.path.join(listas, "*", "*"), os.path.join(listas, "**")):
+                for _ in range(2):
+                    lote = procesar_lote(patron, salida, workers=1, fuente=catalogo)
+                esperado = 0 if patron.endswith(os.path.join("*", "*")) else 1
+                self.assertEqual(len(lote["resultados"]), esperado, patron)
+            self.assertEqual(sorted(os.listdir(salida)), ["lista_cotizacion.csv", "resumen_no_encontrados.csv"])
+
+            with self.assertRaises(ValueError):
+                procesar_lote(listas, listas, workers=1, fuente=catalogo)
+
+    def test_same_name_in_different_directories(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            catalogo = os.path.join(tmp, "catalogo.csv")
+            with open(catalogo, "w", encoding="utf-8") as f:
+                f.write("ID_Convenio_Marco,Nombre_Producto,Precio_Unitario\nCM-1,Resma Carta,3490\nCM-2,Resma Oficio,3990\n")
+            listas = {
+                os.path.join("x", "a.txt"): "CM-1,2\n",
+                os.path.join("y", "a.txt"): "CM-2,5\n",
+                os.path.join("z", "a.txt"): "resma carta\n",
+                os.path.join("x", "a_2.txt"): "resma oficio\n",
+            }
+            for relativa, contenido in listas.items():
+                ruta = os.path.join(tmp, "listas", relativa)
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                with open(ruta, "w", encoding="utf-8") as f:
+                    f.write(contenido)
+
+            salida = os.path.join(tmp, "salida")
+            lote = procesar_lote(os.path.join(tmp, "listas", "*", "*.txt"), salida, workers=1, fuente=catalogo)
+            rutas = [r["salida"] for r in lote["resultados"]]
+            self.assertEqual(len(set(rutas)), 4)
+            self.assertEqual(len(os.listdir(salida)), 5)
+            esperado = {"CM-1,2": "CM-1", "CM-2,5": "CM-2", "resma carta": "CM-1", "resma oficio": "CM-2"}
+            for res in lote["resultados"]:
+                with open(res["entrada"], encoding="utf-8") as fe, open(res["salida"], encoding="utf-8") as fs:
+                    self.assertIn(esperado[fe.read().strip()], fs.read(), res["entrada"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,251 @@
+"""Unit tests for contacts_scraper.py"""
+import asyncio
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import contacts_scraper
+except ImportError:
+    pass  # Module may not be importable without dependencies
+
+
+SITIOS = {
+    "https://hospital.cl/": '<title>Hospital Regional</title><a href="/contacto">Contacto</a>',
+    "https://hospital.cl/contacto": "<title>Contacto</title> compras@hospital.cl",
+    "https://muni.cl/": "<title>Municipalidad</title> oficina@muni.cl <a href='/equipo'>Equipo</a>",
+    "https://muni.cl/equipo": "<title>Equipo</title> alcaldia@muni.cl",
+    "https://muni.cl/otra": "<title>Otra</title> partes@muni.cl",
+}
+
+
+class PaginaFalsa:
+    def __init__(self, navegador):
+        self.navegador = navegador
+        self.html = ""
+
+    async def goto(self, url, **kwargs):
+        if url not in SITIOS:
+            raise RuntimeError(f"404 {url}")
+        self.navegador.activas += 1
+        self.navegador.max_activas = max(self.navegador.max_activas, self.navegador.activas)
+        await asyncio.sleep(0.01)
+        self.navegador.activas -= 1
+        self.html = SITIOS[url]
+
+    async def content(self):
+        return self.html
+
+
+class ContextoFalso:
+    def __init__(self, navegador):
+        self.navegador = navegador
+        self.cerrado = False
+
+    async def new_page(self):
+        return PaginaFalsa(self.navegador)
+
+    async def close(self):
+        self.cerrado = True
+
+
+class NavegadorFalso:
+    """Un solo navegador: cuenta contextos y páginas cargándose a la vez."""
+
+    def __init__(self):
+        self.contextos = []
+        self.activas = 0
+        self.max_activas = 0
+
+    async def new_context(self, **kwargs):
+        contexto = ContextoFalso(self)
+        self.contextos.append(contexto)
+        return contexto
+
+
+class RespuestaFalsa:
+    def __init__(self, html, status_code=200, content_type="text/html; charset=utf-8"):
+        self.content = html.encode("utf-8")
+        self.status_code = status_code
+        self.headers = {"Content-Type": content_type}
+        self.encoding = "utf-8"
+
+
+class SesionFalsa:
+    """`requests.Session` falsa: sirve `respuestas` y anota las URLs pedidas."""
+
+    def __init__(self, respuestas):
+        self.respuestas = respuestas
+        self.pedidas = []
+
+    def get(self, url, timeout=None):
+        self.pedidas.append(url)
+        return self.respuestas[url]
+
+
+class TestCrawlSeeds(unittest.TestCase):
+    """Tests for crawling several seeds with one shared browser"""
+
+    def crawl(self, navegador, seeds, workers):
+        return asyncio.run(contacts_scraper.crawl_seeds(
+            navegador, seeds, max_pages=10, max_depth=2, per_domain_delay=0, workers=workers,
+        ))
+
+    def test_one_context_per_seed_and_all_closed(self):
+        navegador = NavegadorFalso()
+        filas = self.crawl(navegador, ["https://hospital.cl/", "https://muni.cl/", "https://muni.cl/otra"], workers=4)
+        self.assertEqual(len(navegador.contextos), 3)
+        self.assertTrue(all(c.cerrado for c in navegador.contextos))
+        emails = {f["email"] for f in filas}
+        self.assertEqual(emails, {"compras@hospital.cl", "oficina@muni.cl", "alcaldia@muni.cl", "partes@muni.cl"})
+
+    def test_domains_crawled_concurrently(self):
+        navegador = NavegadorFalso()
+        self.crawl(navegador, ["https://hospital.cl/", "https://muni.cl/"], workers=2)
+        self.assertEqual(navegador.max_activas, 2)
+
+    def test_workers_limit_and_same_domain_sequential(self):
+        navegador = NavegadorFalso()
+        self.crawl(navegador, ["https://hospital.cl/", "https://muni.cl/"], workers=1)
+        self.assertEqual(navegador.max_activas, 1)
+        navegador = NavegadorFalso()
+        self.crawl(navegador, ["https://muni.cl/", "https://muni.cl/otra"], workers=4)
+        self.assertEqual(navegador.max_activas, 1)
+
+    def test_failing_seed_does_not_stop_others(self):
+        navegador = NavegadorFalso()
+
+        async def new_context_falla(**kwargs):
+            if not navegador.contextos:
+                navegador.contextos.append(None)
+                raise RuntimeError("contexto")
+            return await NavegadorFalso.new_context(navegador, **kwargs)
+
+        navegador.new_context = new_context_falla
+        filas = self.crawl(navegador, ["https://hospital.cl/", "https://muni.cl/"], workers=1)
+        self.assertEqual({f["institucion"] for f in filas}, {"muni.cl"})
+
+
+class TestTieredFetch(unittest.TestCase):
+    """Tests for HTTP-first fetching with browser fallback"""
+
+    def crawl(self, navegador, sesion, seeds, stats):
+        return asyncio.run(contacts_scraper.crawl_seeds(
+            navegador, seeds, max_pages=10, max_depth=2, per_domain_delay=0,
+            workers=2, session=sesion, stats=stats,
+        ))
+
+    def test_static_site_never_opens_browser(self):
+        navegador = NavegadorFalso()
+        sesion = SesionFalsa({
+            "https://hospital.cl/": RespuestaFalsa(
+                "<title>Hospital Regional</title><p>Bienvenidos al portal del hospital.</p>"
+                '<a href="/contacto">Contacto</a>'
+            ),
+            "https://hospital.cl/contacto": RespuestaFalsa(SITIOS["https://hospital.cl/contacto"]),
+        })
+        stats = {}
+        filas = self.crawl(navegador, sesion, ["https://hospital.cl/"], stats)
+        self.assertEqual(navegador.contextos, [])
+        self.assertEqual({f["email"] for f in filas}, {"compras@hospital.cl"})
+        self.assertEqual(stats["hospital.cl"].http, 2)
+        self.assertEqual(stats["hospital.cl"].escalation_rate, 0.0)
+
+    def test_script_rendered_page_escalates(self):
+        navegador = NavegadorFalso()
+        sesion = SesionFalsa({
+            "https://muni.cl/": RespuestaFalsa('<html><body><div id="app"></div><script src="/app.js"></script></body></html>'),
+            "https://muni.cl/equipo": RespuestaFalsa("<p>" + "Equipo municipal y oficinas " * 3 + "alcaldia@muni.cl</p>"),
+        })
+        stats = {}
+        filas = self.crawl(navegador, sesion, ["https://muni.cl/"], stats)
+        self.assertEqual(len(navegador.contextos), 1)
+        self.assertTrue(navegador.contextos[0].cerrado)
+        self.assertEqual({f["email"] for f in filas}, {"oficina@muni.cl", "alcaldia@muni.cl"})
+        self.assertEqual((stats["muni.cl"].http, stats["muni.cl"].browser), (1, 1))
+        self.assertEqual(stats["muni.cl"].escalation_rate, 0.5)
+
+    def test_blocked_or_failed_request_escalates_and_non_html_is_skipped(self):
+        navegador = NavegadorFalso()
+        sesion = SesionFalsa({
+            "https://hospital.cl/": RespuestaFalsa("Forbidden", status_code=403),
+            "https://hospital.cl/contacto": RespuestaFalsa("%PDF-1.4", content_type="application/pdf"),
+        })
+        stats = {}
+        self.crawl(navegador, sesion, ["https://hospital.cl/"], stats)
+        self.assertEqual((stats["hospital.cl"].http, stats["hospital.cl"].browser), (0, 1))
+        self.assertEqual(sesion.pedidas, ["https://hospital.cl/", "https://hospital.cl/contacto"])
+
+    def test_looks_script_rendered(self):
+        def revisar(html):
+            return contacts_scraper.looks_script_rendered(html, contacts_scraper.parse_page(html))
+
+        texto = "Dirección de compras públicas del servicio. "
+        self.assertTrue(revisar(""))
+        self.assertTrue(revisar("<html><body><script>render()</script></body></html>"))
+        self.assertTrue(revisar(f"<p>{texto}<a href='/x'>x</a></p><noscript>Please enable JavaScript</noscript>"))
+        self.assertTrue(revisar(f"<p>{texto}</p>"))
+        self.assertFalse(revisar(f"<p>{texto} compras@hospital.cl</p>"))
+        self.assertFalse(revisar(
+            f"<p>{texto}<a href='/x'>x</a></p>"
+            "<noscript><iframe src='https://www.googletagmanager.com/ns.html'></iframe></noscript>"
+        ))
+
+
+class TestFrontier(unittest.TestCase):
+    """Tests for the priority frontier and canonical URL dedup"""
+
+    def test_canonicalize_url(self):
+        c = contacts_scraper.canonicalize_url
+        self.assertEqual(c("https://Muni.CL:443/equipo/?b=2&a=1#top"), c("http://muni.cl/equipo?a=1&b=2"))
+        self.assertEqual(c("https://muni.cl"), c("https://muni.cl/"))
+        self.assertNotEqual(c("https://muni.cl/equipo"), c("https://muni.cl/equipo?a=1"))
+        self.assertNotEqual(c("https://muni.cl:8080/"), c("https://muni.cl/"))
+        self.assertEqual(c("mailto:x@muni.cl"), "mailto:x@muni.cl")
+
+    def test_pops_by_score_then_depth_then_insertion(self):
+        frontera = contacts_scraper.Frontier()
+        frontera.push("https://x.cl/a", 1, 0)
+        frontera.push("https://x.cl/b", 2, 3)
+        frontera.push("https://x.cl/c", 1, 3)
+        frontera.push("https://x.cl/d", 1, 0)
+        orden = [frontera.pop()[0] for _ in range(len(frontera))]
+        self.assertEqual(orden, ["https://x.cl/c", "https://x.cl/b", "https://x.cl/a", "https://x.cl/d"])
+
+    def test_push_ignores_seen_canonical_urls(self):
+        frontera = contacts_scraper.Frontier()
+        self.assertTrue(frontera.push("https://x.cl/contacto/", 1, 2))
+        self.assertFalse(frontera.push("https://x.cl/contacto#mapa", 2, 5))
+        self.assertEqual(len(frontera), 1)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = contacts_scraper.BloomFilter(5000, 0.01)
+        urls = [f"//x.cl/p/{i}" for i in range(5000)]
+        for u in urls:
+            bloom.add(u)
+        self.assertTrue(all(u in bloom for u in urls))
+        falsos = sum(f"//x.cl/q/{i}" in bloom for i in range(5000))
+        self.assertLess(falsos, 150)
+
+    def test_crawl_finds_best_link_anywhere_and_fetches_each_page_once(self):
+        relleno = "".join(f'<a href="/p{i}">Noticia {i}</a>' for i in range(15))
+        sitio = {
+            "https://x.cl/": f'<p>Portal institucional del servicio.</p>{relleno}<a href="/contacto/">Contacto</a>',
+            "https://x.cl/contacto/": '<p>Escríbanos a compras@x.cl</p><a href="/">Inicio</a><a href="/contacto#form">Formulario</a>',
+        }
+        for i in range(15):
+            sitio[f"https://x.cl/p{i}"] = f'<p>Noticia {i} del servicio público regional.</p><a href="/contacto">Contacto</a>'
+        sesion = SesionFalsa({url: RespuestaFalsa(html) for url, html in sitio.items()})
+        filas = asyncio.run(contacts_scraper.crawl_site(
+            NavegadorFalso(), "https://x.cl/", max_pages=2, max_depth=3,
+            per_domain_delay=0, session=sesion, bloom_capacity=1000,
+        ))
+        self.assertEqual(sesion.pedidas, ["https://x.cl/", "https://x.cl/contacto/"])
+        self.assertEqual([f["email"] for f in filas], ["compras@x.cl"])
+
+
+if __name__ == '__main__':
+    unittest.main()
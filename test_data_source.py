@@ -3,6 +3,7 @@ import unittest
 from unittest.mock import Mock, patch, MagicMock
 import sys
 import os
+import tempfile
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -125,5 +126,87 @@ class TestDataSource(unittest.TestCase):
             pass
 
 
+def escribir_tab(directorio, tab, filas):
+    with open(os.path.join(directorio, f"{tab}.csv"), "w", encoding="utf-8") as f:
+        f.write("\n".join(filas) + "\n")
+
+
+class RelojFalso:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+class TestSheetsDataSource(unittest.TestCase):
+    """Test cases for the cached, batched SheetsDataSource"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        escribir_tab(self.dir, "Catalogo", ["id,nombre,precio", "CM-1,Lápiz,250", "CM-2,Cuaderno,1890.5"])
+        escribir_tab(self.dir, "Stock", ["id,stock", "CM-1,7"])
+        self.reloj = RelojFalso()
+        self.backend = data_source.LocalBackend(self.dir)
+        self.fuente = data_source.SheetsDataSource(self.backend, ttl_s=60, reloj=self.reloj)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_records_like_gspread(self):
+        df = self.fuente.fetch("Catalogo")
+        self.assertEqual(df.to_dict("records"), [
+            {"id": "CM-1", "nombre": "Lápiz", "precio": 250},
+            {"id": "CM-2", "nombre": "Cuaderno", "precio": 1890.5},
+        ])
+        self.assertEqual(data_source._records([["a", "b"], ["1"]]), [{"a": 1, "b": ""}])
+
+    def test_ttl_and_revision(self):
+        self.fuente.fetch_many(["Catalogo", "Stock"])
+        self.assertEqual(self.backend.llamadas, 2)  # revisión + un lote
+        self.fuente.fetch("Catalogo")
+        self.assertEqual(self.backend.llamadas, 2)
+        self.reloj.t = 61
+        self.fuente.fetch("Catalogo")
+        self.assertEqual(self.backend.llamadas, 3)  # solo la revisión
+        escribir_tab(self.dir, "Stock", ["id,stock", "CM-1,3"])
+        os.utime(os.path.join(self.dir, "Stock.csv"), ns=(1, 1))
+        self.reloj.t = 200
+        self.assertEqual(self.fuente.fetch("Stock")["stock"].tolist(), [3])
+
+    def test_snapshot_on_disk_shared(self):
+        snap = os.path.join(self.dir, "snap")
+        data_source.SheetsDataSource(self.backend, ttl_s=60, snapshot_dir=snap, reloj=self.reloj).fetch("Catalogo")
+        otro_backend = data_source.LocalBackend(self.dir)
+        otra = data_source.SheetsDataSource(otro_backend, ttl_s=60, snapshot_dir=snap, reloj=self.reloj)
+        self.assertEqual(len(otra.fetch("Catalogo")), 2)
+        self.assertEqual(otro_backend.llamadas, 0)
+
+    def test_returns_copies(self):
+        df = self.fuente.fetch("Stock")
+        df.loc[0, "stock"] = 999
+        self.assertEqual(self.fuente.fetch("Stock")["stock"].tolist(), [7])
+
+    def test_gspread_batch_get(self):
+        planilla = MagicMock()
+        planilla.get_lastUpdateTime.return_value = "2024-01-01T00:00:00Z"
+        planilla.values_batch_get.return_value = {"valueRanges": [
+            {"values": [["id", "precio"], ["CM-1", "250"]]},
+            {"values": [["id"], ["CM-9"]]},
+        ]}
+        backend = data_source.GspreadBackend("Hoja")
+        backend._spreadsheet = planilla
+        tablas = data_source.SheetsDataSource(backend).fetch_many(["Catalogo", "Stock"])
+        planilla.values_batch_get.assert_called_once_with(["'Catalogo'", "'Stock'"])
+        self.assertEqual(tablas["Catalogo"].to_dict("records"), [{"id": "CM-1", "precio": 250}])
+        self.assertEqual(tablas["Stock"]["id"].tolist(), ["CM-9"])
+
+    def test_fetch_offline_backend(self):
+        with patch.dict(os.environ, {"DATA_SOURCE_BACKEND": f"local:{self.dir}"}):
+            self.assertEqual(len(data_source.fetch("Catalogo")), 2)
+            self.assertEqual(sorted(data_source.fetch_many(["Catalogo", "Stock"])), ["Catalogo", "Stock"])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,125 @@
+"""Unit tests for agents/common/html_extract.py"""
+import unittest
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from bs4 import BeautifulSoup
+    from agents.common import html_extract
+    from catalogo import scraper
+    from scripts import monitor_convenio
+except ImportError:
+    pass  # Module may not be importable without dependencies
+
+
+PAGINA = """<html><head><title>
+  Contacto | Hospital  Regional </title>
+<meta property="og:image" content=" https://x.cl/og.jpg ">
+<meta name="description" content="Portal">
+</head><body>
+<div class="card destacado" data-product-url="https://prisa.cl/p/9"></div>
+<a class="product-item-link otra" href=" https://prisa.cl/p/1 ">Lápiz <b>Azul</b></a>
+<a itemprop="url" href="/p/2">Segundo</a>
+<a name="sin-href">x</a>
+<img class="product image" src="https://img/1.jpg">
+<table class="ofertas">
+  <tr><th>Vendedor</th><th>Precio</th></tr>
+  <tr><td class="col-vendedor">Proveedor A</td><td class="col-precio">$ 1.990</td><td class="col-stock">12 u</td></tr>
+  <tr><td class="col-vendedor">Proveedor B</td><td class="col-precio">$ 1.490</td></tr>
+</table>
+</body></html>"""
+
+
+class TestSelectores(unittest.TestCase):
+    """Test cases for the CSS subset and the single-pass extraction"""
+
+    def setUp(self):
+        self.arbol = html_extract.parsear(PAGINA)
+        self.soup = BeautifulSoup(PAGINA, "html.parser")
+
+    def test_selectors_match_beautifulsoup(self):
+        for selector in [
+            "a.product-item-link, a[itemprop='url']",
+            "[data-product-url]",
+            "img#image, img.fotorama__img, img.product.image",
+            "table.ofertas tr",
+            ".col-precio",
+            "a[itemprop=url]",
+            "div.card.destacado",
+        ]:
+            esperado = [" ".join(e.get_text().split()) for e in self.soup.select(selector)]
+            obtenido = [html_extract.texto(e) for e in html_extract.seleccionar(self.arbol, selector)]
+            self.assertEqual(obtenido, esperado, selector)
+
+    def test_descendant_selector_excludes_context_node(self):
+        fila = html_extract.seleccionar(self.arbol, "table.ofertas tr")[1]
+        celda = html_extract.seleccionar_uno(fila, ".col-precio")
+        self.assertEqual(html_extract.seleccionar(celda, "td"), [])
+        self.assertEqual(html_extract.seleccionar(celda, ".col-precio"), [])
+        self.assertEqual(len(html_extract.seleccionar(fila, "td")), 3)
+
+    def test_attribute_values_with_quotes(self):
+        arbol = html_extract.parsear(
+            """<p title="O'Higgins">a</p><p title='dijo"hola"'>b</p>"""
+            """<p title="O'Higgins&quot;centro&quot;">c</p>"""
+        )
+        for selector, esperado in [
+            ("""p[title="O'Higgins"]""", ["a"]),
+            ("""p[title='dijo"hola"']""", ["b"]),
+            ("""p[title=O'Higgins]""", ["a"]),
+            ("""p[title=O'Higgins"centro"]""", ["c"]),
+        ]:
+            obtenido = [html_extract.texto(e) for e in html_extract.seleccionar(arbol, selector)]
+            self.assertEqual(obtenido, esperado, selector)
+
+    def test_parse_xml_declaration_and_empty_bodies(self):
+        declarada = '<?xml version="1.0" encoding="utf-8"?>\n' + PAGINA
+        self.assertEqual(html_extract.titulo(html_extract.parsear(declarada)), "Contacto | Hospital Regional")
+        self.assertEqual(scraper._parsear_prisa_busqueda(declarada), "https://prisa.cl/p/1")
+        for vacio in ["   \n\t", "<!-- sin contenido -->", b"  "]:
+            arbol = html_extract.parsear(vacio)
+            self.assertEqual(html_extract.seleccionar(arbol, "a"), [])
+            self.assertIsNone(scraper._parsear_prisa_imagen_producto(vacio))
+            self.assertEqual(html_extract.extraer_pagina(vacio).enlaces, [])
+
+    def test_title_links_meta(self):
+        self.assertEqual(html_extract.titulo(self.arbol), "Contacto | Hospital Regional")
+        self.assertEqual(html_extract.metas(self.arbol), {"og:image": "https://x.cl/og.jpg", "description": "Portal"})
+        enlaces = html_extract.enlaces(self.arbol, base="https://prisa.cl/buscar")
+        self.assertEqual(enlaces, [("https://prisa.cl/p/1", "Lápiz Azul"), ("https://prisa.cl/p/2", "Segundo")])
+
+    def test_single_pass_matches_tree(self):
+        pagina = html_extract.extraer_pagina(PAGINA, base="https://prisa.cl/buscar")
+        self.assertEqual(pagina.titulo, html_extract.titulo(self.arbol))
+        self.assertEqual(pagina.metas, html_extract.metas(self.arbol))
+        self.assertEqual(pagina.enlaces, html_extract.enlaces(self.arbol, base="https://prisa.cl/buscar"))
+        self.assertEqual(html_extract.extraer_pagina("").enlaces, [])
+
+    def test_price_rows(self):
+        filas = html_extract.filas_precio(
+            self.arbol, "table.ofertas tr",
+            {"vendedor": ".col-vendedor", "precio": ".col-precio", "stock": ".col-stock"},
+        )
+        self.assertEqual(filas[0], {"vendedor": None, "precio": None, "stock": None})
+        self.assertEqual(filas[1], {"vendedor": "Proveedor A", "precio": "$ 1.990", "stock": "12 u"})
+        self.assertIsNone(filas[2]["stock"])
+
+    def test_callers(self):
+        self.assertEqual(scraper._parsear_prisa_busqueda(PAGINA), "https://prisa.cl/p/1")
+        self.assertEqual(scraper._parsear_prisa_imagen_producto(PAGINA), "https://img/1.jpg")
+        self.assertEqual(scraper._parsear_prisa_imagen_producto('<meta property="og:image" content="o.jpg">'), "o.jpg")
+        self.assertIsNone(scraper._parsear_prisa_busqueda("<html><body>sin resultados</body></html>"))
+
+        respuesta = MagicMock(text=PAGINA)
+        with patch.object(monitor_convenio.requests, "get", return_value=respuesta):
+            ofertas = monitor_convenio.scrap_ofertas("https://x")
+        self.assertEqual([(o.vendedor, o.precio, o.stock) for o in ofertas],
+                         [("Proveedor B", 1490.0, None), ("Proveedor A", 1990.0, 12)])
+
+
+if __name__ == '__main__':
+    unittest.main()
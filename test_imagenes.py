@@ -0,0 +1,184 @@
+"""Unit tests for catalogo/imagenes.py"""
+import unittest
+import sys
+import os
+import csv
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from catalogo import imagenes
+    from catalogo.imagenes import AlmacenImagenes, extension_imagen, sincronizar_imagenes
+except ImportError:
+    pass  # Module may not be importable without dependencies
+
+
+PNG_A = b"\x89PNG\r\n\x1a\n" + b"a" * 32
+PNG_B = b"\x89PNG\r\n\x1a\n" + b"b" * 32
+
+
+class RespuestaFalsa:
+    def __init__(self, status, content=b"", headers=None):
+        self.status_code = status
+        self.content = content
+        self.headers = headers or {}
+
+
+class SesionFalsa:
+    """Sirve `contenidos[url]` con ETag; responde 304 si el ETag coincide."""
+
+    def __init__(self, contenidos):
+        self.contenidos = contenidos
+        self.pedidas = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.pedidas.append(url)
+        if url not in self.contenidos:
+            return RespuestaFalsa(404)
+        datos = self.contenidos[url]
+        etag = f'"{hash(datos)}"'
+        if headers and headers.get("If-None-Match") == etag:
+            return RespuestaFalsa(304)
+        return RespuestaFalsa(200, datos, {"ETag": etag})
+
+
+def escribir_catalogo(ruta, filas):
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ID_Convenio_Marco", "Nombre_Producto", "URL_Imagen"])
+        writer.writerows(filas)
+
+
+def leer_catalogo(ruta):
+    with open(ruta, newline="", encoding="utf-8") as f:
+        return {r["ID_Convenio_Marco"]: r for r in csv.DictReader(f)}
+
+
+class TestAlmacenImagenes(unittest.TestCase):
+    """Test cases for the content-addressed image store"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = os.path.join(self.tmp.name, "imagenes")
+        self.csv = os.path.join(self.tmp.name, "catalogo.csv")
+        escribir_catalogo(self.csv, [
+            ["CM-0001", "Lápiz", "https://a.cl/1.png"],
+            ["CM-0002", "Lápiz rojo", "https://b.cl/copia.png"],
+            ["CM-0003", "Cuaderno", "https://a.cl/2.png"],
+            ["CM-0004", "Sin imagen", ""],
+            ["CM-0005", "Rota", "https://a.cl/404.png"],
+        ])
+        self.sesion = SesionFalsa({
+            "https://a.cl/1.png": PNG_A,
+            "https://b.cl/copia.png": PNG_A,
+            "https://a.cl/2.png": PNG_B,
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sincronizar(self, **kwargs):
+        return sincronizar_imagenes(self.csv, directorio=self.dir, espera_s=0, workers=2, procesos=1, sesion=self.sesion, **kwargs)
+
+    def test_extension_from_content(self):
+        self.assertEqual(extension_imagen(PNG_A), ".png")
+        self.assertEqual(extension_imagen(b"\xff\xd8\xff\xe0rest"), ".jpg")
+        self.assertEqual(extension_imagen(b"RIFF\x00\x00\x00\x00WEBPVP8 "), ".webp")
+        self.assertIsNone(extension_imagen(b"<html>error</html>"))
+
+    def test_deduplicates_by_content(self):
+        resumen = self.sincronizar()
+        self.assertEqual(resumen["urls"], 4)
+        self.assertEqual(resumen["descargadas"], 2)
+        self.assertEqual(resumen["reutilizadas"], 1)
+        self.assertEqual(resumen["errores"], 1)
+
+        filas = leer_catalogo(self.csv)
+        self.assertEqual(filas["CM-0001"]["Imagen_Local"], filas["CM-0002"]["Imagen_Local"])
+        self.assertNotEqual(filas["CM-0001"]["Imagen_Local"], filas["CM-0003"]["Imagen_Local"])
+        with open(filas["CM-0003"]["Imagen_Local"], "rb") as f:
+            self.assertEqual(f.read(), PNG_B)
+        self.assertEqual(filas["CM-0004"]["Imagen_Local"], "")
+        self.assertEqual(filas["CM-0005"]["Imagen_Local"], "")
+        originales = [n for _, _, ns in os.walk(os.path.join(self.dir, "originales")) for n in ns]
+        self.assertEqual(len(originales), 2)
+
+    def test_incremental_only_fetches_new(self):
+        self.sincronizar()
+        self.sesion.pedidas.clear()
+        self.sesion.contenidos["https://a.cl/404.png"] = PNG_B
+        resumen = self.sincronizar()
+        self.assertEqual(self.sesion.pedidas, ["https://a.cl/404.png"])
+        self.assertEqual(resumen["reutilizadas"], 1)
+        self.assertEqual(leer_catalogo(self.csv)["CM-0005"]["Imagen_Local"], leer_catalogo(self.csv)["CM-0003"]["Imagen_Local"])
+
+    def test_revalidate_detects_change(self):
+        self.sincronizar()
+        antes = leer_catalogo(self.csv)["CM-0003"]["Imagen_Local"]
+        self.sesion.contenidos["https://a.cl/2.png"] = PNG_B + b"v2"
+        resumen = self.sincronizar(revalidar=True)
+        self.assertEqual(resumen["descargadas"], 1)
+        despues = leer_catalogo(self.csv)
+        self.assertNotEqual(despues["CM-0003"]["Imagen_Local"], antes)
+        self.assertEqual(despues["CM-0001"]["Imagen_Local"], despues["CM-0002"]["Imagen_Local"])
+
+    def test_failed_revalidation_keeps_previous_image(self):
+        self.sincronizar()
+        antes = leer_catalogo(self.csv)["CM-0003"]
+
+        def caida(url, headers=None, timeout=None):
+            if url == "https://a.cl/2.png":
+                raise TimeoutError("timeout")
+            return SesionFalsa.get(self.sesion, url, headers, timeout)
+
+        self.sesion.get = caida
+        self.sesion.contenidos.pop("https://a.cl/1.png")
+        resumen = self.sincronizar(revalidar=True)
+        self.assertEqual(resumen["errores"], 3)
+        despues = leer_catalogo(self.csv)
+        self.assertEqual(despues["CM-0003"]["Imagen_Local"], antes["Imagen_Local"])
+        self.assertEqual(despues["CM-0001"]["Imagen_Local"], despues["CM-0002"]["Imagen_Local"])
+        self.assertNotEqual(despues["CM-0001"]["Imagen_Local"], "")
+
+        # El ETag guardado sigue sirviendo: la siguiente revalidación es un 304
+        del self.sesion.get
+        self.sesion.pedidas.clear()
+        resumen = self.sincronizar(revalidar=True)
+        self.assertEqual(resumen["descargadas"], 0)
+        self.assertEqual(resumen["errores"], 2)
+
+    def test_base_url(self):
+        self.sincronizar(base_url="https://cdn.vendedor360.cl/img/")
+        local = leer_catalogo(self.csv)["CM-0001"]["Imagen_Local"]
+        self.assertTrue(local.startswith("https://cdn.vendedor360.cl/img/originales/"))
+        self.assertTrue(local.endswith(".png"))
+
+    def test_non_image_rejected(self):
+        almacen = AlmacenImagenes(self.dir)
+        try:
+            res = almacen.descargar(SesionFalsa({"https://a.cl/x": b"<html></html>"}), "https://a.cl/x")
+        finally:
+            almacen.cerrar()
+        self.assertIsNone(res.sha256)
+        self.assertIn("no es una imagen", res.error)
+
+    @unittest.skipUnless(imagenes.PIL_DISPONIBLE, "Pillow no está instalado")
+    def test_variants(self):
+        from PIL import Image
+        import io
+        buffer = io.BytesIO()
+        Image.new("RGB", (800, 400), (200, 10, 10)).save(buffer, "PNG")
+        self.sesion.contenidos["https://a.cl/1.png"] = buffer.getvalue()
+        resumen = self.sincronizar()
+        fila = leer_catalogo(self.csv)["CM-0001"]
+        with Image.open(fila["Imagen_Miniatura"]) as mini:
+            self.assertEqual(max(mini.size), imagenes.TAMANO_MINIATURA)
+        with Image.open(fila["Imagen_WebP"]) as webp:
+            self.assertEqual(webp.format, "WEBP")
+        self.assertGreaterEqual(resumen["variantes"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,332 @@
+"""Unit tests for the inventory package (index, SQLite backend, stock triggers)"""
+import unittest
+import sys
+import os
+import csv
+import tempfile
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from inventory import inventory
+    from inventory.inventory import Inventory, Producto
+    from inventory.sqlite_backend import InventarioSQLite
+    from inventory.disparadores import MotorDisparadores, actualizar_y_disparar, publicar_eventos
+    from agents.common.queue import JsonlQueue
+    from agents.linkedin import run as linkedin_run
+    from agents.meta.run import MetaAgent
+except ImportError:
+    pass  # Module may not be importable without dependencies
+
+
+def productos_prueba():
+    return [
+        Producto("CM-0001", "Lápiz Pasta Azul BIC", 250.0, "", 100),
+        Producto("CM-0002", "Portalápiz Metálico", 3990.0, "", 8),
+        Producto("CM-0003", "Cuaderno Universitario 100 Hojas", 1890.0, "", 40),
+    ]
+
+
+def escribir_csv(ruta, columnas, filas):
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columnas)
+        writer.writerows(filas)
+
+
+class TestInventory(unittest.TestCase):
+    """Test cases for the indexed Inventory"""
+
+    def setUp(self):
+        self.inv = Inventory(productos_prueba())
+
+    def test_slots_record(self):
+        self.assertFalse(hasattr(Producto("X", "", 0.0, ""), "__dict__"))
+
+    def test_lookup_by_id(self):
+        self.assertEqual(self.inv.obtener("CM-0003").precio, 1890.0)
+        self.assertIsNone(self.inv.obtener("CM-9999"))
+        self.assertIn("CM-0001", self.inv)
+        self.assertEqual(len(self.inv), 3)
+
+    def test_name_search_matches_substring_semantics(self):
+        ids = lambda q: [p.id_convenio for p in self.inv.buscar_por_nombre(q)]
+        self.assertEqual(ids("LÁPIZ"), ["CM-0001", "CM-0002"])
+        self.assertEqual(ids("piz pas"), ["CM-0001"])
+        self.assertEqual(ids("universitario 100"), ["CM-0003"])
+        self.assertEqual(ids("pasta roja"), [])
+        self.assertEqual(len(ids("")), 3)
+        for q in ("a", "Pasta Azul", "Metál", "100 Hojas", "o u"):
+            esperado = [p.id_convenio for p in productos_prueba() if q.lower() in p.nombre.lower()]
+            self.assertEqual(ids(q), esperado, q)
+
+    def test_apply_deltas(self):
+        cambios = self.inv.aplicar(
+            upserts=[
+                Producto("CM-0004", "Corchetera", 5000.0, "", 3),
+                Producto("CM-0003", "Cuaderno Croquis", 1890.0, "", 40),
+                Producto("CM-0001", "Lápiz Pasta Azul BIC", 250.0, "", 100),
+            ],
+            eliminados=["CM-0002", "CM-9999"],
+            stock={"CM-0001": 5},
+        )
+        self.assertEqual(cambios.insertados, ["CM-0004"])
+        self.assertEqual(cambios.actualizados, ["CM-0003"])
+        self.assertEqual(cambios.eliminados, ["CM-0002"])
+        self.assertEqual(cambios.stock, {"CM-0004": (None, 3), "CM-0002": (8, None), "CM-0001": (100, 5)})
+        self.assertEqual(self.inv.buscar_por_nombre("universitario"), [])
+        self.assertEqual([p.id_convenio for p in self.inv.buscar_por_nombre("croquis")], ["CM-0003"])
+        self.assertEqual(self.inv.buscar_por_nombre("portalápiz"), [])
+        self.assertEqual(self.inv.obtener("CM-0001").stock, 5)
+
+    def test_sync_snapshot(self):
+        cambios = self.inv.sincronizar(productos_prueba()[:2])
+        self.assertEqual(cambios.eliminados, ["CM-0003"])
+        self.assertEqual(cambios.total, 1)
+        self.assertFalse(self.inv.sincronizar(productos_prueba()[:2]))
+
+
+class TestModuleFunctions(unittest.TestCase):
+    """Test cases for cargar_inventario/actualizar_inventario"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        inventory.cargar_inventario()
+
+    def test_example_inventory(self):
+        inventory.cargar_inventario()
+        self.assertEqual(inventory.buscar_producto_por_id("CM-0002").stock, 5)
+        self.assertEqual(len(inventory.buscar_productos_por_nombre("ejemplo")), 2)
+
+    def test_csv_snapshot_and_delta_file(self):
+        base = os.path.join(self.tmp.name, "inventario.csv")
+        escribir_csv(base, ["ID_Convenio_Marco", "Nombre_Producto", "Precio_Unitario", "URL_Imagen", "Stock"], [
+            ["CM-0001", "Lápiz Pasta Azul", "$ 250", "", "100"],
+            ["CM-0002", "Corchetera", "5.000", "", "12"],
+        ])
+        inventory.cargar_inventario(base)
+        self.assertEqual(inventory.buscar_producto_por_id("CM-0002").precio, 5000.0)
+        self.assertFalse(inventory.actualizar_inventario(base))
+
+        delta = os.path.join(self.tmp.name, "cambios.csv")
+        escribir_csv(delta, ["Accion", "id_convenio", "nombre", "precio", "url_imagen", "stock"], [
+            ["stock", "CM-0001", "", "", "", "7"],
+            ["eliminar", "CM-0002", "", "", "", ""],
+            ["upsert", "CM-0003", "Clips", "990", "", "50"],
+        ])
+        cambios = inventory.actualizar_inventario(delta)
+        self.assertEqual(cambios.stock, {"CM-0001": (100, 7), "CM-0002": (12, None), "CM-0003": (None, 50)})
+        self.assertIsNone(inventory.buscar_producto_por_id("CM-0002"))
+        self.assertEqual([p.id_convenio for p in inventory.buscar_productos_por_nombre("clip")], ["CM-0003"])
+
+
+class TestInventarioSQLite(unittest.TestCase):
+    """Test cases for the SQLite/FTS5 inventory backend"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.tmp.name, "inventario.sqlite")
+        self.inv = InventarioSQLite(self.ruta)
+        self.inv.aplicar(productos_prueba())
+
+    def tearDown(self):
+        self.inv.cerrar()
+        self.tmp.cleanup()
+
+    def test_wal_and_fts(self):
+        self.assertTrue(self.inv.fts)
+        modo = self.inv._con.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(modo, "wal")
+
+    def test_same_results_as_memory(self):
+        memoria = Inventory(productos_prueba())
+        for q in ("LÁPIZ", "piz pas", "universitario 100", "a", "o u", "Metál", "pasta roja", ""):
+            self.assertEqual(
+                [p.id_convenio for p in self.inv.buscar_por_nombre(q)],
+                [p.id_convenio for p in memoria.buscar_por_nombre(q)],
+                q,
+            )
+        self.assertEqual(self.inv.obtener("CM-0002"), memoria.obtener("CM-0002"))
+        self.assertEqual(list(self.inv), list(memoria))
+
+    def test_changes_and_low_stock(self):
+        cambios = self.inv.aplicar(
+            upserts=[Producto("CM-0004", "Corchetera", 5000.0, "", 3), Producto("CM-0003", "Cuaderno Croquis", 1890.0, "", 40)],
+            eliminados=["CM-0002"],
+            stock={"CM-0001": 5},
+        )
+        self.assertEqual(cambios.insertados, ["CM-0004"])
+        self.assertEqual(cambios.actualizados, ["CM-0003"])
+        self.assertEqual(cambios.stock, {"CM-0004": (None, 3), "CM-0002": (8, None), "CM-0001": (100, 5)})
+        self.assertEqual([p.id_convenio for p in self.inv.buscar_por_nombre("croquis")], ["CM-0003"])
+        self.assertEqual(self.inv.buscar_por_nombre("universitario"), [])
+        self.assertEqual([p.id_convenio for p in self.inv.bajo_stock(5)], ["CM-0001", "CM-0004"])
+        self.assertFalse(self.inv.sincronizar(list(self.inv)))
+
+    def test_bulk_rebuilds_fts(self):
+        from unittest.mock import patch
+        with patch("inventory.sqlite_backend.LOTE_MASIVO", 2):
+            self.inv.aplicar([Producto(f"CM-1{i:03d}", f"Resma Carta {i}", 3000.0, "", 10) for i in range(5)])
+        self.assertEqual(len(self.inv.buscar_por_nombre("resma carta")), 5)
+        self.inv.upsert(Producto("CM-1000", "Resma Oficio", 3200.0, "", 10))
+        self.assertEqual(len(self.inv.buscar_por_nombre("resma carta")), 4)
+        self.assertEqual(len(self.inv.buscar_por_nombre("lápiz")), 2)
+
+    def test_shared_between_connections(self):
+        otro = InventarioSQLite(self.ruta)
+        try:
+            self.inv.ajustar_stock("CM-0003", 1)
+            self.inv.guardar_version("inventario.csv", "v1")
+            self.assertEqual(otro.obtener("CM-0003").stock, 1)
+            self.assertEqual(otro.version("inventario.csv"), "v1")
+        finally:
+            otro.cerrar()
+
+    def test_module_backend(self):
+        base = os.path.join(self.tmp.name, "inventario.csv")
+        escribir_csv(base, ["id_convenio", "nombre", "precio", "url_imagen", "stock"], [["CM-0009", "Tijera", "1500", "", "4"]])
+        ruta = os.path.join(self.tmp.name, "modulo.sqlite")
+        try:
+            inventory.cargar_inventario(base, sqlite=ruta)
+            self.assertIsInstance(inventory.inventario(), InventarioSQLite)
+            self.assertEqual(inventory.buscar_producto_por_id("CM-0009").stock, 4)
+            inventory.inventario().cerrar()
+            inventory.cargar_inventario(base, sqlite=ruta)
+            self.assertEqual([p.id_convenio for p in inventory.buscar_productos_por_nombre("tij")], ["CM-0009"])
+        finally:
+            inventory.inventario().cerrar()
+            inventory.cargar_inventario()
+
+
+class TestDisparadores(unittest.TestCase):
+    """Test cases for the incremental low-stock trigger engine"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.estado = os.path.join(self.tmp.name, "estado.sqlite")
+        self.cola = os.path.join(self.tmp.name, "eventos.jsonl")
+        self.inv = Inventory(productos_prueba())
+        self.motor = MotorDisparadores(self.estado, umbrales={"CM-0002": 5}, reloj=lambda: 1000.0)
+        # Carga inicial: nada bajo el umbral
+        self.assertEqual(self.motor.procesar(Inventory().aplicar(productos_prueba())), [])
+
+    def tearDown(self):
+        self.motor.cerrar()
+        self.tmp.cleanup()
+
+    def stock(self, **valores):
+        return self.motor.procesar(self.inv.aplicar(stock={k.replace("_", "-"): v for k, v in valores.items()}), self.inv)
+
+    def test_crossings_only(self):
+        eventos = self.stock(CM_0001=9, CM_0002=6)
+        self.assertEqual([(e.tipo, e.id_convenio, e.umbral) for e in eventos], [("stock_bajo", "CM-0001", 10)])
+        self.assertEqual(eventos[0].nombre, "Lápiz Pasta Azul BIC")
+        self.assertEqual(self.stock(CM_0001=3), [])
+        self.assertEqual([e.tipo for e in self.stock(CM_0001=0, CM_0002=4)], ["agotado", "stock_bajo"])
+        self.assertEqual([e.tipo for e in self.stock(CM_0001=150)], ["repuesto"])
+        # La referencia sube con la reposición: ahora el umbral es 15
+        self.assertEqual([(e.tipo, e.umbral) for e in self.stock(CM_0001=14)], [("stock_bajo", 15)])
+
+    def test_reference_resets_on_restock(self):
+        # Un pico histórico no deja al producto bajo el umbral para siempre
+        self.assertEqual(self.stock(CM_0003=1000), [])
+        self.assertEqual([(e.tipo, e.umbral) for e in self.stock(CM_0003=50)], [("stock_bajo", 100)])
+        self.assertEqual([(e.tipo, e.umbral) for e in self.stock(CM_0003=150)], [("repuesto", 15)])
+        self.assertEqual([(e.tipo, e.umbral) for e in self.stock(CM_0003=5)], [("stock_bajo", 15)])
+
+    def test_small_correction_while_low_keeps_reference(self):
+        # Subir de 5 a 6 (o a 60 de 1000) no es una reposición: sigue bajo
+        self.assertEqual([(e.tipo, e.umbral) for e in self.stock(CM_0003=100)], [])
+        self.assertEqual([(e.tipo, e.umbral) for e in self.stock(CM_0003=5)], [("stock_bajo", 10)])
+        self.assertEqual(self.stock(CM_0003=6), [])
+        self.assertEqual(self.stock(CM_0003=9), [])
+        self.assertEqual([(e.tipo, e.umbral) for e in self.stock(CM_0003=10)], [("repuesto", 1)])
+
+    def test_restock_detected_after_restart(self):
+        self.assertEqual([e.tipo for e in self.stock(CM_0003=2)], ["stock_bajo"])
+        self.motor.cerrar()
+        self.motor = MotorDisparadores(self.estado)
+        # Tras reiniciar todo llega como alta (sin stock anterior): el motor
+        # usa el último stock guardado para reconocer la reposición
+        self.inv.ajustar_stock("CM-0003", 30)
+        recarga = Inventory().aplicar(list(self.inv))
+        self.assertEqual([(e.tipo, e.umbral) for e in self.motor.procesar(recarga)], [("repuesto", 3)])
+
+    def test_restart_does_not_repeat(self):
+        self.stock(CM_0003=2)
+        self.motor.cerrar()
+        self.motor = MotorDisparadores(self.estado)
+        # Un proceso nuevo recarga todo el inventario en memoria como altas
+        recarga = Inventory().aplicar(list(self.inv))
+        self.assertEqual(self.motor.procesar(recarga), [])
+
+    def test_watch_pass_only_sends_changes(self):
+        fuente = os.path.join(self.tmp.name, "inventario.csv")
+        columnas = ["ID_Convenio_Marco", "Nombre_Producto", "Precio_Unitario", "URL_Imagen", "Stock"]
+        filas = [[p.id_convenio, p.nombre, str(p.precio), "", str(p.stock)] for p in productos_prueba()]
+        escribir_csv(fuente, columnas, filas)
+        try:
+            self.motor.procesar(inventory.cargar_inventario(fuente), inventory.inventario())
+            filas[2][4] = "3"
+            escribir_csv(fuente, columnas, filas)
+            os.utime(fuente, ns=(1, 1))
+            consultas = []
+            self.motor._con.set_trace_callback(consultas.append)
+            eventos = actualizar_y_disparar(self.motor, fuente, self.cola)
+            self.assertEqual([(e.tipo, e.id_convenio) for e in eventos], [("stock_bajo", "CM-0003")])
+            lecturas = [q for q in consultas if q.startswith("SELECT")]
+            self.assertEqual(len(lecturas), 1)
+            self.assertNotIn("'CM-0001'", lecturas[0])
+        finally:
+            inventory.cargar_inventario()
+
+    def test_only_changed_products_are_read(self):
+        consultas = []
+        self.motor._con.set_trace_callback(consultas.append)
+        self.stock(CM_0003=2)
+        lecturas = [q for q in consultas if q.startswith("SELECT")]
+        self.assertEqual(len(lecturas), 1)
+        self.assertIn("'CM-0003'", lecturas[0])
+
+    def test_queue_consumers(self):
+        publicar_eventos(self.stock(CM_0001=1), self.cola)
+        cola = JsonlQueue(self.cola)
+        eventos, offset = cola.pending("meta")
+        self.assertEqual([e["id_convenio"] for e in eventos], ["CM-0001"])
+        cola.ack("meta", offset)
+        self.assertEqual(cola.pending("meta")[0], [])
+        self.assertEqual(len(cola.pending("linkedin")[0]), 1)
+        with open(self.cola, "a", encoding="utf-8") as f:
+            f.write('{"tipo": "stock_ba')  # escritura a medias
+        self.assertEqual(cola.pending("meta")[0], [])
+
+    def test_consumers_ack_only_after_saving(self):
+        publicar_eventos(self.stock(CM_0001=1), self.cola)
+        cola = JsonlQueue(self.cola)
+
+        agente = MetaAgent()
+        ofertas, offset = agente.pending_flash_offers(self.cola)
+        self.assertEqual([e["id_convenio"] for e in ofertas], ["CM-0001"])
+        self.assertEqual(len(cola.pending("meta")[0]), 1)
+        agente.ack_flash_offers(self.cola, offset)
+        self.assertEqual(cola.pending("meta")[0], [])
+
+        argv = ["run.py", "--eventos", self.cola, "--status", os.path.join(self.tmp.name, "STATUS.md")]
+        with patch.dict(os.environ, {"LINKEDIN_ACCESS_TOKEN": "x"}), patch.object(sys, "argv", argv), \
+                patch.object(linkedin_run, "append_status", side_effect=OSError("disco lleno")):
+            with self.assertRaises(OSError):
+                linkedin_run.main()
+        self.assertEqual(len(cola.pending("linkedin")[0]), 1)
+        with patch.dict(os.environ, {"LINKEDIN_ACCESS_TOKEN": "x"}), patch.object(sys, "argv", argv), \
+                patch.object(linkedin_run, "write_json_log"):
+            self.assertEqual(linkedin_run.main(), 0)
+        self.assertEqual(cola.pending("linkedin")[0], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,9 @@ import unittest
 from unittest.mock import Mock, patch, MagicMock
 import sys
 import os
+import json
+import subprocess
+import tempfile
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -63,13 +66,59 @@ class TestLiciAgent(unittest.TestCase):
     def test_obtener_ofertas(self, mock_chrome):
         """Test offer retrieval"""
         mock_driver = MagicMock()
-        mock_driver.find_elements.return_value = []
+        mock_driver.execute_script.return_value = []
         
         ofertas = lici_agent.obtener_ofertas(mock_driver)
         
         self.assertIsInstance(ofertas, list)
         mock_driver.get.assert_called_with('https://lici.cl/auto_bids')
 
+    @patch('lici_agent.time.sleep')
+    def test_obtener_ofertas_single_roundtrip(self, mock_sleep):
+        """Test cards are read with one execute_script call and bad cards are reported"""
+        mock_driver = MagicMock()
+        mock_driver.execute_script.return_value = [
+            {"match": "100%", "productos": "Resma carta", "presupuesto": "$ 1.234.567",
+             "ofertado": "$ 1.200.000,50", "estado": "Pendiente", "link": "https://lici.cl/b/1"},
+            {"match": "n/a", "productos": "", "presupuesto": "$ 10",
+             "ofertado": "$ 9", "estado": "", "link": "https://lici.cl/b/2"},
+        ]
+        errores = []
+
+        ofertas = lici_agent.obtener_ofertas(mock_driver, errores)
+
+        mock_driver.execute_script.assert_called_once()
+        mock_driver.find_elements.assert_not_called()
+        self.assertEqual(len(ofertas), 1)
+        self.assertEqual(ofertas[0]["match"], 100)
+        self.assertEqual(ofertas[0]["presupuesto"], 1234567.0)
+        self.assertEqual(ofertas[0]["ofertado"], 1200000.5)
+        self.assertEqual(errores[0]["indice"], 1)
+        self.assertIn("match", errores[0]["error"])
+
+    @patch('lici_agent.time.sleep')
+    def test_procesar_empresa_collects_card_errors(self, mock_sleep):
+        """Test malformed cards are recorded per empresa and written to the run report"""
+        mock_driver = MagicMock()
+        mock_driver.execute_script.return_value = [
+            {"match": "90%", "presupuesto": "$ 100", "ofertado": "$ 90", "link": "https://lici.cl/b/1"},
+            {"match": "90%", "presupuesto": "$ 1.2.3", "ofertado": "$ 90", "link": "https://lici.cl/b/2"},
+        ]
+        colector = lici_agent.ColectorResultados()
+
+        lici_agent.procesar_empresa(mock_driver, "FirmaVB Aseo", MagicMock(), colector)
+
+        self.assertEqual(len(colector.filas), 1)
+        self.assertEqual(len(colector.errores), 1)
+        self.assertEqual(colector.errores[0]["empresa"], "FirmaVB Aseo")
+        self.assertIn("presupuesto", colector.errores[0]["error"])
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = lici_agent.escribir_reporte_errores(colector.errores, tmp)
+            with open(ruta, encoding="utf-8") as f:
+                registros = [json.loads(linea) for linea in f]
+        self.assertEqual(registros[0]["tarjeta"]["link"], "https://lici.cl/b/2")
+        self.assertIsNone(lici_agent.escribir_reporte_errores([]))
+
     @patch.dict(os.environ, {
         'GOOGLE_APPLICATION_CREDENTIALS_JSON': '{"type": "service_account"}',
         'LICI_SHEET_NAME': 'TestSheet'
@@ -95,11 +144,61 @@ class TestLiciAgent(unittest.TestCase):
         
         lici_agent.guardar_sheet(mock_sheet, test_row)
         
-        mock_sheet.append_row.assert_called_once_with(
-            test_row, 
+        mock_sheet.append_rows.assert_called_once_with(
+            [test_row], 
             value_input_option='USER_ENTERED'
         )
 
+        writer = Mock(spec=lici_agent.BufferedSheetWriter)
+        lici_agent.guardar_sheet(writer, test_row)
+        writer.append.assert_called_once_with(test_row)
+
+    @patch('lici_agent.sesiones_paralelas', return_value=3)
+    @patch('lici_agent.procesar_empresa')
+    @patch('lici_agent.login_lici')
+    @patch('lici_agent.conectar_gsheet')
+    @patch('lici_agent.setup_driver')
+    def test_ciclo_parallel_sessions(self, mock_setup, mock_gsheet, mock_login,
+                                     mock_procesar, mock_sesiones):
+        """Test parallel mode logs in separately for each empresa, with no idle main driver"""
+        drivers = []
+
+        def nuevo_driver():
+            drivers.append(MagicMock())
+            return drivers[-1]
+
+        mock_setup.side_effect = nuevo_driver
+
+        lici_agent.ciclo(paralelo=3)
+
+        self.assertEqual(len(drivers), len(lici_agent.EMPRESAS))
+        self.assertEqual(sorted(id(c.args[0]) for c in mock_login.call_args_list), sorted(map(id, drivers)))
+        por_driver = {id(c.args[0]): c.args[1] for c in mock_procesar.call_args_list}
+        self.assertEqual(len(por_driver), len(lici_agent.EMPRESAS))
+        self.assertEqual(sorted(por_driver.values()), sorted(lici_agent.EMPRESAS))
+        for driver in drivers:
+            driver.quit.assert_called_once()
+            driver.get_cookies.assert_not_called()
+
+    def test_import_keeps_file_logging(self):
+        """Importing lici_agent does not load the LICI runner nor lose lici_agent.log"""
+        raiz = os.path.dirname(os.path.abspath(__file__))
+        codigo = (
+            "import sys, logging; sys.path.insert(0, %r); import lici_agent; "
+            "print('agents.lici.run' in sys.modules, "
+            "any(isinstance(h, logging.FileHandler) for h in logging.getLogger().handlers))" % raiz
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            salida = subprocess.run([sys.executable, "-c", codigo], cwd=tmp, capture_output=True, text=True, check=True)
+        self.assertEqual(salida.stdout.split(), ["False", "True"])
+
+    def test_parsear_tarjeta_montos(self):
+        """Card amounts go through the shared money parser"""
+        tarjeta = lici_agent.parsear_tarjeta({
+            "match": "100%", "presupuesto": "$ 1.234.567", "ofertado": "$ 990.000,50", "link": "https://x",
+        })
+        self.assertEqual((tarjeta["presupuesto"], tarjeta["ofertado"]), (1234567.0, 990000.5))
+
     def test_empresas_list(self):
         """Test that EMPRESAS list is properly defined"""
         self.assertIsInstance(lici_agent.EMPRESAS, list)
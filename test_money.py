@@ -0,0 +1,127 @@
+"""Unit tests for agents/common/money.py"""
+import unittest
+import random
+import re
+import sys
+import os
+from decimal import Decimal
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.common.money import parse_money, parse_minor, Money
+
+try:
+    import pandas as pd
+    from agents.common.money import parse_many
+except ImportError:
+    pd = None
+
+
+# Implementaciones previas de cada punto de uso, para verificar que el parser
+# compartido coincide con ellas en los formatos que sí interpretaban bien.
+def legacy_limpiar_monto(texto):
+    s = str(texto).strip()
+    s = s.replace("$", "").replace("CLP", "").replace("cop", "").replace("COP", "")
+    s = re.sub(r"\s+", "", s)
+    s = s.replace(".", "").replace(",", ".")
+    return Decimal(s)
+
+
+def legacy_lici_agent(texto):
+    return float(texto.replace("$", "").replace(".", "").replace(",", ""))
+
+
+def legacy_parse_precio(txt):
+    t = txt.strip().replace("$", "").replace(" ", " ").replace("CLP", "").strip()
+    if t.count(",") == 1 and t.count(".") >= 1 and t.rfind(",") > t.rfind("."):
+        t = t.replace(".", "").replace(",", ".")
+    else:
+        t = t.replace(",", "")
+    return float(t)
+
+
+def miles(n, sep):
+    return f"{n:,}".replace(",", sep)
+
+
+class TestParseMoney(unittest.TestCase):
+    """Test cases for the shared money parser"""
+
+    def test_examples(self):
+        self.assertEqual(parse_money("$ 1.234.567,89"), Money(123456789, "CLP"))
+        self.assertEqual(parse_money("US$ 1,234.50"), Money(123450, "USD"))
+        self.assertEqual(parse_money("COP 10.000"), Money(1000000, "COP"))
+        self.assertEqual(parse_money("UF 12,5"), Money(1250, "UF"))
+        self.assertEqual(parse_money("-$ 500"), Money(-50000, "CLP"))
+        self.assertEqual(parse_minor("1.234"), 123400)
+        self.assertEqual(parse_minor("1.234,56"), parse_minor("1,234.56"))
+        self.assertIsNone(parse_money("sin monto"))
+        self.assertIsNone(parse_money(""))
+        self.assertIsNone(parse_money(None))
+
+    def test_malformed_thousands_groups(self):
+        # Separador repetido con grupos que no son de tres dígitos: inválido
+        self.assertIsNone(parse_money("1.234.5"))
+        self.assertIsNone(parse_money("12.34.567"))
+        self.assertIsNone(parse_money("01.234.567"))
+        self.assertIsNone(parse_money("12.34,5"))
+        self.assertIsNone(parse_money("1,23.45"))
+        # Un solo separador que no puede ser de miles es decimal
+        self.assertEqual(parse_minor("0.500"), 50)
+        self.assertEqual(parse_money("$0.500"), Money(50, "CLP"))
+        self.assertEqual(parse_minor("0,500"), 50)
+        self.assertEqual(parse_minor("1234.567"), 123457)
+        # Grupos válidos siguen siendo miles
+        self.assertEqual(parse_minor("1.000"), 100000)
+        self.assertEqual(parse_minor("999.999.999"), 99999999900)
+        self.assertEqual(parse_minor("1,234,567.5"), 123456750)
+
+    def test_property_clp_format_agrees_with_limpiar_monto(self):
+        """'$ 1.234.567,89' style strings match the old limpiar_monto"""
+        rnd = random.Random(1)
+        for _ in range(2000):
+            pesos, cent = rnd.randint(0, 10**10), rnd.randint(0, 99)
+            texto = f"$ {miles(pesos, '.')},{cent:02d}"
+            self.assertEqual(parse_money(texto).to_decimal(), legacy_limpiar_monto(texto), texto)
+            entero = f"${miles(pesos, '.')}"
+            self.assertEqual(parse_money(entero).to_decimal(), legacy_limpiar_monto(entero), entero)
+
+    def test_property_integer_clp_agrees_with_lici_agent(self):
+        """Integer CLP amounts match the old lici_agent parsing"""
+        rnd = random.Random(2)
+        for _ in range(2000):
+            texto = f"${miles(rnd.randint(0, 10**10), '.')}"
+            self.assertEqual(parse_minor(texto) / 100, legacy_lici_agent(texto), texto)
+
+    def test_property_decimal_formats_agree_with_parse_precio(self):
+        """Both decimal conventions match the old monitor_convenio.parse_precio"""
+        rnd = random.Random(3)
+        for _ in range(2000):
+            pesos, cent = rnd.randint(1000, 10**9), rnd.randint(0, 99)
+            for texto in (f"$ {miles(pesos, '.')},{cent:02d}", f"{miles(pesos, ',')}.{cent:02d}"):
+                self.assertAlmostEqual(parse_minor(texto) / 100, legacy_parse_precio(texto), places=2, msg=texto)
+
+    @unittest.skipIf(pd is None, "pandas no disponible")
+    def test_parse_many_agrees_with_parse_money(self):
+        """The vectorized parser gives the same result as the scalar one"""
+        rnd = random.Random(4)
+        textos = ["", "abc", "1.2.3,4,5", "12.3456", "UF 3,25", "US$ -10", None]
+        for _ in range(3000):
+            n = rnd.randint(0, 10**8)
+            sep, dec = rnd.choice([(".", ","), (",", ".")])
+            cuerpo = miles(n, sep) + (f"{dec}{rnd.randint(0, 999)}" if rnd.random() < 0.5 else "")
+            textos.append(rnd.choice(["", "$ ", "$", "CLP ", "US$ ", "UF "]) + cuerpo)
+        salida = parse_many(pd.Series(textos))
+
+        for texto, minor, moneda in zip(textos, salida["minor"], salida["currency"]):
+            esperado = parse_money(texto)
+            if esperado is None:
+                self.assertTrue(pd.isna(minor), texto)
+            else:
+                self.assertEqual(int(minor), esperado.minor, texto)
+                self.assertEqual(moneda, esperado.currency, texto)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,266 @@
+"""Unit tests for catalogo/scraper.py and agents/common/limitador.py"""
+import io
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from agents.common.limitador import TokenBucket, LimitadorPorHost
+    from catalogo import scraper
+    from catalogo.cache import CacheHTTP, CheckpointScrapeo
+    from catalogo import resolvedores
+    from catalogo.resolvedores import ResolvedorImagenes
+except ImportError:
+    pass  # Module may not be importable without dependencies
+
+
+class RelojFalso:
+    def __init__(self):
+        self.t = 0.0
+        self.dormido = []
+
+    def reloj(self):
+        return self.t
+
+    def dormir(self, s):
+        self.dormido.append(s)
+        self.t += s
+
+
+HTML_BUSQUEDA = '<a class="product-item-link" href="https://www.prisa.cl/p/{id}">x</a>'
+HTML_PRODUCTO = '<img id="image" src="https://img.prisa.cl/{id}.jpg">'
+
+
+def html_falso(url, timeout=15.0, sesion=None, limitador=None, cache=None):
+    if limitador is not None:
+        limitador.adquirir(url)
+    id_val = url.rsplit("=", 1)[-1] if "buscar" in url else url.rsplit("/", 1)[-1]
+    if id_val == "CM-X":
+        return None
+    return (HTML_BUSQUEDA if "buscar" in url else HTML_PRODUCTO).format(id=id_val)
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for the per-host token bucket"""
+
+    def test_rate_is_enforced(self):
+        reloj = RelojFalso()
+        balde = TokenBucket(tasa=2.0, capacidad=1, reloj=reloj.reloj, dormir=reloj.dormir)
+        for _ in range(5):
+            balde.adquirir()
+        self.assertAlmostEqual(reloj.t, 2.0)  # 5 fichas a 2/s con 1 inicial
+        self.assertAlmostEqual(balde.esperado_s, 2.0)
+
+    def test_hosts_are_independent(self):
+        reloj = RelojFalso()
+        limitador = LimitadorPorHost(tasa=1.0, por_host={"b.cl": 10.0}, reloj=reloj.reloj, dormir=reloj.dormir)
+        limitador.adquirir("https://a.cl/x")
+        limitador.adquirir("https://b.cl/x")
+        self.assertEqual(reloj.dormido, [])
+        limitador.adquirir("https://b.cl/y")
+        limitador.adquirir("https://A.cl/z")
+        self.assertAlmostEqual(reloj.dormido[0], 0.1)
+        self.assertEqual(set(limitador.stats()), {"a.cl", "b.cl"})
+
+
+class TestEnriquecer(unittest.TestCase):
+    """Test cases for the concurrent image enrichment"""
+
+    def test_resolver_ids_concurrent(self):
+        llamadas = []
+        lock = threading.Lock()
+
+        def progreso(hechos, total, res, inicio):
+            with lock:
+                llamadas.append((hechos, total))
+
+        ids = [f"CM-{i}" for i in range(20)] + ["CM-X", "CM-1"]
+        with patch.object(scraper, "_solicitar_html", side_effect=html_falso):
+            resultados = scraper.resolver_ids(ids, espera_s=0, workers=4, progreso=progreso)
+
+        self.assertEqual(len(resultados), 21)
+        self.assertEqual(resultados["CM-3"].url_imagen, "https://img.prisa.cl/CM-3.jpg")
+        self.assertIsNone(resultados["CM-X"].url_imagen)
+        self.assertEqual(llamadas[-1], (21, 21))
+
+    def test_enriquecer_writes_column(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            entrada = os.path.join(tmp, "in.csv")
+            salida = os.path.join(tmp, "out.csv")
+            with open(entrada, "w", encoding="utf-8") as f:
+                f.write("ID_Convenio_Marco,Nombre_Producto\nCM-1,A\nCM-X,B\n")
+            with patch.object(scraper, "_solicitar_html", side_effect=html_falso):
+                scraper.enriquecer_catalogo_con_imagenes(entrada, salida, espera_s=0, workers=2, progreso=None)
+            with open(salida, encoding="utf-8") as f:
+                lineas = f.read().splitlines()
+        self.assertEqual(lineas[1], "CM-1,A,https://img.prisa.cl/CM-1.jpg")
+        self.assertEqual(lineas[2], "CM-X,B,")
+
+    def test_incremental_resume(self):
+        """Only missing, failed or stale IDs are scraped again"""
+        with tempfile.TemporaryDirectory() as tmp:
+            entrada = os.path.join(tmp, "in.csv")
+            salida = os.path.join(tmp, "out.csv")
+            with open(entrada, "w", encoding="utf-8") as f:
+                f.write("ID_Convenio_Marco,URL_Imagen\nCM-1,\nCM-2,\nCM-3,\nCM-4,\nCM-5,https://manual/5.jpg\n")
+            checkpoint = CheckpointScrapeo(salida + ".checkpoint.sqlite")
+            checkpoint.guardar("CM-1", "https://viejo/1.jpg", None)  # reciente: se reutiliza
+            checkpoint.guardar("CM-2", None, "timeout")  # con error: se reintenta
+            checkpoint.guardar("CM-3", "https://viejo/3.jpg", None, ahora=0.0)  # vencido
+            checkpoint.cerrar()
+
+            consultados = []
+
+            def falso(url, **kwargs):
+                if "buscar" in url:
+                    consultados.append(url.rsplit("=", 1)[-1])
+                return html_falso(url, **kwargs)
+
+            with patch.object(scraper, "_solicitar_html", side_effect=falso):
+                scraper.enriquecer_catalogo_con_imagenes(entrada, salida, espera_s=0, workers=2, progreso=None)
+            with open(salida, encoding="utf-8") as f:
+                lineas = f.read().splitlines()
+            registros = CheckpointScrapeo(salida + ".checkpoint.sqlite").cargar()
+
+        self.assertEqual(sorted(consultados), ["CM-2", "CM-3", "CM-4"])
+        self.assertEqual(lineas[1:], [
+            "CM-1,https://viejo/1.jpg",
+            "CM-2,https://img.prisa.cl/CM-2.jpg",
+            "CM-3,https://img.prisa.cl/CM-3.jpg",
+            "CM-4,https://img.prisa.cl/CM-4.jpg",
+            "CM-5,https://manual/5.jpg",
+        ])
+        self.assertIsNone(registros["CM-2"][1])
+
+
+class RespuestaFalsa:
+    def __init__(self, status, text="", headers=None):
+        self.status_code = status
+        self.text = text
+        self.headers = headers or {}
+
+
+class TestCacheHTTP(unittest.TestCase):
+    """Test cases for the conditional HTTP cache"""
+
+    def test_etag_revalidation(self):
+        enviados = []
+
+        class Sesion:
+            def get(self, url, headers=None, timeout=None):
+                enviados.append(dict(headers or {}))
+                if headers and headers.get("If-None-Match") == '"v1"':
+                    return RespuestaFalsa(304)
+                return RespuestaFalsa(200, "<html>v1</html>", {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = CacheHTTP(tmp)
+            self.assertEqual(cache.obtener(Sesion(), "https://x.cl/a"), "<html>v1</html>")
+            self.assertEqual(cache.obtener(Sesion(), "https://x.cl/a"), "<html>v1</html>")
+            self.assertEqual(CacheHTTP(tmp).obtener(Sesion(), "https://x.cl/a"), "<html>v1</html>")
+
+        self.assertEqual(enviados[0], {})
+        self.assertEqual(enviados[1]["If-Modified-Since"], "Mon, 01 Jan 2024 00:00:00 GMT")
+        self.assertEqual(cache.stats(), {"aciertos_304": 1, "descargas": 1})
+
+
+def fuente_falsa(nombre, demora, imagen, llamadas):
+    def _resolver(id_val, cancelado=None, **contexto):
+        llamadas.append(nombre)
+        if cancelado is not None and cancelado.wait(demora):
+            return scraper.ResultadoScrapeo(id_val, None, scraper.ERROR_CANCELADO)
+        if cancelado is None:
+            time.sleep(demora)
+        return scraper.ResultadoScrapeo(id_val, f"https://{nombre}/{id_val}.jpg" if imagen else None,
+                                        None if imagen else "sin imagen")
+    return _resolver
+
+
+class TestResolvedores(unittest.TestCase):
+    """Test cases for the multi-source image resolver"""
+
+    def setUp(self):
+        self.originales = dict(resolvedores.RESOLVEDORES)
+        self.llamadas = []
+        resolvedores.registrar("falla_rapido", fuente_falsa("falla_rapido", 0.0, False, self.llamadas))
+        resolvedores.registrar("lento", fuente_falsa("lento", 2.0, True, self.llamadas))
+        resolvedores.registrar("rapido", fuente_falsa("rapido", 0.05, True, self.llamadas))
+
+    def tearDown(self):
+        resolvedores.RESOLVEDORES.clear()
+        resolvedores.RESOLVEDORES.update(self.originales)
+
+    def test_default_sources_registered(self):
+        self.assertTrue({"prisa", "dimerc", "convenio_marco"} <= set(self.originales))
+
+    def test_race_first_valid_wins_and_cancels(self):
+        resolvedor = ResolvedorImagenes(["falla_rapido", "lento", "rapido"], estrategia="carrera")
+        try:
+            res = resolvedor.resolver("CM-1")
+            self.assertEqual(res.url_imagen, "https://rapido/CM-1.jpg")
+            resolvedor._pool.shutdown(wait=True)
+            stats = resolvedor.stats()
+        finally:
+            resolvedor.cerrar()
+        self.assertEqual(stats["lento"]["cancelados"], 1)
+        self.assertEqual(stats["lento"]["intentos"], 0)
+        self.assertEqual(stats["rapido"]["exitos"], 1)
+        self.assertEqual(stats["falla_rapido"]["tasa_exito"], 0.0)
+
+    def test_cascade_adapts_order(self):
+        resolvedor = ResolvedorImagenes(["falla_rapido", "rapido"], estrategia="cascada")
+        try:
+            self.assertEqual(resolvedor.resolver("CM-1").url_imagen, "https://rapido/CM-1.jpg")
+            self.assertEqual(self.llamadas, ["falla_rapido", "rapido"])
+            self.assertEqual(resolvedor.orden(), ["rapido", "falla_rapido"])
+            self.llamadas.clear()
+            resolvedor.resolver("CM-2")
+            self.assertEqual(self.llamadas, ["rapido"])
+        finally:
+            resolvedor.cerrar()
+
+    def test_all_sources_fail(self):
+        resolvedor = ResolvedorImagenes(["falla_rapido"], estrategia="carrera")
+        try:
+            res = resolvedor.resolver("CM-1")
+        finally:
+            resolvedor.cerrar()
+        self.assertIsNone(res.url_imagen)
+        self.assertIn("falla_rapido: sin imagen", res.error)
+
+    def test_resolver_ids_auto(self):
+        resolvedor = ResolvedorImagenes(["falla_rapido", "rapido"])
+        try:
+            resultados = scraper.resolver_ids(["CM-1", "CM-2"], sitio="auto", espera_s=0, workers=2,
+                                              progreso=None, resolvedor=resolvedor)
+        finally:
+            resolvedor.cerrar()
+        self.assertEqual(resultados["CM-2"].url_imagen, "https://rapido/CM-2.jpg")
+
+    def test_resolver_ids_logs_stats_instead_of_printing(self):
+        def solo_rapido(max_workers=8):
+            return ResolvedorImagenes(["rapido"], max_workers=max_workers)
+
+        with patch.object(resolvedores, "ResolvedorImagenes", solo_rapido), \
+                patch("sys.stderr", new_callable=io.StringIO) as stderr, \
+                self.assertLogs("catalogo.scraper", level="INFO") as logs:
+            resultados = scraper.resolver_ids(["CM-1", "CM-2"], sitio="auto", espera_s=0, workers=2)
+        self.assertEqual(resultados["CM-1"].url_imagen, "https://rapido/CM-1.jpg")
+        self.assertEqual(stderr.getvalue(), "")
+        self.assertTrue(any("[2/2]" in m for m in logs.output))
+        self.assertTrue(any("Fuentes: {'rapido'" in m for m in logs.output))
+
+    def test_unknown_source(self):
+        with self.assertRaises(ValueError):
+            ResolvedorImagenes(["no_existe"])
+
+
+if __name__ == '__main__':
+    unittest.main()
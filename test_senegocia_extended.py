@@ -0,0 +1,133 @@
+"""Unit tests for senegocia_extended.py"""
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import pandas as pd
+    import senegocia_extended
+except ImportError:
+    pass  # Module may not be importable without dependencies
+
+
+def _price_df():
+    return pd.DataFrame({
+        "DESCRIPCION": ["Resma carta 75g", "Cloro 5 litros", "Guantes nitrilo M"],
+        "CODIGO": [101, 202, 303],
+        "PRECIO VENTA LICI 20%": [4000, 3500, 350],
+    })
+
+
+class TestMatchMemo(unittest.TestCase):
+    """Test cases for the persistent match memo"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.memo_path = os.path.join(self.tmpdir.name, "memo.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_memo_returns_same_result_as_scan(self):
+        """A memo hit returns the same row and score as a full scan"""
+        df = _price_df()
+        memo = senegocia_extended.MatchMemo(self.memo_path)
+        expected_row, expected_score = senegocia_extended.find_best_match("cloro 5 lts", df)
+        senegocia_extended.find_best_match("cloro 5 lts", df, memo)
+        row, score = senegocia_extended.find_best_match("Cloro  5 LTS", df, memo)
+
+        self.assertEqual(row["CODIGO"], expected_row["CODIGO"])
+        self.assertEqual(score, expected_score)
+        self.assertEqual(memo.stats()["hits"], 1)
+        self.assertEqual(memo.stats()["misses"], 1)
+
+    def test_memo_hit_matches_scan_of_same_spelling(self):
+        """Spellings sharing a memo key get the score a fresh scan gives them"""
+        df = _price_df()
+        spaced = "resma   carta\t75g"
+        expected_row, expected_score = senegocia_extended.find_best_match(spaced, df)
+        memo = senegocia_extended.MatchMemo()
+        senegocia_extended.find_best_match("Resma Carta 75g", df, memo)
+        row, score = senegocia_extended.find_best_match(spaced, df, memo)
+
+        self.assertEqual(memo.hits, 1)
+        self.assertEqual(row["CODIGO"], expected_row["CODIGO"])
+        self.assertEqual(score, expected_score)
+
+    def test_memo_persists_and_invalidates_on_price_change(self):
+        """Saved entries survive a reload but not a price list change"""
+        df = _price_df()
+        memo = senegocia_extended.MatchMemo(self.memo_path)
+        senegocia_extended.find_best_match("resma carta", df, memo)
+        memo.save()
+
+        reloaded = senegocia_extended.MatchMemo.load(self.memo_path)
+        senegocia_extended.find_best_match("resma carta", df, reloaded)
+        self.assertEqual(reloaded.hits, 1)
+
+        changed = df.copy()
+        changed.loc[0, "PRECIO VENTA LICI 20%"] = 3900
+        senegocia_extended.find_best_match("resma carta", changed, reloaded)
+        self.assertEqual(reloaded.stats()["invalidations"], 1)
+        self.assertEqual(reloaded.misses, 1)
+
+    def test_memo_lru_eviction(self):
+        """The least recently used description is evicted first"""
+        memo = senegocia_extended.MatchMemo(max_entries=2)
+        memo.put("a", 1, 0, 0.5)
+        memo.put("b", 2, 1, 0.5)
+        memo.get("a")
+        memo.put("c", 3, 2, 0.5)
+
+        self.assertIsNotNone(memo.get("a"))
+        self.assertIsNone(memo.get("b"))
+        self.assertEqual(memo.evictions, 1)
+
+
+class TestFindBestMatches(unittest.TestCase):
+    """Test cases for batch matching"""
+
+    def test_batch_matches_preserve_input_order(self):
+        """Pool and in-process batches agree with the scalar matcher"""
+        df = _price_df()
+        names = ["guantes nitrilo", "resma carta", "cloro", "resma carta", "xyz"]
+        expected = [senegocia_extended.find_best_match(n, df) for n in names]
+
+        for kwargs in ({"workers": 1}, {"workers": 2, "min_parallel": 1}):
+            results = senegocia_extended.find_best_matches(names, df, **kwargs)
+            self.assertEqual([score for _, score in results], [score for _, score in expected])
+            self.assertEqual(
+                [None if row is None else row["CODIGO"] for row, _ in results],
+                [None if row is None else row["CODIGO"] for row, _ in expected],
+            )
+
+    def test_batch_dedups_normalized_spellings(self):
+        """Spellings that normalize alike are scanned once per batch"""
+        df = _price_df()
+        memo = senegocia_extended.MatchMemo()
+        names = ["Resma Carta", "resma  carta", "RESMA CARTA", "cloro"]
+        with patch.object(senegocia_extended, "_scan_descriptions", wraps=senegocia_extended._scan_descriptions) as scan:
+            results = senegocia_extended.find_best_matches(names, df, memo, workers=1)
+
+        self.assertEqual(scan.call_count, 2)
+        self.assertEqual(len(memo), 2)
+        self.assertEqual(len({score for _, score in results[:3]}), 1)
+
+    def test_batch_uses_memo(self):
+        """Repeated descriptions in later batches are memo hits"""
+        df = _price_df()
+        memo = senegocia_extended.MatchMemo()
+        senegocia_extended.find_best_matches(["cloro", "resma"], df, memo, workers=1)
+        senegocia_extended.find_best_matches(["cloro", "resma"], df, memo, workers=1)
+
+        self.assertEqual(memo.hits, 2)
+        self.assertEqual(memo.misses, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
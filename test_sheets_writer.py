@@ -0,0 +1,100 @@
+"""Unit tests for agents/common/sheets_writer.py"""
+import unittest
+from unittest.mock import Mock
+import sys
+import os
+import csv
+import tempfile
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.common.sheets_writer import BufferedSheetWriter, es_reintentable
+
+
+class _QuotaError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = Mock(status_code=status_code)
+
+
+class TestBufferedSheetWriter(unittest.TestCase):
+    """Test cases for the batched Google Sheets writer"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.spill = os.path.join(self.tmpdir.name, "pendientes.csv")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_rows_are_sent_in_batches(self):
+        """Rows are grouped into append_rows calls of at most batch_size"""
+        sheet = Mock()
+        with BufferedSheetWriter(sheet, batch_size=3, flush_interval=60, spill_path=self.spill) as writer:
+            for i in range(7):
+                writer.append([i, "FirmaVB"])
+
+        enviadas = [fila for call in sheet.append_rows.call_args_list for fila in call.args[0]]
+        self.assertEqual(enviadas, [[i, "FirmaVB"] for i in range(7)])
+        self.assertTrue(all(len(call.args[0]) <= 3 for call in sheet.append_rows.call_args_list))
+        sheet.append_rows.assert_called_with(unittest.mock.ANY, value_input_option="USER_ENTERED")
+        self.assertFalse(os.path.exists(self.spill))
+
+    def test_quota_errors_are_retried(self):
+        """A 429 response is retried with backoff before succeeding"""
+        sheet = Mock()
+        sheet.append_rows.side_effect = [_QuotaError(429), None]
+        with BufferedSheetWriter(sheet, flush_interval=60, spill_path=self.spill, backoff_base=0.01) as writer:
+            writer.append(["fila"])
+
+        self.assertEqual(sheet.append_rows.call_count, 2)
+        self.assertEqual(writer.stats()["enviadas"], 1)
+        self.assertEqual(writer.stats()["reintentos"], 1)
+
+    def test_unsent_rows_are_spilled_on_close(self):
+        """Rows that cannot be sent end up in the local spill file"""
+        sheet = Mock()
+        sheet.append_rows.side_effect = _QuotaError(400)
+        writer = BufferedSheetWriter(sheet, flush_interval=60, spill_path=self.spill)
+        writer.append(["a", 1])
+        writer.append(["b", 2])
+        writer.close()
+
+        with open(self.spill, newline="", encoding="utf-8") as f:
+            self.assertEqual(list(csv.reader(f)), [["a", "1"], ["b", "2"]])
+        self.assertEqual(writer.stats()["respaldadas"], 2)
+
+    def test_close_timeout_does_not_touch_rows_in_flight(self):
+        """If close() times out mid-send, rows are neither spilled twice nor lost"""
+        liberar = threading.Event()
+        enviadas = []
+
+        def append_rows(lote, value_input_option=None):
+            liberar.wait(5)
+            enviadas.extend(lote)
+
+        sheet = Mock()
+        sheet.append_rows.side_effect = append_rows
+        writer = BufferedSheetWriter(sheet, flush_interval=60, spill_path=self.spill)
+        writer.append(["a", 1])
+        writer.close(timeout=0.05)
+        self.assertTrue(writer._thread.is_alive())
+        self.assertFalse(os.path.exists(self.spill))
+
+        liberar.set()
+        writer._thread.join(5)
+        self.assertEqual(enviadas, [["a", 1]])
+        self.assertFalse(os.path.exists(self.spill))
+
+    def test_es_reintentable(self):
+        """Quota and server errors are retryable, client errors are not"""
+        self.assertTrue(es_reintentable(_QuotaError(429)))
+        self.assertTrue(es_reintentable(_QuotaError(503)))
+        self.assertFalse(es_reintentable(_QuotaError(400)))
+        self.assertTrue(es_reintentable(ConnectionError("reset")))
+
+
+if __name__ == '__main__':
+    unittest.main()